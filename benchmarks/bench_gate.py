@@ -0,0 +1,65 @@
+"""Benchmarks du Safety Gate : évaluation unitaire et par lots."""
+
+import itertools
+import random
+
+from harness import benchmark
+
+from demo.clock import VirtualClock
+from demo.guard_lite import TemporalState, evaluate
+
+BATCH_SIZE = 100_000
+
+
+def _actions(n, n_agents=1000, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "agent_id": f"agent_{rng.randrange(n_agents)}",
+        "intent": "buy_api_access",
+        "amount_usdc": rng.randint(1, 10),
+        "recipient": "api_provider",
+        "coherence": 0.3 if rng.random() < 0.1 else 0.9,
+    } for _ in range(n)]
+
+
+@benchmark("gate.evaluate")
+def evaluate_single():
+    state, clock = TemporalState(), VirtualClock()
+    actions = itertools.cycle(_actions(10_000))
+
+    def run():
+        clock.sleep(0.01)
+        evaluate(next(actions), state=state, clock=clock)
+    return run
+
+
+@benchmark("gate.evaluate_batch", items=BATCH_SIZE)
+def evaluate_batch_throughput():
+    import numpy as np
+    from demo.guard_batch import evaluate_batch
+
+    rng = np.random.default_rng(0)
+    timestamps = np.cumsum(rng.exponential(0.01, BATCH_SIZE))
+    agent_ids = rng.integers(0, 1000, BATCH_SIZE)
+    amounts = rng.integers(1, 11, BATCH_SIZE).astype(np.float64)
+    coherence = np.where(rng.random(BATCH_SIZE) < 0.1, 0.3, 0.9)
+
+    def run():
+        evaluate_batch(timestamps, agent_ids, amounts, coherence)
+    return run
+
+
+@benchmark("gate.evaluate[policies]")
+def evaluate_with_policies():
+    """gate.evaluate avec des plafonds nombre, montant et token bucket évalués dans la même passe."""
+    from demo.policies import AmountLimit, CountLimit, PolicySet, TokenBucket
+
+    state, clock = TemporalState(), VirtualClock()
+    policies = PolicySet([CountLimit(5, 60), AmountLimit(100, 3600, scope="recipient"),
+                          TokenBucket(20, 60, scope="agent_recipient")])
+    actions = itertools.cycle(_actions(10_000))
+
+    def run():
+        clock.sleep(0.01)
+        evaluate(next(actions), state=state, clock=clock, policies=policies)
+    return run
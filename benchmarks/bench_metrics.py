@@ -0,0 +1,43 @@
+"""Surcoût de l'instrumentation : métriques désactivées vs activées."""
+
+import itertools
+
+from harness import benchmark
+
+from bench_gate import _actions
+from demo import metrics
+from demo.clock import VirtualClock
+from demo.guard_lite import TemporalState, evaluate
+
+
+@benchmark("metrics.counter_inc")
+def counter_inc():
+    counter = metrics.Counter("bench_counter_total", "benchmark", ("verdict", "reason"))
+
+    def run():
+        counter.inc("ALLOW", "OK")
+    return run
+
+
+@benchmark("metrics.histogram_observe")
+def histogram_observe():
+    histogram = metrics.Histogram("bench_seconds", "benchmark")
+    values = itertools.cycle([850, 1_200, 3_400, 48_000, 1_500_000])
+
+    def run():
+        histogram.observe_ns(next(values))
+    return run
+
+
+@benchmark("gate.evaluate[metrics]")
+def evaluate_instrumented():
+    """Même charge que gate.evaluate, métriques activées le temps de la mesure."""
+    state, clock = TemporalState(), VirtualClock()
+    actions = itertools.cycle(_actions(10_000))
+
+    def run():
+        clock.sleep(0.01)
+        evaluate(next(actions), state=state, clock=clock)
+    run.enter = metrics.enable
+    run.exit = metrics.disable
+    return run
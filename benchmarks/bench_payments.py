@@ -0,0 +1,58 @@
+"""Benchmarks du chemin de paiement : frais, message Moltbook, bout en bout."""
+
+import itertools
+
+from harness import benchmark
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+@benchmark("fees.charge_transaction_fee")
+def charge_transaction_fee():
+    from web3_integration.x108_token_layer import X108TokenEconomics
+
+    token_layer = X108TokenEconomics(contract_address=ZERO_ADDRESS)  # mode démo
+    amounts = itertools.cycle([0.01, 3, 7.5, 12.345678, 250])
+
+    def run():
+        token_layer.charge_transaction_fee(next(amounts))
+    return run
+
+
+@benchmark("moltbook.generate_message")
+def generate_message():
+    from web3_integration.moltbook_integration import MoltbookIntegration
+
+    moltbook = MoltbookIntegration(api_key="", api_url="http://127.0.0.1:9")  # mode démo
+    transactions = itertools.cycle([
+        {"status": "ALLOW", "amount": 3, "coherence": 0.82, "temporal_passed": True},
+        {"status": "BLOCK", "amount": 10, "coherence": 0.3, "temporal_passed": False},
+    ])
+
+    def run():
+        moltbook._generate_message(next(transactions))
+    return run
+
+
+@benchmark("e2e.agent_request_evaluate_pay")
+def agent_request_evaluate_pay():
+    """agent_request -> evaluate -> pay_usdc, paiements envoyés au stub Arc local."""
+    from demo.agent import agent_request
+    from demo.arc_client import ARC_API_KEY
+    from demo.clock import VirtualClock
+    from demo.guard_lite import TemporalState, evaluate
+    from demo.pay_usdc import pay_usdc
+
+    if not ARC_API_KEY:
+        raise RuntimeError("run through benchmarks/run.py, which points ARC_API_URL at a local stub")
+    state, clock = TemporalState(), VirtualClock()
+    agents = itertools.cycle(range(1000))
+
+    def run():
+        clock.sleep(0.011)  # chaque agent revient après 11 s virtuelles : tous les appels paient
+        action = agent_request({"amount": 3, "recipient": "api_provider", "agent_id": f"agent_{next(agents)}"})
+        if evaluate(action, state=state, clock=clock) == "ALLOW":
+            result = pay_usdc(action["amount_usdc"], action["recipient"])
+            if result.get("status") == "failed":
+                raise RuntimeError(result["error"])
+    return run
@@ -0,0 +1,117 @@
+"""
+Outils communs des benchmarks : enregistrement, mesure, stockage.
+
+Un benchmark est une fonction décorée par `@benchmark` qui prépare son état
+et renvoie la fonction à chronométrer. `items` est le nombre d'opérations
+traitées par appel (ex. taille du lot), pour un coût par opération comparable.
+Les attributs optionnels `enter` / `exit` de cette fonction encadrent la
+mesure (ex. activer un réglage global puis le rétablir).
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+RESULTS_DIR = ROOT_DIR / ".benchmarks"
+
+REGISTRY = {}
+
+
+def benchmark(name, items=1):
+    """Enregistre une fonction de préparation sous `name`."""
+    def register(setup):
+        REGISTRY[name] = {"setup": setup, "items": items}
+        return setup
+    return register
+
+
+def measure(fn, min_time=0.2, repeat=5):
+    """
+    Chronomètre `fn` comme timeit : nombre de boucles calibré pour qu'une
+    répétition dure au moins `min_time`, puis `repeat` répétitions.
+
+    Returns:
+        Liste des durées par appel (ns), une par répétition
+    """
+    loops = 1
+    while True:
+        started = time.perf_counter_ns()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter_ns() - started
+        if elapsed >= min_time * 1e9:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time * 1e9 / elapsed) + 1))
+
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter_ns()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter_ns() - started) / loops)
+    return samples
+
+
+def run_benchmark(name, min_time=0.2, repeat=5):
+    """Prépare puis mesure un benchmark ; durées rapportées par opération."""
+    entry = REGISTRY[name]
+    fn = entry["setup"]()
+    getattr(fn, "enter", lambda: None)()
+    try:
+        samples = measure(fn, min_time, repeat)
+    finally:
+        getattr(fn, "exit", lambda: None)()
+    items = entry["items"]
+    return {
+        "median_ns": statistics.median(samples) / items,
+        "min_ns": min(samples) / items,
+        "items": items,
+        "repeat": repeat,
+    }
+
+
+def git_revision():
+    """(commit court, arbre modifié ?) du dépôt, ou ('unknown', False) hors git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def save_results(results):
+    """Écrit `.benchmarks/<commit>[-dirty].json` et renvoie son chemin."""
+    commit, dirty = git_revision()
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"{commit}{'-dirty' if dirty else ''}.json"
+    document = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2, sort_keys=True))
+    return path
+
+
+def load_results(ref=None, exclude=None):
+    """
+    Charge un résultat stocké : `ref` (commit ou chemin), sinon le plus récent
+    hors `exclude`.
+    """
+    if ref is not None:
+        path = Path(ref) if Path(ref).exists() else RESULTS_DIR / f"{ref}.json"
+        return json.loads(path.read_text())
+    candidates = sorted(RESULTS_DIR.glob("*.json"), key=lambda p: json.loads(p.read_text())["timestamp"])
+    candidates = [p for p in candidates if exclude is None or p.resolve() != Path(exclude).resolve()]
+    return json.loads(candidates[-1].read_text()) if candidates else None
@@ -0,0 +1,104 @@
+"""
+Garde-fou du temps de démarrage (cold start)
+=============================================
+
+Importe chaque point d'entrée dans un interpréteur neuf avec
+`python -X importtime`, relève le temps d'import cumulé (meilleur de N
+essais) et vérifie qu'aucune dépendance lourde (web3, pandas, requests...)
+n'est chargée sur les chemins qui n'en ont pas besoin.
+
+Usage :
+    python benchmarks/import_time.py              # tableau + code de sortie 1 si un garde-fou casse
+    python benchmarks/import_time.py --runs 10 --budget-ms 80
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ('web3', 'eth_account', 'pandas', 'numpy', 'requests', 'aiohttp', 'streamlit')
+
+# Point d'entrée -> dépendances lourdes qu'il ne doit pas charger
+ENTRY_POINTS = {
+    'demo.guard_lite': HEAVY_MODULES,
+    'demo.run_demo': HEAVY_MODULES,
+    'demo.interactive_demo': HEAVY_MODULES,
+    'demo.test_scenarios': HEAVY_MODULES,
+    'demo.simulation': HEAVY_MODULES,
+    'demo.policies': HEAVY_MODULES,
+    'web3_integration.x108_token_layer': ('web3', 'eth_account', 'pandas', 'numpy'),
+}
+
+# Environnement ajouté à l'import de certains points d'entrée : demo.policies
+# importé en premier avec des politiques configurées (import circulaire)
+ENTRY_ENV = {
+    'demo.policies': {'X108_POLICIES': 'count:agent:5/60,amount:recipient:100/3600'},
+}
+
+DEFAULT_BUDGET_MS = 50.0
+MARKER = '__import_time_loaded__'
+
+
+def measure(module: str, extra_env=None):
+    """
+    Importe `module` dans un processus neuf.
+
+    Returns:
+        (temps d'import cumulé en ms, liste des modules lourds chargés)
+    """
+    probe = (
+        f'import sys, json; import {module}; '
+        f'print({MARKER!r} + json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))'
+    )
+    env = dict(os.environ, PYTHONPATH=str(ROOT_DIR), **(extra_env or {}))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', probe],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True, stdin=subprocess.DEVNULL
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'import {module} failed:\n{result.stderr[-2000:]}')
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.strip() == module:
+            cumulative_us = int(cumulative)
+    loaded = next(json.loads(line[len(MARKER):]) for line in result.stdout.splitlines() if line.startswith(MARKER))
+    return cumulative_us / 1000.0, loaded
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Import-time guard for the CLI and gate entry points')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per entry point (best run kept)')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='max cumulative import time')
+    args = parser.parse_args(argv)
+
+    failures = 0
+    print(f"{'entry point':<36} {'import (ms)':>12}  heavy modules loaded")
+    for module, forbidden in ENTRY_POINTS.items():
+        timings, loaded = [], []
+        for _ in range(args.runs):
+            elapsed_ms, loaded = measure(module, ENTRY_ENV.get(module))
+            timings.append(elapsed_ms)
+        best = min(timings)
+        leaked = [name for name in loaded if name in forbidden]
+        status = 'ok'
+        if leaked:
+            status = 'FAIL (heavy import)'
+        elif best > args.budget_ms:
+            status = f'FAIL (> {args.budget_ms:.0f} ms)'
+        failures += status != 'ok'
+        print(f"{module:<36} {best:>12.1f}  {', '.join(loaded) or '-':<20} {status}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Suite de benchmarks du Safety Gate et du chemin de paiement
+============================================================
+
+Exécute les benchmarks `benchmarks/bench_*.py`, enregistre les résultats
+par commit dans `.benchmarks/<commit>.json` et les compare au résultat
+précédent (ou à `--compare <commit>`) pour faire apparaître les régressions.
+
+Les paiements de bout en bout partent vers un stub Arc local
+(`demo/arc_stub_server.py`) : aucune requête ne quitte la machine.
+
+Usage :
+    python benchmarks/run.py                   # tout, comparé au dernier résultat
+    python benchmarks/run.py -k gate --quick
+    python benchmarks/run.py --compare 1a2cad0 --check   # code 1 si régression
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+if str(BENCH_DIR.parent) not in sys.path:
+    sys.path.append(str(BENCH_DIR.parent))
+
+
+def start_stubs():
+    """Démarre le stub Arc et y dirige le client de paiement (avant tout import de demo.pay_usdc)."""
+    from demo.arc_stub_server import start_stub_server
+
+    arc = start_stub_server()
+    os.environ["ARC_API_KEY"] = "benchmark"
+    os.environ["ARC_API_URL"] = arc.url
+    os.environ.pop("ARC_BATCH_URL", None)
+    return arc
+
+
+def load_benchmarks():
+    for path in sorted(BENCH_DIR.glob("bench_*.py")):
+        importlib.import_module(path.stem)
+
+
+def compare(current, baseline, threshold):
+    """Affiche l'écart (min/op) de chaque benchmark ; renvoie le nombre de régressions."""
+    regressions = 0
+    print(f"\ncomparé à {baseline['commit']}{' (dirty)' if baseline['dirty'] else ''}")
+    for name, result in current.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"  {name:<36} nouveau")
+            continue
+        # Le minimum est la mesure la moins sensible au bruit de la machine
+        ratio = result["min_ns"] / base["min_ns"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  RÉGRESSION"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = "  amélioration"
+        print(f"  {name:<36} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def format_ns(ns):
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("µs", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f} {unit}"
+    return f"{ns:.0f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="X-108 benchmark suite")
+    parser.add_argument("-k", dest="pattern", help="run only benchmarks whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="shorter runs (noisier)")
+    parser.add_argument("--compare", help="baseline commit (default: latest stored result)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as regression")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 on regression")
+    parser.add_argument("--no-save", action="store_true", help="do not store this run")
+    args = parser.parse_args(argv)
+
+    arc = start_stubs()
+    from harness import REGISTRY, load_results, run_benchmark, save_results
+    load_benchmarks()
+
+    min_time, repeat = (0.05, 3) if args.quick else (0.2, 5)
+    results = {}
+    print(f"{'benchmark':<36} {'médiane/op':>12} {'min/op':>12} {'ops/s':>14}")
+    try:
+        for name in REGISTRY:
+            if args.pattern and args.pattern not in name:
+                continue
+            result = run_benchmark(name, min_time, repeat)
+            results[name] = result
+            print(f"{name:<36} {format_ns(result['median_ns']):>12} {format_ns(result['min_ns']):>12} "
+                  f"{1e9 / result['median_ns']:>14,.0f}")
+    finally:
+        arc.shutdown()
+
+    saved = None
+    if not args.no_save:
+        saved = save_results(results)
+        print(f"\nrésultats enregistrés dans {saved.relative_to(BENCH_DIR.parent)}")
+
+    baseline = load_results(args.compare, exclude=saved)
+    regressions = compare(results, baseline, args.threshold) if baseline else 0
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
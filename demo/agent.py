@@ -1,6 +1,9 @@
 def agent_request(action_context):
-    return {
+    request = {
         "intent": "buy_api_access",
         "amount_usdc": action_context.get("amount", 1),
         "recipient": action_context.get("recipient", "merchant_demo")
     }
+    if "agent_id" in action_context:
+        request["agent_id"] = action_context["agent_id"]
+    return request
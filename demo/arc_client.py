@@ -0,0 +1,168 @@
+"""
+Client HTTP poolé pour l'API de paiement Arc
+=============================================
+
+Une seule `requests.Session` par processus : connexions keep-alive
+réutilisées (pas de handshake TCP/TLS par paiement), en-têtes construits une
+fois, timeouts explicites, retries avec backoff exponentiel + jitter et clé
+d'idempotence par paiement (réutilisée à chaque retry, le serveur ne débite
+donc qu'une fois).
+"""
+import os
+import random
+import threading
+import time
+import uuid
+
+ARC_API_URL = os.getenv("ARC_API_URL", "https://api.arc.example/pay")
+ARC_API_KEY = os.getenv("ARC_API_KEY")
+ARC_BATCH_URL = os.getenv("ARC_BATCH_URL")  # défaut : ARC_API_URL + "/batch"
+ARC_POOL_SIZE = int(os.getenv("ARC_POOL_SIZE", "10"))
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def backoff_delay(attempt, base, cap, retry_after=None):
+    """Backoff exponentiel « full jitter », ou Retry-After s'il est fourni et valide."""
+    if retry_after is not None:
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = None
+        if delay is not None and delay >= 0:  # écarte aussi NaN
+            return min(delay, cap)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class ArcError(Exception):
+    """Paiement refusé par Arc ou non abouti après tous les retries."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ArcClient:
+    """
+    Client Arc thread-safe à pool de connexions.
+    """
+
+    def __init__(self, api_url=None, api_key=None, pool_size=ARC_POOL_SIZE,
+                 connect_timeout=3.05, read_timeout=10.0, max_retries=3,
+                 backoff_base=0.2, backoff_max=5.0):
+        """
+        Args:
+            api_url: Endpoint de paiement Arc
+            api_key: Clé API Arc (Bearer)
+            pool_size: Connexions keep-alive conservées par hôte
+            connect_timeout: Timeout d'établissement de connexion (s)
+            read_timeout: Timeout de lecture de la réponse (s)
+            max_retries: Nombre de nouvelles tentatives après le premier essai
+            backoff_base: Délai de base du backoff exponentiel (s)
+            backoff_max: Plafond du backoff (s)
+        """
+        self.api_url = api_url or ARC_API_URL
+        self.batch_url = ARC_BATCH_URL or self.api_url.rstrip("/") + "/batch"
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # requests n'est chargé qu'à la création du client : le mode démo
+        # (sans ARC_API_KEY) et les CLI démarrent sans cet import
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._transport_errors = (requests.ConnectionError, requests.Timeout)
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key or ARC_API_KEY}",
+            "Content-Type": "application/json"
+        })
+        # Les retries sont gérés ici (backoff + jitter), pas par urllib3
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=0, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def pay(self, amount, recipient, idempotency_key=None):
+        """
+        Soumet un paiement USDC.
+
+        Returns:
+            Dict renvoyé par Arc
+
+        Raises:
+            ArcError: Refus définitif (4xx) ou échec après tous les retries
+        """
+        payload = {
+            "asset": "USDC",
+            "amount": amount,
+            "recipient": recipient
+        }
+        return self.post_json(self.api_url, payload, idempotency_key)
+
+    def pay_batch(self, payments, idempotency_key=None):
+        """
+        Soumet plusieurs paiements en une requête.
+
+        Args:
+            payments: Liste de dicts {amount, recipient, idempotency_key}
+
+        Returns:
+            Liste des résultats Arc, dans l'ordre de `payments`
+        """
+        payload = {
+            "asset": "USDC",
+            "payments": payments
+        }
+        results = self.post_json(self.batch_url, payload, idempotency_key).get("results", [])
+        if len(results) != len(payments):
+            raise ArcError(f"Arc returned {len(results)} results for {len(payments)} payments")
+        return results
+
+    def post_json(self, url, payload, idempotency_key=None):
+        """POST JSON avec retries ; la clé d'idempotence est fixe pour tous les essais."""
+        headers = {"Idempotency-Key": idempotency_key or uuid.uuid4().hex}
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = self.session.post(url, json=payload, headers=headers,
+                                             timeout=self.timeout)
+            except self._transport_errors as e:
+                error = ArcError(f"Arc request failed: {e}")
+            else:
+                if response.status_code < 400:
+                    try:
+                        return response.json()
+                    except ValueError as e:  # requests.JSONDecodeError
+                        raise ArcError(f"Arc returned invalid JSON (HTTP {response.status_code}): {e}",
+                                       status_code=response.status_code) from None
+                error = ArcError(f"HTTP {response.status_code}: {response.text}",
+                                 status_code=response.status_code)
+                if response.status_code not in RETRY_STATUSES:
+                    raise error
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt >= self.max_retries:
+                raise error
+            time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after))
+            attempt += 1
+
+    def close(self):
+        self.session.close()
+
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_arc_client():
+    """Client Arc partagé par le processus (créé au premier paiement)."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = ArcClient()
+    return _CLIENT
@@ -0,0 +1,115 @@
+"""
+Serveur Arc local (stub) pour tester le chemin de paiement
+===========================================================
+
+Accepte les paiements sur n'importe quel chemin POST, répond en JSON,
+respecte les clés d'idempotence et garde HTTP/1.1 keep-alive, ce qui permet
+de vérifier la réutilisation des connexions. Des erreurs 503 peuvent être
+injectées pour exercer les retries.
+
+Usage :
+    python demo/arc_stub_server.py --port 8787 [--fail-rate 0.1]
+    ARC_API_URL=http://127.0.0.1:8787/pay ARC_API_KEY=test python demo/run_demo.py
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ArcStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        with server.lock:
+            server.requests += 1
+            fail = server.fail_rate and server.rng.random() < server.fail_rate
+        if fail:
+            self._reply(503, {"error": "injected failure"})
+            return
+
+        key = self.headers.get("Idempotency-Key")
+        with server.lock:
+            if key is not None and key in server.idempotent:
+                result = server.idempotent[key]
+            else:
+                result = self._settle(body)
+                if key is not None:
+                    server.idempotent[key] = result
+        self._reply(200, result)
+
+    def _settle(self, body):
+        server = self.server
+        if "payments" in body:
+            return {"results": [self._settle(p) for p in body["payments"]]}
+        server.payments += 1
+        return {
+            "status": "submitted",
+            "payment_id": f"pay_{next(server.ids)}",
+            "amount": body.get("amount"),
+            "recipient": body.get("recipient")
+        }
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ArcStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), fail_rate=0.0, seed=0):
+        super().__init__(address, ArcStubHandler)
+        self.lock = threading.Lock()
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.ids = itertools.count(1)
+        self.idempotent = {}
+        self.connections = 0
+        self.requests = 0
+        self.payments = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/pay"
+
+
+def start_stub_server(port=0, fail_rate=0.0):
+    """Démarre le stub dans un thread démon et renvoie le serveur (voir `.url`)."""
+    server = ArcStubServer(("127.0.0.1", port), fail_rate=fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub local de l'API Arc")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ArcStubServer(("127.0.0.1", args.port), fail_rate=args.fail_rate)
+    print(f"[ARC stub] listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,218 @@
+"""
+Pipeline de paiement asyncio
+=============================
+
+`pay_usdc_async` est l'équivalent non bloquant de `pay_usdc` (client aiohttp
+à pool keep-alive, mêmes retries / idempotence que `ArcClient`).
+`run_payment_pipeline` évalue les actions dans l'ordre avec le Safety Gate
+et soumet les paiements ALLOW en parallèle : un sémaphore borne le nombre de
+paiements en vol, et l'évaluation des actions suivantes attend qu'une place
+se libère (backpressure). Les résultats sont rendus dans l'ordre d'entrée.
+
+Usage (contre le stub Arc local) :
+    python demo/async_payments.py 10000 --concurrency 200
+"""
+import argparse
+import asyncio
+import threading
+import time
+import uuid
+
+from demo.arc_client import (ARC_API_KEY, ARC_API_URL, ARC_POOL_SIZE, RETRY_STATUSES,
+                             ArcError, backoff_delay)
+from demo.guard_lite import evaluate
+
+
+class AsyncArcClient:
+    """
+    Client Arc asyncio (aiohttp), une session poolée par boucle d'événements.
+    """
+
+    def __init__(self, api_url=None, api_key=None, pool_size=ARC_POOL_SIZE,
+                 connect_timeout=3.05, read_timeout=10.0, max_retries=3,
+                 backoff_base=0.2, backoff_max=5.0):
+        self.api_url = api_url or ARC_API_URL
+        self.api_key = api_key or ARC_API_KEY
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._session = None
+        self._loop = None
+
+    def _get_session(self):
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._loop is not loop:
+            import aiohttp  # dépendance optionnelle, uniquement pour le mode réel
+
+            self._aiohttp = aiohttp
+            self._loop = loop
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout,
+                                              sock_read=self.read_timeout),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                }
+            )
+        return self._session
+
+    async def pay(self, amount, recipient, idempotency_key=None):
+        """Soumet un paiement USDC ; lève ArcError comme `ArcClient.pay`."""
+        payload = {
+            "asset": "USDC",
+            "amount": amount,
+            "recipient": recipient
+        }
+        return await self.post_json(self.api_url, payload, idempotency_key)
+
+    async def post_json(self, url, payload, idempotency_key=None):
+        session = self._get_session()
+        headers = {"Idempotency-Key": idempotency_key or uuid.uuid4().hex}
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                async with session.post(url, json=payload, headers=headers) as response:
+                    if response.status < 400:
+                        try:
+                            return await response.json()
+                        except (ValueError, self._aiohttp.ContentTypeError) as e:
+                            raise ArcError(f"Arc returned invalid JSON (HTTP {response.status}): {e}",
+                                           status_code=response.status) from None
+                    error = ArcError(f"HTTP {response.status}: {await response.text()}",
+                                     status_code=response.status)
+                    if response.status not in RETRY_STATUSES:
+                        raise error
+                    retry_after = response.headers.get("Retry-After")
+            except (self._aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = ArcError(f"Arc request failed: {e}")
+
+            if attempt >= self.max_retries:
+                raise error
+            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after))
+            attempt += 1
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_async_arc_client():
+    """Client Arc asyncio partagé par le processus (créé au premier paiement)."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = AsyncArcClient()
+    return _CLIENT
+
+
+async def pay_usdc_async(amount, recipient, idempotency_key=None, client=None):
+    """
+    Paiement USDC non bloquant.
+
+    Sans `client` ni ARC_API_KEY, le paiement est simulé (sans affichage,
+    pour rester utilisable avec des milliers de paiements en vol) ; avec
+    ARC_API_KEY, le client partagé `get_async_arc_client()` est utilisé.
+    """
+    if client is None and not ARC_API_KEY:
+        await asyncio.sleep(0)
+        return {"status": "submitted", "amount": amount}
+
+    if client is None:
+        client = get_async_arc_client()
+    try:
+        return await client.pay(amount, recipient, idempotency_key)
+    except ArcError as e:
+        return {"status": "failed", "amount": amount, "error": str(e)}
+
+
+async def run_payment_pipeline(actions, concurrency=100, client=None, gate=evaluate):
+    """
+    Évalue les actions dans l'ordre puis paie les ALLOW en parallèle.
+
+    L'évaluation reste séquentielle (le HOLD temporel dépend de l'ordre) ;
+    seuls les paiements sont concurrents, au plus `concurrency` à la fois.
+
+    Args:
+        actions: Itérable d'actions (dicts au format de agent_request)
+        concurrency: Nombre maximal de paiements en vol
+        client: AsyncArcClient (None = client ouvert pour ce run si ARC_API_KEY, sinon mode démo)
+        gate: Fonction d'évaluation (guard_lite.evaluate par défaut)
+
+    Returns:
+        Liste de dicts {action, decision, payment}, dans l'ordre d'entrée
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    if client is None and ARC_API_KEY:
+        async with AsyncArcClient(pool_size=concurrency) as client:
+            return await run_payment_pipeline(actions, concurrency, client, gate)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+    tasks = []
+
+    async def submit(slot, action):
+        try:
+            slot["payment"] = await pay_usdc_async(action["amount_usdc"], action["recipient"],
+                                                   client=client)
+        finally:
+            semaphore.release()
+
+    for action in actions:
+        decision = gate(action)
+        slot = {"action": action, "decision": decision, "payment": None}
+        results.append(slot)
+        if decision == "ALLOW":
+            await semaphore.acquire()  # backpressure : pas plus de `concurrency` en vol
+            tasks.append(asyncio.ensure_future(submit(slot, action)))
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    return results
+
+
+async def _main(n, concurrency, fail_rate):
+    from demo.arc_stub_server import start_stub_server
+
+    server = start_stub_server(fail_rate=fail_rate)
+    actions = [
+        {"agent_id": f"agent_{i}", "intent": "buy_api_access",
+         "amount_usdc": 1, "recipient": "api_provider"}
+        for i in range(n)
+    ]
+    async with AsyncArcClient(api_url=server.url, api_key="stub", pool_size=concurrency,
+                              backoff_base=0.01) as client:
+        started = time.perf_counter()
+        results = await run_payment_pipeline(actions, concurrency=concurrency, client=client)
+        elapsed = time.perf_counter() - started
+
+    paid = sum(1 for r in results if r["payment"] and r["payment"]["status"] == "submitted")
+    print(f"{paid}/{len(results)} paiements en {elapsed:.2f} s "
+          f"({paid / elapsed:.0f}/s, {server.connections} connexions)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline de paiement asyncio contre le stub Arc")
+    parser.add_argument("n", type=int, nargs="?", default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(_main(args.n, args.concurrency, args.fail_rate))
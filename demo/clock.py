@@ -0,0 +1,39 @@
+"""
+Horloges injectables pour le Safety Gate.
+
+`SystemClock` suit le temps réel ; `VirtualClock` n'avance que lorsqu'on le
+lui demande, ce qui permet de rejouer les scénarios (et des charges
+synthétiques) sans attendre réellement la fenêtre de HOLD.
+"""
+import time
+
+
+class SystemClock:
+    """Temps réel (time.time / time.sleep)."""
+
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """Temps simulé : sleep() avance l'horloge instantanément."""
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+
+    def now(self):
+        return self._now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self._now += seconds
+
+    def advance_to(self, ts):
+        """Avance jusqu'à `ts` ; le temps virtuel ne recule jamais."""
+        if ts < self._now:
+            raise ValueError(f"cannot move virtual clock back from {self._now} to {ts}")
+        self._now = float(ts)
@@ -0,0 +1,247 @@
+"""
+Journal persistant des décisions du Safety Gate
+================================================
+
+Journal append-only stocké dans SQLite (WAL), partagé entre les sessions du
+dashboard et conservé après un redémarrage :
+
+- `append` écrit la décision et met à jour la ligne d'agrégats (`totals`)
+  dans la même transaction
+- `stats` (DecisionStats) relit cette ligne par sa clé primaire : une
+  requête O(1), sans parcours de l'historique, qui voit aussi les ajouts
+  des autres processus partageant le fichier (workers Streamlit, serveur
+  du gate, replayer)
+- Montants et frais en micro-USDC entiers, frais calculés par
+  `fee_engine` (même arrondi que le contrat, paiement par paiement)
+- `page` lit une page par plage d'identifiants (pas d'OFFSET, pas de DataFrame complet)
+
+Usage :
+    log = DecisionLog('x108_decisions.db')
+    log.append({'amount': 3, 'recipient': 'api_provider', 'decision': 'ALLOW', ...})
+    log.page(0, page_size=50)      # 50 décisions les plus récentes
+"""
+
+from typing import Dict, Iterable, List
+import os
+import sqlite3
+import threading
+import time
+
+from web3_integration import fee_engine
+
+DEFAULT_LOG_PATH = os.getenv('X108_DECISION_LOG', 'x108_decisions.db')
+
+COLUMNS = ('timestamp', 'amount', 'recipient', 'coherence', 'intent', 'decision', 'reason')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    amount REAL NOT NULL,
+    recipient TEXT,
+    coherence REAL,
+    intent TEXT,
+    decision TEXT NOT NULL,
+    reason TEXT
+);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total INTEGER NOT NULL,
+    allowed INTEGER NOT NULL,
+    allowed_micro INTEGER NOT NULL,
+    fees_micro INTEGER NOT NULL
+);
+"""
+TOTALS_COLUMNS = ('total', 'allowed', 'allowed_micro', 'fees_micro')
+
+INSERT_SQL = (
+    'INSERT INTO decisions (' + ', '.join(COLUMNS) + ') VALUES (' + ', '.join('?' * len(COLUMNS)) + ')'
+)
+UPDATE_TOTALS_SQL = (
+    'UPDATE totals SET total = total + ?, allowed = allowed + ?, allowed_micro = allowed_micro + ?, '
+    'fees_micro = fees_micro + ? WHERE id = 0'
+)
+SELECT_TOTALS_SQL = 'SELECT ' + ', '.join(TOTALS_COLUMNS) + ' FROM totals WHERE id = 0'
+
+
+class DecisionStats:
+    """
+    Agrégats des décisions, mis à jour en O(1) à chaque décision.
+    Montant autorisé et frais en micro-USDC entiers (voir fee_engine).
+    """
+
+    __slots__ = ('total', 'allowed', 'allowed_micro', 'fees_micro')
+
+    def __init__(self, total: int = 0, allowed: int = 0, allowed_micro: int = 0, fees_micro: int = 0):
+        self.total = total
+        self.allowed = allowed
+        self.allowed_micro = allowed_micro
+        self.fees_micro = fees_micro
+
+    def record(self, decision, amount: float = 0.0):
+        self.total += 1
+        if decision == 'ALLOW':
+            amount_micro = fee_engine.to_micro(amount)
+            self.allowed += 1
+            self.allowed_micro += amount_micro
+            self.fees_micro += fee_engine.compute_fee(amount_micro)
+
+    def reset(self):
+        self.total = self.allowed = self.allowed_micro = self.fees_micro = 0
+
+    @property
+    def blocked(self) -> int:
+        return self.total - self.allowed
+
+    @property
+    def block_rate(self) -> float:
+        return self.blocked / self.total * 100 if self.total else 0.0
+
+    @property
+    def allow_rate(self) -> float:
+        return self.allowed / self.total * 100 if self.total else 0.0
+
+    @property
+    def allowed_amount(self) -> float:
+        return fee_engine.from_micro(self.allowed_micro)
+
+    @property
+    def total_fees(self) -> float:
+        return fee_engine.from_micro(self.fees_micro)
+
+    def as_dict(self) -> Dict:
+        return {
+            'total': self.total,
+            'allowed': self.allowed,
+            'blocked': self.blocked,
+            'allowed_amount': self.allowed_amount,
+            'total_fees': self.total_fees
+        }
+
+
+class DecisionLog:
+    """
+    Journal append-only des décisions ALLOW/BLOCK, avec agrégats incrémentaux.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOG_PATH):
+        """
+        Args:
+            path: Fichier SQLite (':memory:' pour un journal éphémère)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._db:
+            self._db.execute('BEGIN IMMEDIATE')  # un seul processus initialise les agrégats
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    self._db.execute(statement)
+            self._db.execute('INSERT OR IGNORE INTO totals VALUES (0, 0, 0, 0, 0)')
+
+    def append(self, record: Dict) -> int:
+        """
+        Ajoute une décision au journal.
+
+        Args:
+            record: Dict avec amount, recipient, coherence, intent, decision, reason
+                    (timestamp par défaut : maintenant)
+
+        Returns:
+            Identifiant de la décision
+        """
+        with self._lock:
+            with self._db:
+                row_id, row = self._insert(record)
+        return row_id
+
+    def append_many(self, records: Iterable[Dict]) -> int:
+        """
+        Ajoute un lot de décisions en une seule transaction.
+
+        Returns:
+            Nombre de décisions ajoutées
+        """
+        rows = [self._row(record) for record in records]
+        delta = DecisionStats()
+        for row in rows:
+            delta.record(row[5], row[1])
+        with self._lock:
+            with self._db:
+                self._db.executemany(INSERT_SQL, rows)
+                self._db.execute(UPDATE_TOTALS_SQL, self._totals(delta))
+        return len(rows)
+
+    def _insert(self, record: Dict):
+        row = self._row(record)
+        delta = DecisionStats()
+        delta.record(row[5], row[1])
+        cursor = self._db.execute(INSERT_SQL, row)
+        self._db.execute(UPDATE_TOTALS_SQL, self._totals(delta))
+        return cursor.lastrowid, row
+
+    @staticmethod
+    def _totals(stats: DecisionStats) -> tuple:
+        return tuple(getattr(stats, column) for column in TOTALS_COLUMNS)
+
+    @staticmethod
+    def _row(record: Dict) -> tuple:
+        return (
+            record.get('timestamp') or time.strftime('%Y-%m-%d %H:%M:%S'),
+            float(record.get('amount', 0)),
+            record.get('recipient'),
+            record.get('coherence'),
+            record.get('intent'),
+            str(record['decision']),
+            record.get('reason')
+        )
+
+    @property
+    def stats(self) -> DecisionStats:
+        """
+        Agrégats courants, lus dans la ligne `totals` (tous processus confondus).
+        """
+        with self._lock:
+            return DecisionStats(*self._db.execute(SELECT_TOTALS_SQL).fetchone())
+
+    def aggregates(self) -> Dict:
+        """
+        Returns:
+            Dict avec total, allowed, blocked, allowed_amount et total_fees (USDC)
+        """
+        return self.stats.as_dict()
+
+    def __len__(self) -> int:
+        return self.stats.total
+
+    def last_id(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COALESCE(MAX(id), 0) FROM decisions').fetchone()[0]
+
+    def page(self, page: int = 0, page_size: int = 100) -> List[Dict]:
+        """
+        Renvoie une page de décisions, des plus récentes aux plus anciennes.
+
+        Le journal étant append-only, les identifiants sont contigus : une page
+        est une plage d'identifiants lue par la clé primaire, en temps constant
+        quel que soit son rang.
+
+        Args:
+            page: Rang de la page (0 = la plus récente)
+            page_size: Nombre de décisions par page
+        """
+        upper = self.last_id() - page * page_size
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT id, ' + ', '.join(COLUMNS) + ' FROM decisions '
+                'WHERE id <= ? AND id > ? ORDER BY id DESC',
+                (upper, upper - page_size)
+            ).fetchall()
+        return [dict(zip(('id',) + COLUMNS, row)) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
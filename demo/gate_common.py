@@ -0,0 +1,32 @@
+"""
+Names shared by the safety gate and its rate policies.
+
+A leaf module (standard library only, imports nothing from demo): both
+`guard_lite` and `policies` import from here, so either can be imported
+first. `guard_lite` re-exports everything below.
+"""
+
+# Temporal state is keyed per agent by default; actions without an
+# "agent_id" share the default key, so single-agent demos keep one HOLD.
+DEFAULT_AGENT_ID = "default"
+SCOPES = ("agent", "recipient", "agent_recipient")
+DEFAULT_SCOPE = "agent"
+
+# Reason codes: which rule decided
+REASON_OK = "OK"
+REASON_TEMPORAL_HOLD = "TEMPORAL_HOLD"
+REASON_LOW_COHERENCE = "LOW_COHERENCE"
+REASON_RATE_LIMIT = "RATE_LIMIT"        # demo.policies.CountLimit, TokenBucket
+REASON_AMOUNT_LIMIT = "AMOUNT_LIMIT"    # demo.policies.AmountLimit
+
+
+def state_key(action, scope=DEFAULT_SCOPE):
+    """Key under which the HOLD window of `action` is tracked."""
+    agent = action.get("agent_id", DEFAULT_AGENT_ID)
+    if scope == "agent":
+        return agent
+    if scope == "recipient":
+        return action.get("recipient")
+    if scope == "agent_recipient":
+        return (agent, action.get("recipient"))
+    raise ValueError(f"unknown scope {scope!r}, expected one of {SCOPES}")
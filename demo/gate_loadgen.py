@@ -0,0 +1,138 @@
+"""
+Générateur de charge pour le serveur du Safety Gate
+===================================================
+
+Ouvre plusieurs connexions vers `demo/gate_server.py`, garde jusqu'à
+`--depth` requêtes en vol par connexion (pipelining) et mesure la latence
+de chaque requête (envoi -> réponse) ainsi que le débit.
+
+Usage :
+    python demo/gate_loadgen.py --spawn                      # lance un serveur local
+    python demo/gate_loadgen.py --port 7108 --connections 16 --depth 64
+    python demo/gate_loadgen.py --spawn --batch 100          # op evaluate_batch
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from demo.gate_server import GATE_HOST, GATE_PORT
+
+
+def percentile(sorted_values, q):
+    """Percentile (0-100) d'une liste triée, au rang le plus proche."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def make_request(request_id, rng, agents, batch):
+    def action():
+        return {
+            "agent_id": f"agent_{rng.randrange(agents)}",
+            "intent": "buy_api_access",
+            "amount_usdc": rng.randint(1, 10),
+            "recipient": "api_provider",
+            "coherence": 0.3 if rng.random() < 0.1 else 0.9,
+        }
+
+    if batch > 1:
+        request = {"id": request_id, "op": "evaluate_batch", "actions": [action() for _ in range(batch)]}
+    else:
+        request = {"id": request_id, "op": "evaluate", "action": action()}
+    return json.dumps(request, separators=(",", ":")).encode() + b"\n"
+
+
+async def run_connection(host, port, payloads, depth, latencies):
+    n_requests = len(payloads)
+    sent_at = [0] * n_requests
+
+    reader, writer = await asyncio.open_connection(host, port)
+    next_id = 0
+
+    def send_up_to(limit):
+        nonlocal next_id
+        while next_id < min(limit, n_requests):
+            sent_at[next_id] = time.perf_counter_ns()
+            writer.write(payloads[next_id])
+            next_id += 1
+
+    # Remplit le pipeline, puis envoie une nouvelle requête à chaque réponse
+    send_up_to(depth)
+    for received in range(1, n_requests + 1):
+        response = json.loads(await reader.readline())
+        if "error" in response:
+            raise RuntimeError(f"gate error: {response['error']}")
+        latencies.append(time.perf_counter_ns() - sent_at[response["id"]])
+        send_up_to(received + depth)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_load(host, port, connections, requests_per_connection, depth, agents, batch):
+    # Requêtes préparées avant la mesure : la charge mesure le serveur, pas json.dumps
+    workloads = []
+    for seed in range(connections):
+        rng = random.Random(seed)
+        workloads.append([make_request(request_id, rng, agents, batch)
+                          for request_id in range(requests_per_connection)])
+
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(run_connection(host, port, payloads, depth, latencies) for payloads in workloads))
+    return time.perf_counter() - started, latencies
+
+
+def spawn_server():
+    """Lance `demo/gate_server.py` sur un port libre et attend qu'il écoute."""
+    with socket.socket() as probe:
+        probe.bind((GATE_HOST, 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([sys.executable, "-m", "demo.gate_server", "--port", str(port)],
+                               stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()  # "X-108 gate listening on ..."
+    return process, port
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for the X-108 gate server")
+    parser.add_argument("--host", default=GATE_HOST)
+    parser.add_argument("--port", type=int, default=GATE_PORT)
+    parser.add_argument("--spawn", action="store_true", help="start a local gate server on a free port")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100_000, help="total requests")
+    parser.add_argument("--depth", type=int, default=32, help="in-flight requests per connection")
+    parser.add_argument("--batch", type=int, default=1, help="actions per request (evaluate_batch if > 1)")
+    parser.add_argument("--agents", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        server, args.port = spawn_server()
+    try:
+        per_connection = max(1, args.requests // args.connections)
+        elapsed, latencies = asyncio.run(run_load(
+            args.host, args.port, args.connections, per_connection, args.depth, args.agents, args.batch
+        ))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"{total} requêtes ({total * args.batch} décisions) en {elapsed:.2f} s "
+          f"sur {args.connections} connexions, profondeur {args.depth}")
+    print(f"  débit   : {total / elapsed:,.0f} req/s ({total * args.batch / elapsed:,.0f} décisions/s)")
+    print(f"  latence : p50 {percentile(latencies, 50) / 1e6:.3f} ms, "
+          f"p99 {percentile(latencies, 99) / 1e6:.3f} ms, max {latencies[-1] / 1e6:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Serveur du Safety Gate
+======================
+
+Expose `guard_lite.evaluate` à plusieurs processus d'agents via un serveur
+asyncio local. Un seul état temporel, une seule boucle d'événements : toutes
+les décisions sont sérialisées, le HOLD est donc respecté entre processus.
+
+Protocole : JSON délimité par des sauts de ligne sur TCP, une requête par
+ligne, une réponse par ligne portant le même `id`. Les clients peuvent
+pipeliner (envoyer plusieurs requêtes sans attendre) ; les réponses d'une
+connexion reviennent dans l'ordre des requêtes.
+
+    {"id": 1, "op": "evaluate", "action": {...}}            -> {"id": 1, "decision": "BLOCK",
+                                                                 "reason": "TEMPORAL_HOLD", "retry_after": 7.2}
+    {"id": 2, "op": "evaluate_batch", "actions": [...]}     -> {"id": 2, "decisions": [...], "reasons": [...]}
+    {"id": 3, "op": "ping"}                                  -> {"id": 3, "ok": true}
+    {"id": 4, "op": "stats"}                                 -> {"id": 4, "stats": {...}}
+
+Une requête invalide reçoit {"id": ..., "error": "..."} sans fermer la connexion.
+Un lot est validé en entier avant la première évaluation : une action
+invalide rejette tout le lot sans qu'aucun HOLD ne soit enregistré.
+
+Usage :
+    python demo/gate_server.py --port 7108 [--scope agent] [--metrics-port 9108]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from demo import metrics
+from demo.clock import SystemClock
+from demo.guard_lite import DEFAULT_SCOPE, SCOPES, TEMPORAL_WINDOW, TemporalState, evaluate
+
+GATE_HOST = os.getenv("X108_GATE_HOST", "127.0.0.1")
+GATE_PORT = int(os.getenv("X108_GATE_PORT", "7108"))
+
+MAX_LINE = 1 << 20          # taille maximale d'une requête (octets)
+WRITE_HIGH_WATER = 1 << 16  # au-delà, on attend que le client lise
+
+_json_decode = json.JSONDecoder().decode
+_json_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+class GateServer:
+    """
+    Serveur asyncio partageant un état temporel entre toutes les connexions.
+    """
+
+    def __init__(self, host=GATE_HOST, port=GATE_PORT, scope=DEFAULT_SCOPE, state=None, clock=None):
+        self.host = host
+        self.port = port
+        self.scope = scope
+        self.state = TemporalState() if state is None else state
+        self.clock = SystemClock() if clock is None else clock
+        self._server = None
+        self.stats = {"connections": 0, "requests": 0, "decisions": 0, "allowed": 0, "errors": 0}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_LINE)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.stats["connections"] += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # ligne plus longue que MAX_LINE
+                    writer.write(self._encode({"id": None, "error": "request too large"}))
+                    break
+                if not line:
+                    break
+                writer.write(self._encode(self.dispatch(line)))
+                if writer.transport.get_write_buffer_size() > WRITE_HIGH_WATER:
+                    await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def dispatch(self, line):
+        """Traite une ligne de requête et renvoie la réponse (dict)."""
+        self.stats["requests"] += 1
+        request_id = None
+        try:
+            request = _json_decode(line.decode())
+            request_id = request.get("id")
+            op = request.get("op", "evaluate")
+            if op == "evaluate":
+                scope = self._scope(request)
+                decision = self._evaluate(self._validate(request["action"]), scope)
+                response = {"id": request_id, "decision": decision.verdict, "reason": decision.reason}
+                if decision.retry_after is not None:
+                    response["retry_after"] = decision.retry_after
+                return response
+            if op == "evaluate_batch":
+                scope = self._scope(request)
+                actions = request["actions"]
+                if not isinstance(actions, list):
+                    raise TypeError("actions must be a list")
+                for index, action in enumerate(actions):
+                    try:
+                        self._validate(action)
+                    except (TypeError, ValueError) as e:
+                        raise type(e)(f"actions[{index}]: {e}") from None
+                decisions = [self._evaluate(action, scope) for action in actions]
+                return {"id": request_id,
+                        "decisions": [decision.verdict for decision in decisions],
+                        "reasons": [decision.reason for decision in decisions]}
+            if op == "ping":
+                return {"id": request_id, "ok": True}
+            if op == "stats":
+                return {"id": request_id, "stats": {**self.stats, "keys": len(self.state)}}
+            raise ValueError(f"unknown op {op!r}")
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.stats["errors"] += 1
+            return {"id": request_id, "error": f"{type(e).__name__}: {e}"}
+
+    def _scope(self, request):
+        scope = request.get("scope", self.scope)
+        if scope not in SCOPES:
+            raise ValueError(f"unknown scope {scope!r}, expected one of {SCOPES}")
+        return scope
+
+    @staticmethod
+    def _validate(action):
+        """Rejette une action que evaluate ne pourrait pas traiter (avant tout effet de bord)."""
+        if not isinstance(action, dict):
+            raise TypeError(f"action must be an object, got {type(action).__name__}")
+        for field in ("coherence", "amount_usdc"):
+            value = action.get(field, 0)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise TypeError(f"{field} must be a number, got {type(value).__name__}")
+        for field in ("agent_id", "recipient"):
+            if isinstance(action.get(field), (dict, list)):
+                raise TypeError(f"{field} must be a scalar")
+        return action
+
+    def _evaluate(self, action, scope):
+        decision = evaluate(action, scope=scope, state=self.state, clock=self.clock)
+        self.stats["decisions"] += 1
+        if decision == "ALLOW":
+            self.stats["allowed"] += 1
+        return decision
+
+    @staticmethod
+    def _encode(response):
+        return (_json_encode(response) + "\n").encode()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="X-108 safety gate server (newline-delimited JSON over TCP)")
+    parser.add_argument("--host", default=GATE_HOST)
+    parser.add_argument("--port", type=int, default=GATE_PORT, help="0 = free port")
+    parser.add_argument("--scope", choices=SCOPES, default=DEFAULT_SCOPE, help="default temporal state key")
+    parser.add_argument("--metrics-port", type=int, help="enable metrics and serve them on this port (/metrics)")
+    args = parser.parse_args(argv)
+
+    if args.metrics_port is not None:
+        metrics.enable()
+        metrics_server = metrics.start_metrics_server(args.metrics_port, args.host)
+        print(f"metrics on http://{args.host}:{metrics_server.server_address[1]}/metrics", flush=True)
+
+    async def run():
+        server = await GateServer(args.host, args.port, args.scope).start()
+        if args.metrics_port is not None:
+            metrics.gauge("x108_gate_server_hold_keys", "Keys inside their HOLD window on this server",
+                          lambda: server.state.active(server.clock.now(), TEMPORAL_WINDOW))
+        print(f"X-108 gate listening on {server.host}:{server.port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("stopped", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Évaluation vectorisée du Safety Gate
+=====================================
+
+`evaluate_batch` rejoue des colonnes d'actions (timestamps, clés d'agent,
+montants, cohérence) et renvoie les mêmes décisions que des appels
+successifs à `guard_lite.evaluate` sur un état vierge, HOLD temporel compris,
+sans boucle Python par action.
+
+Les clés jouent le rôle de `guard_lite.state_key` : identifiants d'agent,
+de destinataire, ou tuples (agent, destinataire) de la portée
+"agent_recipient". Elles sont regroupées par égalité, comme dans
+`TemporalState`.
+"""
+
+import numpy as np
+
+from demo.guard_lite import COHERENCE_THRESHOLD, TEMPORAL_WINDOW
+
+
+def evaluate_batch(timestamps, agent_ids, amounts, coherence=None,
+                   window=TEMPORAL_WINDOW, threshold=COHERENCE_THRESHOLD):
+    """
+    Évalue un lot d'actions en une passe vectorisée.
+
+    Args:
+        timestamps: Instants des actions (secondes), croissants par clé
+        agent_ids: Clé de l'état temporel de chaque action (`state_key`,
+            tuples compris)
+        amounts: Montants en USDC
+        coherence: Scores de cohérence (1.0 par défaut)
+        window: Fenêtre de HOLD en secondes
+        threshold: Seuil de cohérence minimal
+
+    Returns:
+        np.ndarray de "ALLOW" / "BLOCK", dans l'ordre d'entrée
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    n = ts.shape[0]
+    coh = np.ones(n) if coherence is None else np.asarray(coherence, dtype=np.float64)
+    if not (amounts.shape == coh.shape == ts.shape == (n,)) or len(agent_ids) != n:
+        raise ValueError("timestamps, agent_ids, amounts and coherence must be 1-D and of equal length")
+    if n == 0:
+        return np.empty(0, dtype="<U5")
+
+    # --- Tri par clé (stable : l'ordre d'arrivée est conservé par clé) ---
+    codes = _key_codes(agent_ids, n)
+    order = np.argsort(codes, kind="stable")
+    k = codes[order]
+    t = ts[order]
+    coherent = coh[order] >= threshold
+
+    positions = np.arange(n)
+    seg_start = np.empty(n, dtype=bool)
+    seg_start[0] = True
+    np.not_equal(k[1:], k[:-1], out=seg_start[1:])
+    if np.any((np.diff(t) < 0) & ~seg_start[1:]):
+        raise ValueError("timestamps must be non-decreasing for each agent id")
+
+    # --- Ancres : actions qui posent le HOLD (cohérentes, montant > 0) ---
+    anchors = _hold_anchors(k, t, coherent & (amounts[order] > 0), window)
+
+    # --- Scan des écarts : dernière ancre strictement antérieure, même clé ---
+    prev = np.maximum.accumulate(np.where(anchors, positions, -1))
+    prev = np.concatenate(([-1], prev[:-1]))
+    start = np.maximum.accumulate(np.where(seg_start, positions, 0))
+    held = prev >= start
+    held[held] = t[held] - t[prev[held]] < window
+
+    allowed = np.empty(n, dtype=bool)
+    allowed[order] = ~held & coherent
+    return np.where(allowed, "ALLOW", "BLOCK")
+
+
+def _key_codes(keys, n):
+    """
+    Code entier par clé, égal pour deux clés égales. Un tableau NumPy 1-D
+    homogène passe par np.unique ; toute autre séquence est codée par
+    hachage, comme `TemporalState` : np.asarray convertirait ['1', 1] en
+    chaînes (deux clés confondues) et aplatirait les tuples en colonnes.
+    """
+    if isinstance(keys, np.ndarray) and keys.ndim == 1 and keys.dtype != object:
+        return np.unique(keys, return_inverse=True)[1].ravel().astype(np.int64)
+    index = {}
+    return np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.int64, count=n)
+
+
+def _hold_anchors(k, t, candidate, window):
+    """
+    Marque les candidats qui deviennent effectivement le dernier ALLOW de
+    leur clé : le premier candidat, puis le premier candidat situé au moins
+    `window` secondes après l'ancre précédente, etc.
+
+    La chaîne est suivie par doublement de pointeurs : O(n log n) au total,
+    O(log longueur de chaîne) itérations Python, toutes clés confondues.
+    """
+    ci = np.flatnonzero(candidate)
+    m = ci.shape[0]
+    anchors = np.zeros(k.shape[0], dtype=bool)
+    if m == 0:
+        return anchors
+    ck = k[ci]
+    ct = t[ci]
+
+    # Candidat suivant hors HOLD : recherche sur (clé, rang du temps)
+    ranks = np.unique(np.concatenate((ct, ct + window)), return_inverse=True)[1].ravel()
+    width = ranks.max() + 1
+    combined = ck * width + ranks[:m]
+    nxt = np.searchsorted(combined, ck * width + ranks[m:], side="left")
+
+    # Ajustement exact sur le prédicat de evaluate (t - last < window),
+    # l'addition flottante pouvant décaler la borne d'un ulp.
+    first = np.empty(m, dtype=bool)
+    first[0] = True
+    np.not_equal(ck[1:], ck[:-1], out=first[1:])
+    seg_lo = np.maximum.accumulate(np.where(first, np.arange(m), 0))
+    seg_hi = np.searchsorted(ck, ck, side="right")
+    nxt = np.minimum(np.maximum(nxt, seg_lo), seg_hi)
+    while True:
+        down = nxt > seg_lo
+        down[down] = ct[nxt[down] - 1] - ct[down] >= window
+        up = nxt < seg_hi
+        up[up] = ct[nxt[up]] - ct[up] < window
+        if not (down.any() or up.any()):
+            break
+        nxt = nxt - down + up
+    nxt[nxt >= seg_hi] = m
+
+    # Doublement de pointeurs depuis le premier candidat de chaque clé
+    jump = np.append(nxt, m)
+    reached = np.zeros(m + 1, dtype=bool)
+    reached[m] = True
+    frontier = np.flatnonzero(first)
+    reached[frontier] = True
+    while True:
+        hop = jump[frontier]
+        hop = hop[~reached[hop]]
+        if hop.size == 0:
+            break
+        reached[hop] = True
+        frontier = np.concatenate((frontier, hop))
+        jump = jump[jump]
+
+    anchors[ci[reached[:m]]] = True
+    return anchors
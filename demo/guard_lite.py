@@ -1,32 +1,316 @@
+import os
+import threading
 import time
 
+from demo import metrics
+from demo.clock import SystemClock
+from demo.gate_common import (DEFAULT_AGENT_ID, DEFAULT_SCOPE, REASON_AMOUNT_LIMIT, REASON_LOW_COHERENCE,
+                               REASON_OK, REASON_RATE_LIMIT, REASON_TEMPORAL_HOLD, SCOPES, state_key)
+
+TEMPORAL_WINDOW = 10        # temporal HOLD window (seconds)
+COHERENCE_THRESHOLD = 0.6
+
+# Where temporal state lives: this process, this machine, or a Redis server
+STATE_BACKENDS = ("memory", "shm", "redis")
+
+# Rules after which the same action can pass again by waiting
+_RETRYABLE = (REASON_TEMPORAL_HOLD, REASON_RATE_LIMIT, REASON_AMOUNT_LIMIT)
+
+# Rules timed by evaluate, in order (Decision.rule_ns)
+RULES = ("coherence", "policies", "temporal")
+
+# Decision.describe(): one message per reason code and language, then the
+# retry suffix when waiting helps. New reason codes are added here only.
+_MESSAGES = {
+    "fr": {
+        REASON_OK: "contrôles de sécurité passés",
+        REASON_TEMPORAL_HOLD: f"paiement trop rapide (< {TEMPORAL_WINDOW} secondes depuis le dernier)",
+        REASON_LOW_COHERENCE: f"score de cohérence trop faible (< {COHERENCE_THRESHOLD})",
+        REASON_RATE_LIMIT: "trop de paiements sur la période",
+        REASON_AMOUNT_LIMIT: "montant cumulé au-delà du plafond de la période",
+    },
+    "en": {
+        REASON_OK: "Passed safety checks",
+        REASON_TEMPORAL_HOLD: "Temporal HOLD",
+        REASON_LOW_COHERENCE: f"Coherence below threshold ({COHERENCE_THRESHOLD})",
+        REASON_RATE_LIMIT: "Payment rate limit",
+        REASON_AMOUNT_LIMIT: "Amount limit for this window",
+    },
+}
+_RETRY_SUFFIX = {"fr": " — réessayez dans {:.1f} s", "en": ": retry in {:.1f}s"}
+
+
+class Decision:
+    """
+    Outcome of `evaluate`: verdict ("ALLOW"/"BLOCK"), the rule that decided,
+    the time left before that rule lets the action through (seconds; 0.0
+    for ALLOW and LOW_COHERENCE, None for an amount no window can hold),
+    the evaluation time in nanoseconds and, while metrics are enabled, the
+    time spent in each of `RULES` (`rule_ns`, a tuple in that order, empty
+    otherwise; see `timings`).
+
+    Compares equal to its verdict string, so `decision == "ALLOW"` keeps
+    working; use `str(decision)` or `.verdict` where a plain string is needed
+    (JSON, storage).
+    """
+
+    __slots__ = ("verdict", "reason", "hold_remaining", "elapsed_ns", "rule_ns")
+
+    def __init__(self, verdict, reason, hold_remaining=0.0, elapsed_ns=0, rule_ns=()):
+        self.verdict = verdict
+        self.reason = reason
+        self.hold_remaining = hold_remaining
+        self.elapsed_ns = elapsed_ns
+        self.rule_ns = rule_ns
+
+    @property
+    def allowed(self):
+        return self.verdict == "ALLOW"
+
+    @property
+    def temporal_passed(self):
+        """False only when the HOLD window blocked the action."""
+        return self.reason != REASON_TEMPORAL_HOLD
+
+    @property
+    def retry_after(self):
+        """Seconds until the same action can pass the rule that blocked it, or None if waiting won't help."""
+        return self.hold_remaining if self.reason in _RETRYABLE else None
+
+    @property
+    def timings(self):
+        """{rule: nanoseconds} for each rule of `RULES` (built on access)."""
+        return dict(zip(RULES, self.rule_ns))
+
+    def describe(self, lang="fr"):
+        """Human-readable reason ("fr" or "en"), with the retry delay when waiting helps."""
+        message = _MESSAGES[lang].get(self.reason, self.reason)
+        retry_after = self.retry_after
+        if retry_after is not None:
+            message += _RETRY_SUFFIX[lang].format(retry_after)
+        return message
+
+    def __eq__(self, other):
+        if isinstance(other, Decision):
+            return self.verdict == other.verdict and self.reason == other.reason
+        if isinstance(other, str):
+            return self.verdict == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.verdict)
+
+    def __str__(self):
+        return self.verdict
+
+    def __repr__(self):
+        if self.retry_after is not None:
+            return f"Decision({self.verdict!r}, {self.reason!r}, hold_remaining={self.hold_remaining:.3f})"
+        return f"Decision({self.verdict!r}, {self.reason!r})"
+
+
+class TemporalState:
+    """
+    Keyed last-action timestamps, striped over independently locked shards.
+    Agents hashing to different shards never contend on the same lock.
+
+    `evaluate` goes through `acquire`, which checks the HOLD window and
+    records the action under one shard lock, so concurrent callers for the
+    same key cannot both pass. A shard that doubles in size is swept of
+    keys whose window has expired, so memory follows the number of keys
+    active within one window rather than every key ever seen.
+    """
+
+    def __init__(self, shards=64):
+        if shards < 1:
+            raise ValueError("shards must be >= 1")
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._maps = [{} for _ in range(shards)]
+        self._sweep_at = [1024] * shards
+
+    def _shard(self, key):
+        i = hash(key) % len(self._maps)
+        return self._locks[i], self._maps[i]
+
+    def last(self, key):
+        """Timestamp of the last irreversible action for `key`, or None."""
+        lock, shard = self._shard(key)
+        with lock:
+            return shard.get(key)
+
+    def record(self, key, ts):
+        lock, shard = self._shard(key)
+        with lock:
+            shard[key] = ts
+
+    def acquire(self, key, now, window, record=True):
+        """
+        Atomic check-and-set: if `key` has no action in the last `window`
+        seconds, record `now` (when `record` is true) and return None;
+        otherwise leave the state untouched and return the blocking timestamp.
+        """
+        i = hash(key) % len(self._maps)
+        with self._locks[i]:
+            shard = self._maps[i]
+            last = shard.get(key)
+            if last is not None and now - last < window:
+                return last
+            if record:
+                if last is None and len(shard) >= self._sweep_at[i]:
+                    # Amortized O(1): a sweep at most every doubling of the shard
+                    for expired in [k for k, ts in shard.items() if now - ts >= window]:
+                        del shard[expired]
+                    self._sweep_at[i] = max(1024, 2 * len(shard))
+                shard[key] = now
+            return None
+
+    def active(self, now, window):
+        """Number of keys whose last action is less than `window` seconds old."""
+        count = 0
+        for lock, shard in zip(self._locks, self._maps):
+            with lock:
+                count += sum(1 for ts in shard.values() if now - ts < window)
+        return count
+
+    def clear(self):
+        for lock, shard in zip(self._locks, self._maps):
+            with lock:
+                shard.clear()
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._maps)
+
+
+def create_state(backend=None):
+    """
+    Temporal state for `backend` ("memory", "shm" or "redis"; default
+    X108_STATE_BACKEND, else "memory"). "shm" and "redis" enforce the HOLD
+    across processes; see demo/state_backends.py for their settings.
+    """
+    backend = backend or os.getenv("X108_STATE_BACKEND", "memory")
+    if backend == "memory":
+        return TemporalState()
+    if backend == "shm":
+        from demo.state_backends import SharedMemoryState
+        return SharedMemoryState()
+    if backend == "redis":
+        from demo.state_backends import RedisState
+        return RedisState(window=TEMPORAL_WINDOW)
+    raise ValueError(f"unknown state backend {backend!r}, expected one of {STATE_BACKENDS}")
+
+
+def load_policies(spec=None):
+    """
+    Rate policies from `spec` (default X108_POLICIES), e.g.
+    "count:agent:5/60,amount:recipient:100/3600"; None when empty.
+    See demo/policies.py.
+    """
+    spec = os.getenv("X108_POLICIES", "") if spec is None else spec
+    if not spec.strip():
+        return None
+    from demo.policies import parse_policies
+    return parse_policies(spec)
+
+
 # Internal state (opaque, minimal)
-_LAST_ACTION_TS = None
+_STATE = create_state()
+_POLICIES = load_policies()
+_CLOCK = SystemClock()
+
 
-def evaluate(action):
+# Gate metrics (recorded only while metrics.enabled)
+_DECISIONS = metrics.counter("x108_gate_decisions_total", "Gate decisions by verdict and reason",
+                             ("verdict", "reason"))
+_EVALUATE_SECONDS = metrics.histogram("x108_gate_evaluate_seconds", "Time spent in evaluate")
+metrics.gauge("x108_gate_hold_keys", "Keys currently inside their HOLD window",
+              lambda: _STATE.active(_CLOCK.now(), TEMPORAL_WINDOW))
+metrics.gauge("x108_gate_state_keys", "Keys tracked by the process-wide temporal state",
+              lambda: len(_STATE))
+
+
+def set_clock(clock):
+    """Replace the process-wide clock (anything with a now() method)."""
+    global _CLOCK
+    _CLOCK = clock
+
+
+def set_state(state):
+    """Replace the process-wide temporal state (TemporalState or a backend)."""
+    global _STATE
+    _STATE = state
+
+
+def set_policies(policies):
+    """Replace the process-wide rate policies (a demo.policies.PolicySet, or None)."""
+    global _POLICIES
+    _POLICIES = policies
+
+
+def reset_state():
+    """Forget every recorded action (all agents, all recipients)."""
+    _STATE.clear()
+    if _POLICIES is not None:
+        _POLICIES.clear()
+
+
+def evaluate(action, scope=DEFAULT_SCOPE, state=None, clock=None, policies=None):
     """
     Opaque temporal & coherence safety gate.
     Behavior is observable, logic is intentionally minimal.
-    """
 
-    global _LAST_ACTION_TS
-    now = time.time()
+    `scope` selects what shares a HOLD window ("agent", "recipient" or
+    "agent_recipient"); `state`, `clock` and `policies` override the
+    process-wide TemporalState, clock and rate policies.
 
-    # --- Temporal constraint ---
-    if _LAST_ACTION_TS is not None:
-        delta = now - _LAST_ACTION_TS
-        if delta < 10:   # temporal HOLD window (seconds)
-            return "BLOCK"
+    Returns a `Decision`, equal to "ALLOW" or "BLOCK".
+    """
+    started = time.perf_counter_ns()
+    timed = metrics.enabled  # per-rule clock reads only when metrics are on
+    state = _STATE if state is None else state
+    policies = _POLICIES if policies is None else policies
+    key = state_key(action, scope)
+    now = (_CLOCK if clock is None else clock).now()
 
     # --- Coherence proxy (intentionally opaque) ---
-    coherence = action.get("coherence", 1.0)
+    low_coherence = action.get("coherence", 1.0) < COHERENCE_THRESHOLD
+    amount = action.get("amount_usdc", 0)
+    record = not low_coherence and amount > 0
+    if timed:
+        coherence_done = time.perf_counter_ns()
 
-    if coherence < 0.6:
-        return "BLOCK"
+    # --- Rate policies (payments / amount per window) ---
+    # Reserved before the HOLD check and given back if it blocks: a blocked
+    # action consumes nothing, an allowed one commits every rule.
+    limit = reservation = None
+    if record and policies:
+        limit, detail = policies.reserve(action, now, amount)
+        if limit is None:
+            reservation = detail
+        else:
+            record = False
+    if timed:
+        policies_done = time.perf_counter_ns()
 
-    # --- Irreversibility guard ---
-    amount = action.get("amount_usdc", 0)
-    if amount > 0:
-        _LAST_ACTION_TS = now
+    # --- Temporal constraint + irreversibility guard ---
+    # Checked and recorded in one step, so two threads cannot both pass the
+    # HOLD for the same key; only coherent, paying actions are recorded.
+    last = state.acquire(key, now, TEMPORAL_WINDOW, record)
+    if last is not None:
+        if reservation is not None:
+            policies.release(reservation)
+        # Clamped: a shared backend may still hold a key its clock sees as expired
+        decision = Decision("BLOCK", REASON_TEMPORAL_HOLD, max(0.0, TEMPORAL_WINDOW - (now - last)))
+    elif low_coherence:
+        decision = Decision("BLOCK", REASON_LOW_COHERENCE)
+    elif limit is not None:
+        decision = Decision("BLOCK", limit.reason, detail)
+    else:
+        decision = Decision("ALLOW", REASON_OK)
 
-    return "ALLOW"
+    finished = time.perf_counter_ns()
+    decision.elapsed_ns = finished - started
+    if timed:
+        decision.rule_ns = (coherence_done - started, policies_done - coherence_done, finished - policies_done)
+        _DECISIONS.inc(decision.verdict, decision.reason)
+        _EVALUATE_SECONDS.observe_ns(decision.elapsed_ns)
+    return decision
@@ -86,9 +86,7 @@ def process_payment(amount, recipient, coherence):
         print(f"   {amount} USDC → {recipient}")
     else:
         print(f"❌ PAIEMENT BLOQUÉ")
-        print(f"   Raisons possibles :")
-        print(f"   - Paiement trop rapide (< 10 secondes depuis le dernier)")
-        print(f"   - Score de cohérence trop faible (< 0.6)")
+        print(f"   Raison : {decision.describe()}")
     
     print_separator()
 
@@ -0,0 +1,332 @@
+"""
+Métriques du Safety Gate
+========================
+
+Compteurs et histogrammes de latence à faible coût, exposés au format texte
+Prometheus (scrape) ou en snapshot (dict).
+
+- Agrégation par thread : chaque thread écrit dans ses propres compteurs
+  (pas de verrou sur le chemin chaud), fusionnés à la lecture ; ceux d'un
+  thread terminé sont repliés dans un cumul commun (mémoire bornée par le
+  nombre de threads vivants)
+- Histogrammes log-linéaires façon HDR : 8 sous-buckets par puissance de
+  deux, erreur relative <= 12.5 %, de la nanoseconde à des années
+- Désactivées par défaut : le code instrumenté ne paie qu'un test de
+  `metrics.enabled` (X108_METRICS=1 ou `enable()` pour activer)
+
+Usage :
+    from demo import metrics
+    metrics.enable()
+    metrics.start_metrics_server(9108)     # GET /metrics, GET /metrics.json
+    metrics.snapshot()
+"""
+
+import os
+import threading
+import weakref
+
+enabled = os.getenv("X108_METRICS", "").lower() in ("1", "true", "yes")
+
+METRICS_PORT = int(os.getenv("X108_METRICS_PORT", "9108"))
+
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+class _ThreadSentinel:
+    """Marqueur rangé dans le thread-local : collecté à la fin du thread."""
+
+    __slots__ = ("__weakref__",)
+
+
+class _ThreadLocalShards:
+    """
+    Une valeur par thread, créée au premier accès et conservée pour la fusion.
+    Le chemin chaud lit directement `local.value` (voir Counter.inc).
+
+    À la fin d'un thread, sa valeur est fusionnée (`merge`) dans un cumul
+    commun puis oubliée : seuls les threads vivants gardent une valeur.
+    """
+
+    def __init__(self, factory, merge):
+        self._factory = factory
+        self._merge = merge
+        self.local = threading.local()
+        self._base = factory()
+        self._shards = {}   # id(valeur) -> valeur, threads vivants
+        self._lock = threading.Lock()
+
+    def create(self):
+        value = self.local.value = self._factory()
+        sentinel = self.local.sentinel = _ThreadSentinel()
+        with self._lock:
+            self._shards[id(value)] = value
+        weakref.finalize(sentinel, self._retire, value)
+        return value
+
+    def _retire(self, value):
+        with self._lock:
+            del self._shards[id(value)]
+            self._merge(self._base, value)
+
+    def all(self):
+        """Copies cohérentes du cumul et des valeurs vivantes (aucune comptée deux fois)."""
+        with self._lock:
+            return [self._base.copy()] + [value.copy() for value in self._shards.values()]
+
+    def __len__(self):
+        return len(self._shards)
+
+
+def _merge_counts(base, values):
+    for labels, value in values.items():
+        base[labels] = base.get(labels, 0) + value
+
+
+def _merge_buckets(base, counts):
+    for index, value in enumerate(counts):
+        if value:
+            base[index] += value
+
+
+class Counter:
+    """Compteur monotone, éventuellement étiqueté (`inc("BLOCK", "TEMPORAL_HOLD")`)."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._shards = _ThreadLocalShards(dict, _merge_counts)
+        self._local = self._shards.local
+
+    def inc(self, *labels, amount=1):
+        try:
+            values = self._local.value
+        except AttributeError:
+            values = self._shards.create()
+        try:
+            values[labels] += amount
+        except KeyError:
+            values[labels] = amount
+
+    def values(self):
+        """{tuple d'étiquettes: total} fusionné sur tous les threads."""
+        merged = {}
+        for shard in self._shards.all():
+            for labels, value in shard.items():
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+    def snapshot(self):
+        return {",".join(labels) or "total": value for labels, value in self.values().items()}
+
+    def exposition(self):
+        lines = []
+        for labels, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+# Histogramme log-linéaire : index = décalage * 8 + 3 bits de poids fort
+_SUB_BITS = 3
+_SUB_BUCKETS = 1 << _SUB_BITS
+_BUCKETS = 64 * _SUB_BUCKETS
+_COUNT = _BUCKETS       # emplacement du nombre d'observations
+_SUM = _BUCKETS + 1     # emplacement de la somme (ns)
+
+
+def bucket_index(value_ns):
+    shift = value_ns.bit_length() - _SUB_BITS - 1
+    if shift < 0:
+        shift = 0
+    return (shift << _SUB_BITS) + (value_ns >> shift)
+
+
+def bucket_upper_bound(index):
+    """Borne supérieure (exclue, en ns) du bucket `index`."""
+    if index < 2 * _SUB_BUCKETS:
+        return index + 1
+    shift = (index >> _SUB_BITS) - 1
+    mantissa = index - (shift << _SUB_BITS)
+    return (mantissa + 1) << shift
+
+
+class Histogram:
+    """Histogramme de durées (observées en ns, exposées en secondes)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._shards = _ThreadLocalShards(lambda: [0] * (_BUCKETS + 2), _merge_buckets)
+        self._local = self._shards.local
+
+    def observe_ns(self, value_ns):
+        try:
+            counts = self._local.value
+        except AttributeError:
+            counts = self._shards.create()
+        shift = value_ns.bit_length() - 4  # _SUB_BITS + 1
+        if shift > 0:
+            counts[(shift << 3) + (value_ns >> shift)] += 1
+        else:
+            counts[value_ns] += 1
+        counts[_COUNT] += 1
+        counts[_SUM] += value_ns
+
+    def merged(self):
+        total = [0] * (_BUCKETS + 2)
+        for shard in self._shards.all():
+            for i, value in enumerate(shard):
+                if value:
+                    total[i] += value
+        return total
+
+    @staticmethod
+    def quantile(counts, q):
+        """Quantile (0-1) en ns, borne supérieure de son bucket."""
+        count = counts[_COUNT]
+        if count == 0:
+            return 0
+        rank = max(1, int(q * count + 0.5))
+        seen = 0
+        for index in range(_BUCKETS):
+            seen += counts[index]
+            if seen >= rank:
+                return bucket_upper_bound(index)
+        return bucket_upper_bound(_BUCKETS - 1)
+
+    def snapshot(self):
+        counts = self.merged()
+        return {
+            "count": counts[_COUNT],
+            "sum_seconds": counts[_SUM] / 1e9,
+            "p50_seconds": self.quantile(counts, 0.50) / 1e9,
+            "p90_seconds": self.quantile(counts, 0.90) / 1e9,
+            "p99_seconds": self.quantile(counts, 0.99) / 1e9,
+            "max_seconds": self.quantile(counts, 1.0) / 1e9,
+        }
+
+    def exposition(self):
+        counts = self.merged()
+        lines = []
+        cumulative = 0
+        for index in range(_BUCKETS):
+            if counts[index]:
+                cumulative += counts[index]
+                le = bucket_upper_bound(index) / 1e9
+                lines.append(f'{self.name}_bucket{{le="{le:.9g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {counts[_COUNT]}')
+        lines.append(f"{self.name}_sum {counts[_SUM] / 1e9:.9g}")
+        lines.append(f"{self.name}_count {counts[_COUNT]}")
+        return lines
+
+
+class Gauge:
+    """Valeur calculée à la lecture (ex. nombre de clés en HOLD)."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, fn):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    def snapshot(self):
+        return self.fn()
+
+    def exposition(self):
+        return [f"{self.name} {self.fn()}"]
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _register(metric):
+    with _REGISTRY_LOCK:
+        existing = _REGISTRY.get(metric.name)
+        if existing is not None:
+            return existing
+        _REGISTRY[metric.name] = metric
+        return metric
+
+
+def counter(name, help, labelnames=()):
+    """Compteur `name` (créé au premier appel, partagé ensuite)."""
+    return _register(Counter(name, help, labelnames))
+
+
+def histogram(name, help):
+    return _register(Histogram(name, help))
+
+
+def gauge(name, help, fn):
+    return _register(Gauge(name, help, fn))
+
+
+def snapshot():
+    """Toutes les métriques, sous forme de dict sérialisable."""
+    with _REGISTRY_LOCK:
+        metrics = list(_REGISTRY.values())
+    return {metric.name: metric.snapshot() for metric in metrics}
+
+
+def exposition():
+    """Toutes les métriques au format texte Prometheus (version 0.0.4)."""
+    with _REGISTRY_LOCK:
+        metrics = list(_REGISTRY.values())
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.exposition())
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port=METRICS_PORT, host="127.0.0.1"):
+    """
+    Sert GET /metrics (Prometheus) et GET /metrics.json (snapshot) dans un
+    thread démon ; renvoie le serveur (port effectif : server.server_address[1]).
+    """
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = exposition().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(snapshot()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="x108-metrics", daemon=True).start()
+    return server
@@ -1,27 +1,31 @@
-import os
-import requests
+import time
 
-ARC_API_URL = os.getenv("ARC_API_URL", "https://api.arc.example/pay")
-ARC_API_KEY = os.getenv("ARC_API_KEY")
+from demo import metrics
+from demo.arc_client import ARC_API_KEY, ArcError, get_arc_client
+
+_PAYMENTS = metrics.counter("x108_payments_total", "USDC payments by status", ("status",))
+_PAYMENT_SECONDS = metrics.histogram("x108_payment_seconds", "pay_usdc latency")
 
-def pay_usdc(amount, recipient):
-    if not ARC_API_KEY:
-        print("[WARNING] ARC_API_KEY not set - running in demo mode")
 
-    payload = {
-        "asset": "USDC",
-        "amount": amount,
-        "recipient": recipient
-    }
+def pay_usdc(amount, recipient, idempotency_key=None):
+    if not metrics.enabled:
+        return _pay_usdc(amount, recipient, idempotency_key)
+    started = time.perf_counter_ns()
+    result = _pay_usdc(amount, recipient, idempotency_key)
+    _PAYMENT_SECONDS.observe_ns(time.perf_counter_ns() - started)
+    _PAYMENTS.inc(result.get("status", "unknown"))
+    return result
 
-    headers = {
-        "Authorization": f"Bearer {ARC_API_KEY}",
-        "Content-Type": "application/json"
-    }
 
-    # Real call would be enabled during hackathon
-    # response = requests.post(ARC_API_URL, json=payload, headers=headers)
-    # return response.json()
+def _pay_usdc(amount, recipient, idempotency_key=None):
+    if not ARC_API_KEY:
+        print("[WARNING] ARC_API_KEY not set - running in demo mode")
+        print(f"[ARC] Simulated USDC payment: {amount} → {recipient}")
+        return {"status": "submitted", "amount": amount}
 
-    print(f"[ARC] Simulated USDC payment: {amount} → {recipient}")
-    return {"status": "submitted", "amount": amount}
+    # Pooled keep-alive session, retried with backoff under one idempotency key
+    try:
+        return get_arc_client().pay(amount, recipient, idempotency_key)
+    except ArcError as e:
+        print(f"[ARC] Payment failed: {e}")
+        return {"status": "failed", "amount": amount, "error": str(e)}
@@ -0,0 +1,126 @@
+"""
+Micro-batching des paiements USDC
+==================================
+
+Quand de nombreux agents sont autorisés à quelques millisecondes
+d'intervalle, `PaymentBatcher` regroupe leurs paiements : un lot part dès
+qu'il atteint `max_batch_size` ou que le plus ancien paiement a attendu
+`max_linger` secondes. Une seule requête Arc est envoyée par lot et chaque
+appelant récupère son propre résultat.
+
+Usage :
+    batcher = PaymentBatcher()
+    result = batcher.pay(3, "api_provider")          # bloquant
+    future = batcher.submit(3, "api_provider")       # concurrent.futures.Future
+"""
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+from demo.arc_client import ARC_API_KEY, ArcError, get_arc_client
+
+_STOP = object()
+
+
+class PaymentBatcher:
+    """
+    File de paiements vidée par un thread de fond, lot par lot.
+    """
+
+    def __init__(self, client=None, max_batch_size=50, max_linger=0.005):
+        """
+        Args:
+            client: ArcClient (défaut : client partagé si ARC_API_KEY est défini,
+                sinon paiements simulés)
+            max_batch_size: Nombre maximal de paiements par requête
+            max_linger: Attente maximale d'un paiement avant envoi du lot (s)
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if client is None and ARC_API_KEY:
+            client = get_arc_client()
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.max_linger = max_linger
+        self.batches_sent = 0
+        self.payments_sent = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()  # aucun paiement ne peut suivre _STOP dans la file
+        self._worker = threading.Thread(target=self._run, name="payment-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, amount, recipient, idempotency_key=None):
+        """Ajoute un paiement au prochain lot ; renvoie un Future du résultat Arc."""
+        future = Future()
+        payment = {
+            "amount": amount,
+            "recipient": recipient,
+            "idempotency_key": idempotency_key or uuid.uuid4().hex
+        }
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("PaymentBatcher is closed")
+            self._queue.put((future, payment))
+        return future
+
+    def pay(self, amount, recipient, idempotency_key=None):
+        """Équivalent bloquant de `pay_usdc`, servi par le lot courant."""
+        try:
+            return self.submit(amount, recipient, idempotency_key).result()
+        except ArcError as e:
+            print(f"[ARC] Payment failed: {e}")
+            return {"status": "failed", "amount": amount, "error": str(e)}
+
+    def close(self, timeout=None):
+        """Envoie les paiements en attente puis arrête le thread de fond."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._worker.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_linger
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._send(batch)
+
+    def _send(self, batch):
+        futures = [future for future, _ in batch]
+        payments = [payment for _, payment in batch]
+        try:
+            if self.client is None:
+                results = [{"status": "submitted", "amount": p["amount"]} for p in payments]
+            else:
+                results = self.client.pay_batch(payments)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        self.batches_sent += 1
+        self.payments_sent += len(payments)
+        for future, result in zip(futures, results):
+            future.set_result(result)
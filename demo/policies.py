@@ -0,0 +1,265 @@
+"""
+Rate policies for the safety gate.
+
+`CountLimit` caps the number of payments and `AmountLimit` the cumulative
+USDC amount in any window (time-bucketed sliding counters); `TokenBucket`
+allows bursts with a sustained rate. Each applies per agent, per recipient
+or per agent/recipient pair and is O(1) amortized per decision: nothing
+scans the payment history.
+
+A `PolicySet` compiles a list of limits for `guard_lite.evaluate`, which
+checks them in the same pass as the temporal and coherence rules and
+commits all or nothing: a blocked action consumes no token and no amount.
+
+    from demo.guard_lite import set_policies
+    from demo.policies import AmountLimit, CountLimit, PolicySet
+
+    set_policies(PolicySet([CountLimit(5, 60), AmountLimit(100, 3600, scope="recipient")]))
+
+or X108_POLICIES="count:agent:5/60,amount:recipient:100/3600" (kinds:
+count, amount, bucket).
+"""
+
+import collections
+import math
+import threading
+
+from demo.gate_common import REASON_AMOUNT_LIMIT, REASON_RATE_LIMIT, SCOPES, state_key
+
+MICRO = 1_000_000   # amounts are tracked in integer micro-USDC (no float drift)
+
+
+class _Striped:
+    """Per-key limiter state over independently locked shards (like TemporalState)."""
+
+    def __init__(self, shards):
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._maps = [{} for _ in range(shards)]
+        self._sweep_at = [1024] * shards
+
+    def _shard(self, key):
+        i = hash(key) % len(self._maps)
+        return i, self._locks[i], self._maps[i]
+
+    def _maybe_sweep(self, i, shard, now):
+        # Drop idle keys once a shard doubles in size: amortized O(1) per call
+        if len(shard) >= self._sweep_at[i]:
+            for key in [key for key, entry in shard.items() if self._idle(entry, now)]:
+                del shard[key]
+            self._sweep_at[i] = max(1024, 2 * len(shard))
+
+    def clear(self):
+        for lock, shard in zip(self._locks, self._maps):
+            with lock:
+                shard.clear()
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._maps)
+
+
+class TokenBucket(_Striped):
+    """
+    Token bucket per key of `scope`: bursts of up to `limit` payments, then
+    `limit` per `window` seconds on average (refilled continuously).
+    """
+
+    reason = REASON_RATE_LIMIT
+
+    def __init__(self, limit, window, scope="agent", shards=64):
+        if limit < 1 or window <= 0:
+            raise ValueError("limit must be >= 1 and window > 0")
+        if scope not in SCOPES:
+            raise ValueError(f"unknown scope {scope!r}, expected one of {SCOPES}")
+        super().__init__(shards)
+        self.limit, self.window, self.scope = limit, window, scope
+        self.rate = limit / window
+
+    def __repr__(self):
+        return f"TokenBucket({self.limit}, {self.window}, scope={self.scope!r})"
+
+    def _idle(self, entry, now):
+        return now - entry[1] >= self.window  # bucket full again
+
+    def try_consume(self, key, now, amount_micro):
+        """Take one token; returns (True, None) or (False, seconds until a token is back)."""
+        i, lock, shard = self._shard(key)
+        with lock:
+            entry = shard.get(key)
+            if entry is None:
+                self._maybe_sweep(i, shard, now)
+                shard[key] = [self.limit - 1.0, now]
+                return True, None
+            tokens = min(self.limit, entry[0] + (now - entry[1]) * self.rate)
+            if tokens < 1.0:
+                entry[0], entry[1] = tokens, now
+                return False, (1.0 - tokens) / self.rate
+            entry[0], entry[1] = tokens - 1.0, now
+            return True, None
+
+    def refund(self, key, amount_micro):
+        i, lock, shard = self._shard(key)
+        with lock:
+            entry = shard.get(key)
+            if entry is not None:
+                entry[0] = min(self.limit, entry[0] + 1.0)
+
+
+class _SlidingWindow(_Striped):
+    """
+    Sliding-window sum per key, over `buckets` time buckets with a running
+    total: expired buckets fall off the front as time passes, so each
+    decision is O(1) amortized. A bucket is kept until it lies entirely
+    outside the window, so the limit errs on the strict side by at most
+    window/buckets.
+
+    Each payment weighs 1 (`CountLimit`) or, with `by_amount`, its amount
+    in micro-USDC (`AmountLimit`).
+    """
+
+    by_amount = False
+
+    def __init__(self, limit, window, scope, buckets, shards):
+        if limit <= 0 or window <= 0 or buckets < 1:
+            raise ValueError("limit and window must be > 0 and buckets >= 1")
+        if scope not in SCOPES:
+            raise ValueError(f"unknown scope {scope!r}, expected one of {SCOPES}")
+        super().__init__(shards)
+        self.limit, self.window, self.scope, self.buckets = limit, window, scope, buckets
+        self.width = window / buckets
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.limit}, {self.window}, scope={self.scope!r}, buckets={self.buckets})"
+
+    def _idle(self, entry, now):
+        return not entry[0] or entry[0][-1][0] < math.floor(now / self.width) - self.buckets
+
+    def try_consume(self, key, now, amount_micro):
+        """Add this payment; returns (True, None) or (False, seconds until it fits, None if never)."""
+        weight = amount_micro if self.by_amount else 1
+        if weight > self.capacity:
+            return False, None
+        current = math.floor(now / self.width)
+        i, lock, shard = self._shard(key)
+        with lock:
+            entry = shard.get(key)
+            if entry is None:
+                self._maybe_sweep(i, shard, now)
+                entry = shard[key] = [collections.deque(), 0]
+            counts = entry[0]
+            # Bucket b covers [b, b + 1) * width: expired once (b + 1) * width <= now - window
+            while counts and counts[0][0] < current - self.buckets:
+                entry[1] -= counts.popleft()[1]
+            if entry[1] + weight > self.capacity:
+                excess = entry[1] + weight - self.capacity
+                for index, value in counts:
+                    excess -= value
+                    if excess <= 0:
+                        return False, max(0.0, (index + self.buckets + 1) * self.width - now)
+                return False, None
+            if counts and counts[-1][0] == current:
+                counts[-1][1] += weight
+            else:
+                counts.append([current, weight])
+            entry[1] += weight
+            return True, None
+
+    def refund(self, key, amount_micro):
+        weight = amount_micro if self.by_amount else 1
+        i, lock, shard = self._shard(key)
+        with lock:
+            entry = shard.get(key)
+            if entry is None:
+                return
+            for bucket in reversed(entry[0]):
+                if bucket[1] >= weight:
+                    bucket[1] -= weight
+                    entry[1] -= weight
+                    return
+
+
+class CountLimit(_SlidingWindow):
+    """At most `limit` payments in any `window` seconds for each key of `scope`."""
+
+    reason = REASON_RATE_LIMIT
+
+    def __init__(self, limit, window, scope="agent", buckets=60, shards=64):
+        super().__init__(int(limit), window, scope, buckets, shards)
+        self.capacity = self.limit
+
+
+class AmountLimit(_SlidingWindow):
+    """At most `limit` USDC in any `window` seconds for each key of `scope`."""
+
+    reason = REASON_AMOUNT_LIMIT
+    by_amount = True
+
+    def __init__(self, limit, window, scope="agent", buckets=60, shards=64):
+        super().__init__(limit, window, scope, buckets, shards)
+        self.capacity = round(limit * MICRO)
+
+
+class PolicySet:
+    """
+    Limits compiled for one evaluation pass: keys are computed once per
+    scope, and `reserve` consumes from every limit or from none.
+    """
+
+    def __init__(self, limits):
+        self.limits = list(limits)
+        self.scopes = sorted({limit.scope for limit in self.limits}, key=SCOPES.index)
+
+    def reserve(self, action, now, amount):
+        """
+        Consume `amount` from every limit.
+
+        Returns:
+            (None, reservation) if all limits passed, else (limit, retry_after)
+            for the first one that blocked, with nothing consumed
+        """
+        keys = {scope: state_key(action, scope) for scope in self.scopes}
+        amount_micro = round(amount * MICRO)
+        taken = []
+        for limit in self.limits:
+            key = keys[limit.scope]
+            ok, retry_after = limit.try_consume(key, now, amount_micro)
+            if not ok:
+                for previous, previous_key in taken:
+                    previous.refund(previous_key, amount_micro)
+                return limit, retry_after
+            taken.append((limit, key))
+        return None, (taken, amount_micro)
+
+    @staticmethod
+    def release(reservation):
+        """Give back a reservation (the action was blocked by another rule)."""
+        taken, amount_micro = reservation
+        for limit, key in taken:
+            limit.refund(key, amount_micro)
+
+    def clear(self):
+        for limit in self.limits:
+            limit.clear()
+
+    def __bool__(self):
+        return bool(self.limits)
+
+    def __repr__(self):
+        return f"PolicySet({self.limits!r})"
+
+
+def parse_policies(spec):
+    """
+    PolicySet from a spec such as "count:agent:5/60,amount:recipient:100/3600"
+    (kind:scope:limit/window seconds, comma separated; kinds: count, amount,
+    bucket).
+    """
+    kinds = {"count": CountLimit, "amount": AmountLimit, "bucket": TokenBucket}
+    limits = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            kind, scope, rule = item.split(":")
+            limit, window = rule.split("/")
+            limits.append(kinds[kind](float(limit) if kind == "amount" else int(limit), float(window), scope))
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"invalid policy {item!r}, expected kind:scope:limit/window ({e})") from None
+    return PolicySet(limits)
@@ -0,0 +1,188 @@
+"""
+Serveur Redis local (stub) pour tester le backend d'état partagé
+================================================================
+
+Parle le protocole RESP2 et implémente le sous-ensemble de commandes utilisé
+par `RedisState` et redis-py : PING, HELLO 2, GET, SET (NX / XX / PX / EX /
+GET), DEL, EXISTS, PTTL, DBSIZE, FLUSHDB, SCAN. Les clés expirent à la
+lecture. Un verrou global sérialise les commandes, comme le fil d'exécution
+unique de Redis.
+
+Usage :
+    python demo/redis_stub_server.py --port 6379
+    X108_STATE_BACKEND=redis X108_REDIS_URL=redis://127.0.0.1:6379/0 python demo/run_demo.py
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class RespError(Exception):
+    pass
+
+
+class RedisStubHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        while True:
+            try:
+                command = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if command is None:
+                return
+            try:
+                reply = self.server.execute(command)
+            except RespError as e:
+                self.wfile.write(f"-{e}\r\n".encode())
+            else:
+                self.wfile.write(encode(reply))
+            self.wfile.flush()
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # commande inline (ex. `redis-cli` sans protocole)
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+
+def encode(value):
+    """Encode une réponse RESP2 (None -> null bulk, str -> simple string)."""
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return f"+{value}\r\n".encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+
+
+class RedisStubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=("127.0.0.1", 0)):
+        super().__init__(address, RedisStubHandler)
+        self.lock = threading.Lock()
+        self.data = {}      # clé -> (valeur, échéance monotonic ou None)
+        self.commands = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def execute(self, args):
+        if not args:
+            raise RespError("ERR empty command")
+        name = args[0].upper().decode()
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            raise RespError(f"ERR unknown command '{name}'")
+        with self.lock:
+            self.commands += 1
+            return handler(*args[1:])
+
+    def _get(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, deadline = entry
+        if deadline is not None and time.monotonic() >= deadline:
+            del self.data[key]
+            return None
+        return value
+
+    def cmd_ping(self, *args):
+        return args[0] if args else "PONG"
+
+    def cmd_hello(self, *args):
+        if args and args[0] != b"2":
+            raise RespError("NOPROTO this stub only speaks RESP2")
+        return [b"server", b"redis-stub", b"version", b"7.2.0", b"proto", 2]
+
+    def cmd_select(self, db):
+        return "OK"
+
+    def cmd_client(self, *args):
+        return "OK"
+
+    def cmd_get(self, key):
+        return self._get(key)
+
+    def cmd_set(self, key, value, *options):
+        flags, deadline = set(), None
+        i = 0
+        while i < len(options):
+            option = options[i].upper()
+            if option in (b"PX", b"EX"):
+                ttl = int(options[i + 1]) / (1000 if option == b"PX" else 1)
+                deadline = time.monotonic() + ttl
+                i += 2
+            else:
+                flags.add(option)
+                i += 1
+        old = self._get(key)
+        if (b"NX" in flags and old is not None) or (b"XX" in flags and old is None):
+            return old if b"GET" in flags else None
+        self.data[key] = (value, deadline)
+        return old if b"GET" in flags else "OK"
+
+    def cmd_del(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def cmd_exists(self, *keys):
+        return sum(self._get(key) is not None for key in keys)
+
+    def cmd_pttl(self, key):
+        if self._get(key) is None:
+            return -2
+        deadline = self.data[key][1]
+        return -1 if deadline is None else int((deadline - time.monotonic()) * 1000)
+
+    def cmd_dbsize(self):
+        return sum(self._get(key) is not None for key in list(self.data))
+
+    def cmd_flushdb(self, *args):
+        self.data.clear()
+        return "OK"
+
+    def cmd_scan(self, cursor, *options):
+        # Un seul passage : toutes les clés correspondantes, curseur 0
+        pattern = b"*"
+        for i in range(0, len(options) - 1, 2):
+            if options[i].upper() == b"MATCH":
+                pattern = options[i + 1]
+        keys = [key for key in list(self.data)
+                if self._get(key) is not None and fnmatch.fnmatchcase(key.decode(), pattern.decode())]
+        return [b"0", keys]
+
+
+def start_stub_server(port=0):
+    """Démarre le stub dans un thread démon et renvoie le serveur (voir `.url`)."""
+    server = RedisStubServer(("127.0.0.1", port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub local Redis (RESP2, sous-ensemble)")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    server = RedisStubServer(("127.0.0.1", args.port))
+    print(f"[Redis stub] listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
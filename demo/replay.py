@@ -0,0 +1,194 @@
+"""
+Rejeu en streaming de traces JSONL
+==================================
+
+Relit des traces d'actions (une action JSON par ligne) à travers
+`guard_lite.evaluate`, sur une horloge virtuelle, et écrit les décisions
+en JSONL ou en Parquet. Tout est chaîné par générateurs : la mémoire reste
+constante quelle que soit la taille de la trace (seul l'état temporel
+grandit, avec le nombre de clés distinctes).
+
+Format d'entrée, une ligne par action :
+    {"ts": 1700000000.0, "agent_id": "a1", "amount_usdc": 3, "recipient": "api", "coherence": 0.8}
+ou l'action imbriquée : {"ts": ..., "action": {...}}. `ts` (ou `timestamp`) est
+en secondes epoch ou au format ISO 8601, croissant ; une ligne sans instant
+est évaluée à l'instant de la précédente.
+
+Usage :
+    python demo/replay.py trace.jsonl -o decisions.jsonl
+    python demo/replay.py trace.jsonl.gz -o decisions.parquet --scope recipient
+    python demo/replay.py trace.jsonl --policies "count:agent:5/60,amount:recipient:100/3600"
+    zcat trace.jsonl.gz | python demo/replay.py - -o -
+"""
+
+import argparse
+import gzip
+import io
+import json
+import sys
+import time
+from datetime import datetime
+
+from demo.clock import VirtualClock
+from demo.guard_lite import DEFAULT_AGENT_ID, DEFAULT_SCOPE, SCOPES, TemporalState, evaluate, load_policies
+
+OUTPUT_FIELDS = ("line", "ts", "agent_id", "recipient", "amount_usdc", "coherence", "decision", "reason")
+
+
+def open_trace(path):
+    """Ouvre une trace en texte : fichier, fichier .gz ou '-' pour stdin."""
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def read_records(lines):
+    """Décode les lignes JSON non vides : (numéro de ligne, dict)."""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {number}: invalid JSON ({e})") from None
+
+
+def parse_ts(value):
+    """Instant en secondes epoch (nombre ou chaîne ISO 8601), None si absent."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def to_actions(records):
+    """Sépare l'instant de l'action : (numéro de ligne, ts, action)."""
+    for number, record in records:
+        action = record.get("action", record)
+        ts = parse_ts(record.get("ts", record.get("timestamp")))
+        yield number, ts, action
+
+
+def replay(actions, scope=DEFAULT_SCOPE, state=None, clock=None, policies=None):
+    """
+    Évalue les actions dans l'ordre, l'horloge virtuelle suivant leurs instants.
+    Sans `policies`, les politiques de débit viennent de X108_POLICIES (état neuf).
+
+    Yields:
+        Dict de décision (champs OUTPUT_FIELDS)
+    """
+    state = TemporalState() if state is None else state
+    clock = VirtualClock() if clock is None else clock
+    policies = load_policies() if policies is None else policies
+    for number, ts, action in actions:
+        if ts is not None:
+            try:
+                clock.advance_to(ts)
+            except ValueError:
+                raise ValueError(f"line {number}: timestamp {ts} is earlier than {clock.now()}") from None
+        decision = evaluate(action, scope=scope, state=state, clock=clock, policies=policies)
+        yield {
+            "line": number,
+            "ts": clock.now(),
+            "agent_id": action.get("agent_id", DEFAULT_AGENT_ID),
+            "recipient": action.get("recipient"),
+            "amount_usdc": action.get("amount_usdc", 0),
+            "coherence": action.get("coherence", 1.0),
+            "decision": decision.verdict,
+            "reason": decision.reason,
+        }
+
+
+def write_jsonl(decisions, out):
+    """Écrit les décisions, une par ligne ; renvoie le nombre écrit."""
+    count = 0
+    for decision in decisions:
+        out.write(json.dumps(decision, separators=(",", ":")))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def write_parquet(decisions, path, row_group_size=65536):
+    """
+    Écrit les décisions en Parquet, par row groups de taille fixe.
+
+    Nécessite pyarrow (optionnel) : pip install pyarrow
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from None
+
+    schema = pa.schema([
+        ("line", pa.int64()),
+        ("ts", pa.float64()),
+        ("agent_id", pa.string()),
+        ("recipient", pa.string()),
+        ("amount_usdc", pa.float64()),
+        ("coherence", pa.float64()),
+        ("decision", pa.string()),
+        ("reason", pa.string()),
+    ])
+    count = 0
+    columns = {name: [] for name in OUTPUT_FIELDS}
+    with pq.ParquetWriter(path, schema) as writer:
+        for decision in decisions:
+            for name in OUTPUT_FIELDS:
+                columns[name].append(decision[name])
+            count += 1
+            if len(columns["line"]) >= row_group_size:
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                columns = {name: [] for name in OUTPUT_FIELDS}
+        if columns["line"]:
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+    return count
+
+
+class _Tally:
+    """Compte les décisions au passage, sans les retenir."""
+
+    def __init__(self, decisions):
+        self.decisions = decisions
+        self.allowed = 0
+        self.blocked = 0
+
+    def __iter__(self):
+        for decision in self.decisions:
+            if decision["decision"] == "ALLOW":
+                self.allowed += 1
+            else:
+                self.blocked += 1
+            yield decision
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a JSONL action trace through the safety gate")
+    parser.add_argument("trace", help="JSONL trace (.gz accepted, '-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="decisions file (.jsonl or .parquet, '-' for stdout)")
+    parser.add_argument("--scope", choices=SCOPES, default=DEFAULT_SCOPE, help="temporal state key")
+    parser.add_argument("--policies", help='rate policies, e.g. "count:agent:5/60" (default: X108_POLICIES)')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with open_trace(args.trace) as lines:
+        tally = _Tally(replay(to_actions(read_records(lines)), scope=args.scope,
+                              policies=load_policies(args.policies)))
+        if args.output.endswith(".parquet"):
+            count = write_parquet(tally, args.output)
+        elif args.output == "-":
+            count = write_jsonl(tally, sys.stdout)
+        else:
+            with open(args.output, "w", encoding="utf-8") as out:
+                count = write_jsonl(tally, out)
+    elapsed = time.perf_counter() - started
+
+    print(f"{count} actions rejouées en {elapsed:.2f} s "
+          f"({tally.allowed} ALLOW, {tally.blocked} BLOCK)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
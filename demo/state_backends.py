@@ -0,0 +1,337 @@
+"""
+Backends d'état temporel partagés entre processus
+=================================================
+
+`guard_lite.TemporalState` garde le HOLD en mémoire, par processus. Ces
+backends exposent la même interface (`acquire`, `last`, `record`, `clear`,
+`active`, `len()`) pour appliquer la fenêtre de HOLD à plusieurs processus
+ou machines :
+
+- `SharedMemoryState` : table de hachage dans un segment
+  `multiprocessing.shared_memory`, pour les processus d'une même machine
+  (répliques Streamlit, agents CLI). Découpée en bandes verrouillées
+  indépendamment (verrou de thread + verrou fcntl sur une plage d'un
+  fichier), comme les shards de TemporalState.
+- `RedisState` : une clé Redis par clé de HOLD, posée avec
+  `SET key ts NX PX window GET` : vérification et écriture atomiques en un
+  seul aller-retour. Les clés bloquées sont mémorisées localement jusqu'à
+  la fin de leur HOLD (bail local), ce qui évite le réseau pour les agents
+  qui insistent.
+
+Sélection : `guard_lite.create_state()` ou X108_STATE_BACKEND=memory|shm|redis.
+"""
+
+import hashlib
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import weakref
+
+SHM_NAME = os.getenv("X108_SHM_NAME", "x108_state")
+REDIS_URL = os.getenv("X108_REDIS_URL", "redis://127.0.0.1:6379/0")
+REDIS_PREFIX = os.getenv("X108_REDIS_PREFIX", "x108:hold:")
+
+_MAGIC = 0x58313038_00000001   # "X108", version 1
+_HEADER_WORDS = 4              # magic, bandes, emplacements par bande, réservé
+
+
+def stable_hash(key):
+    """Hash 64 bits non nul, identique dans tous les processus (contrairement à hash())."""
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def _open_shared_memory(name, size):
+    """Crée ou rattache le segment ; il survit aux processus jusqu'à unlink()."""
+    from multiprocessing import shared_memory
+
+    kwargs = {"track": False} if sys.version_info >= (3, 13) else {}
+    try:
+        shm, created = shared_memory.SharedMemory(name, create=True, size=size, **kwargs), True
+    except FileExistsError:
+        shm, created = shared_memory.SharedMemory(name, **kwargs), False
+    if not kwargs:
+        # Avant 3.13, le resource_tracker détruit le segment à la sortie du
+        # premier processus qui l'a ouvert, même s'il ne l'a pas créé
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm, created
+
+
+def _detach(shm, fd, views):
+    for view in views:
+        view.release()
+    shm.close()
+    os.close(fd)
+
+
+class SharedMemoryState:
+    """
+    État temporel dans un segment de mémoire partagée, par adressage ouvert.
+
+    Chaque bande a sa propre table (sondage linéaire) ; quand une bande est
+    remplie aux trois quarts, les entrées sorties de leur fenêtre sont
+    purgées. Les clés sont identifiées par un hash stable de 64 bits.
+    Le premier processus crée le segment (géométrie `stripes` x `slots`),
+    les suivants s'y rattachent et lisent la géométrie dans l'en-tête.
+    """
+
+    def __init__(self, name=SHM_NAME, stripes=64, slots=4096):
+        try:
+            import fcntl
+        except ImportError:
+            raise RuntimeError("the shared-memory state backend needs fcntl (POSIX)") from None
+        self._fcntl = fcntl
+
+        self.name = name
+        size = 8 * (_HEADER_WORDS + stripes + 2 * stripes * slots)
+        self._shm, created = _open_shared_memory(name, size)
+        header = self._shm.buf[:8 * _HEADER_WORDS].cast("Q")
+        if created:
+            header[1], header[2] = stripes, slots
+            header[0] = _MAGIC  # en dernier : signale un segment initialisé
+        else:
+            deadline = time.monotonic() + 5
+            while header[0] != _MAGIC:
+                if time.monotonic() > deadline:
+                    header.release()
+                    raise RuntimeError(f"shared memory {name!r} is not an X-108 state segment")
+                time.sleep(0.001)
+            stripes, slots = header[1], header[2]
+        header.release()
+
+        self.stripes, self.slots = stripes, slots
+        self._max_load = slots * 3 // 4
+        buf = self._shm.buf
+        offset = 8 * _HEADER_WORDS
+        self._counts = buf[offset:offset + 8 * stripes].cast("Q")
+        offset += 8 * stripes
+        self._hashes = buf[offset:offset + 8 * stripes * slots].cast("Q")
+        offset += 8 * stripes * slots
+        self._times = buf[offset:offset + 8 * stripes * slots].cast("d")
+
+        self.lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # Libère les vues avant le segment, y compris à la sortie de l'interpréteur
+        self._detach = weakref.finalize(self, _detach, self._shm, self._fd,
+                                        (self._counts, self._hashes, self._times))
+
+    def _lock(self, stripe):
+        # Verrou de thread d'abord : fcntl n'exclut que les autres processus
+        self._locks[stripe].acquire()
+        self._fcntl.lockf(self._fd, self._fcntl.LOCK_EX, 1, stripe)
+
+    def _unlock(self, stripe):
+        self._fcntl.lockf(self._fd, self._fcntl.LOCK_UN, 1, stripe)
+        self._locks[stripe].release()
+
+    def _find(self, stripe, h):
+        """Emplacement de `h` dans sa bande, ou premier emplacement libre ; (index, trouvé)."""
+        base, slots, hashes = stripe * self.slots, self.slots, self._hashes
+        i = (h // self.stripes) % slots  # bits de poids faible déjà utilisés pour la bande
+        for _ in range(slots):
+            current = hashes[base + i]
+            if current == h:
+                return base + i, True
+            if current == 0:
+                return base + i, False
+            i = i + 1 if i + 1 < slots else 0
+        return -1, False
+
+    def _insert(self, stripe, h, ts, now, window):
+        if self._counts[stripe] >= self._max_load:
+            self._compact(stripe, now, window)
+            if self._counts[stripe] >= self.slots - 1:
+                raise RuntimeError(f"shared temporal state {self.name!r} is full")
+        index, _ = self._find(stripe, h)
+        self._hashes[index] = h
+        self._times[index] = float(ts)
+        self._counts[stripe] += 1
+
+    def _compact(self, stripe, now, window):
+        """Reconstruit la bande sans les entrées sorties de leur fenêtre."""
+        base = stripe * self.slots
+        live = [(self._hashes[i], self._times[i]) for i in range(base, base + self.slots)
+                if self._hashes[i] and now - self._times[i] < window]
+        for i in range(base, base + self.slots):
+            self._hashes[i] = 0
+        self._counts[stripe] = 0
+        for h, ts in live:
+            index, _ = self._find(stripe, h)
+            self._hashes[index] = h
+            self._times[index] = ts
+            self._counts[stripe] += 1
+
+    def acquire(self, key, now, window, record=True):
+        """Même contrat que TemporalState.acquire, atomique entre processus."""
+        h = stable_hash(key)
+        stripe = h % self.stripes
+        self._lock(stripe)
+        try:
+            index, found = self._find(stripe, h)
+            if found:
+                last = self._times[index]
+                if now - last < window:
+                    return last
+                if record:
+                    self._times[index] = float(now)
+            elif record:
+                self._insert(stripe, h, now, now, window)
+            return None
+        finally:
+            self._unlock(stripe)
+
+    def last(self, key):
+        h = stable_hash(key)
+        stripe = h % self.stripes
+        self._lock(stripe)
+        try:
+            index, found = self._find(stripe, h)
+            return self._times[index] if found else None
+        finally:
+            self._unlock(stripe)
+
+    def record(self, key, ts):
+        h = stable_hash(key)
+        stripe = h % self.stripes
+        self._lock(stripe)
+        try:
+            index, found = self._find(stripe, h)
+            if found:
+                self._times[index] = float(ts)
+            else:
+                self._insert(stripe, h, ts, ts, math.inf)  # fenêtre inconnue : ne purge rien
+        finally:
+            self._unlock(stripe)
+
+    def active(self, now, window):
+        count = 0
+        for stripe in range(self.stripes):
+            base = stripe * self.slots
+            self._lock(stripe)
+            try:
+                count += sum(1 for i in range(base, base + self.slots)
+                             if self._hashes[i] and now - self._times[i] < window)
+            finally:
+                self._unlock(stripe)
+        return count
+
+    def clear(self):
+        for stripe in range(self.stripes):
+            base = stripe * self.slots
+            self._lock(stripe)
+            try:
+                self._hashes[base:base + self.slots] = memoryview(bytes(8 * self.slots)).cast("Q")
+                self._counts[stripe] = 0
+            finally:
+                self._unlock(stripe)
+
+    def __len__(self):
+        return sum(self._counts)
+
+    def close(self):
+        """Détache ce processus (le segment et son contenu restent)."""
+        self._detach()
+
+    def unlink(self):
+        """Détruit le segment et son fichier de verrou (après close())."""
+        if sys.version_info < (3, 13):
+            # unlink() désinscrit le segment du resource_tracker : le réinscrire d'abord
+            from multiprocessing import resource_tracker
+            resource_tracker.register(self._shm._name, "shared_memory")
+        self._shm.unlink()
+        try:
+            os.unlink(self.lock_path)
+        except FileNotFoundError:
+            pass
+
+
+class RedisState:
+    """
+    État temporel dans Redis (>= 7.0), une clé `prefix + key` par clé de HOLD
+    expirant avec la fenêtre. L'expiration suit l'horloge du serveur Redis :
+    à utiliser avec SystemClock.
+
+    Le bail local ne retient que des clés bloquées, jusqu'à la fin connue de
+    leur HOLD : il peut retarder un ALLOW (après un clear() sur un autre
+    nœud) mais jamais en accorder un second.
+    """
+
+    def __init__(self, url=REDIS_URL, prefix=REDIS_PREFIX, window=10.0, cache_size=100_000, client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("the redis state backend needs redis-py: pip install redis") from None
+            client = redis.Redis.from_url(url, protocol=2)
+        self._redis = client
+        self.prefix = prefix
+        self.window = window
+        self.cache_size = cache_size
+        self._held = {}   # clé -> timestamp de l'action qui la bloque
+        self.stats = {"round_trips": 0, "cache_hits": 0}
+
+    def _name(self, key):
+        return self.prefix + (key if isinstance(key, str) else repr(key))
+
+    def _hold(self, key, last, now, window):
+        held = self._held
+        if len(held) >= self.cache_size:
+            for cached, ts in list(held.items()):
+                if now - ts >= window:
+                    held.pop(cached, None)
+            if len(held) >= self.cache_size:
+                held.clear()
+        held[key] = last
+
+    def acquire(self, key, now, window, record=True):
+        """Même contrat que TemporalState.acquire, en un aller-retour au plus."""
+        last = self._held.get(key)
+        if last is not None:
+            if now - last < window:
+                self.stats["cache_hits"] += 1
+                return last
+            self._held.pop(key, None)
+
+        self.stats["round_trips"] += 1
+        if record:
+            old = self._redis.set(self._name(key), repr(now), nx=True, px=max(1, int(window * 1000)), get=True)
+        else:
+            old = self._redis.get(self._name(key))
+        if old is None:
+            if record:
+                self._hold(key, now, now, window)
+            return None
+        last = float(old)
+        self._hold(key, last, now, window)
+        return last
+
+    def last(self, key):
+        value = self._redis.get(self._name(key))
+        return None if value is None else float(value)
+
+    def record(self, key, ts):
+        self._redis.set(self._name(key), repr(ts), px=max(1, int(self.window * 1000)))
+
+    def _keys(self):
+        return list(self._redis.scan_iter(match=self.prefix + "*", count=1000))
+
+    def active(self, now, window):
+        # Les clés expirent avec leur fenêtre : toutes celles présentes sont en HOLD
+        return len(self._keys())
+
+    def clear(self):
+        self._held.clear()
+        keys = self._keys()
+        if keys:
+            self._redis.delete(*keys)
+
+    def __len__(self):
+        return len(self._keys())
+
+    def close(self):
+        self._redis.close()
@@ -0,0 +1,186 @@
+"""
+Test de charge concurrent du Safety Gate
+========================================
+
+Vérifie qu'aucun agent n'obtient deux ALLOW dans la même fenêtre de HOLD
+lorsque de nombreux threads (et processus) évaluent les mêmes agents
+simultanément.
+
+Chaque round, tous les workers (démarrés ensemble par une barrière)
+évaluent tous les agents du round dans un ordre aléatoire, horloge
+virtuelle figée : chaque agent doit recevoir exactement un ALLOW.
+
+`--backend` choisit l'état temporel (memory, shm, redis) ; avec
+`--processes N`, l'état `memory` n'est pas partagé et le test échoue, ce
+que `shm` et `redis` corrigent. Sans `--redis-url`, un stub Redis local est
+démarré. `--naive` rejoue l'ancienne séquence lecture puis écriture
+séparées (state.last / state.record) pour montrer que le harnais détecte
+la course.
+
+Usage :
+    python demo/stress_guard.py                        # 32 threads, 200 agents
+    python demo/stress_guard.py --threads 64 --shards 1
+    python demo/stress_guard.py --naive                # code 1 : double ALLOW
+    python demo/stress_guard.py --processes 4 --threads 8 --backend shm
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from demo.clock import VirtualClock
+from demo.guard_lite import STATE_BACKENDS, TEMPORAL_WINDOW, TemporalState, evaluate, state_key
+
+
+def naive_evaluate(action, state, clock):
+    """Séquence d'avant l'acquire atomique : vérification puis écriture séparées."""
+    key = state_key(action)
+    now = clock.now()
+    last = state.last(key)
+    if last is not None and now - last < TEMPORAL_WINDOW:
+        return "BLOCK"
+    time.sleep(0)  # cède le GIL entre la vérification et l'écriture
+    state.record(key, now)
+    return "ALLOW"
+
+
+def open_state(backend, shards=64, shm_name=None, redis_url=None):
+    if backend == "memory":
+        return TemporalState(shards=shards)
+    if backend == "shm":
+        from demo.state_backends import SharedMemoryState
+        return SharedMemoryState(shm_name, stripes=shards)
+    if backend == "redis":
+        from demo.state_backends import RedisState
+        return RedisState(redis_url, prefix=f"x108:stress:{shm_name}:")
+    raise ValueError(f"unknown state backend {backend!r}, expected one of {STATE_BACKENDS}")
+
+
+def _run_threads(state, threads, agents, rounds, barrier, naive, seed):
+    """Lance `threads` workers sur `state` ; renvoie les (round, agent) autorisés."""
+    clock = VirtualClock()
+    actions = [[{
+        "agent_id": f"r{round_id}_agent_{i}",  # clés neuves à chaque round : indépendant de l'expiration
+        "intent": "buy_api_access",
+        "amount_usdc": 1,
+        "recipient": "api_provider",
+        "coherence": 0.9,
+    } for i in range(agents)] for round_id in range(rounds)]
+    gate = naive_evaluate if naive else (lambda action, state, clock: evaluate(action, state=state, clock=clock))
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1_000_003 + worker_id)
+        order = list(range(agents))
+        allowed = []
+        for round_id in range(rounds):
+            rng.shuffle(order)
+            barrier.wait()
+            for i in order:
+                if gate(actions[round_id][i], state, clock) == "ALLOW":
+                    allowed.append((round_id, i))
+        return allowed
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return [pair for allowed in pool.map(worker, range(threads)) for pair in allowed]
+
+
+def _process_main(results, options, threads, agents, rounds, barrier, naive, seed):
+    state = open_state(**options)
+    try:
+        results.put(_run_threads(state, threads, agents, rounds, barrier, naive, seed))
+    finally:
+        if hasattr(state, "close"):
+            state.close()
+
+
+def run_stress(threads=32, agents=200, rounds=50, shards=64, naive=False, seed=0,
+               backend="memory", processes=1, redis_url=None):
+    """
+    Returns:
+        dict : décisions, ALLOW par (round, agent) en double ou manquants,
+        débit (décisions/s)
+    """
+    stub = None
+    if backend == "redis" and redis_url is None:
+        from demo.redis_stub_server import start_stub_server
+        stub = start_stub_server()
+        redis_url = stub.url
+    options = {"backend": backend, "shards": shards, "shm_name": f"x108_stress_{os.getpid()}",
+               "redis_url": redis_url}
+    state = open_state(**options)  # crée le segment partagé avant les processus
+
+    started = time.perf_counter()
+    try:
+        if processes == 1:
+            allowed = _run_threads(state, threads, agents, rounds, threading.Barrier(threads), naive, seed)
+        else:
+            context = multiprocessing.get_context("fork")
+            barrier = context.Barrier(processes * threads)
+            results = context.Queue()
+            workers = [context.Process(target=_process_main,
+                                       args=(results, options, threads, agents, rounds, barrier, naive, seed + p))
+                       for p in range(processes)]
+            for process in workers:
+                process.start()
+            allowed = [pair for _ in workers for pair in results.get()]
+            for process in workers:
+                process.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        if backend != "memory":
+            state.clear()
+            state.close()
+        if backend == "shm":
+            state.unlink()
+        if stub is not None:
+            stub.shutdown()
+
+    allow_counts = Counter(allowed)
+    decisions = processes * threads * agents * rounds
+    return {
+        "decisions": decisions,
+        "double_allows": sum(1 for n in allow_counts.values() if n > 1),
+        "missing_allows": rounds * agents - len(allow_counts),
+        "elapsed_s": elapsed,
+        "decisions_per_s": decisions / elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="X-108 concurrent stress test (no double ALLOW)")
+    parser.add_argument("--threads", type=int, default=32, help="threads per process")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--agents", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--shards", type=int, default=64, help="lock stripes (memory and shm backends)")
+    parser.add_argument("--backend", choices=STATE_BACKENDS, default="memory")
+    parser.add_argument("--redis-url", help="Redis server (default: a local stub)")
+    parser.add_argument("--switch-interval", type=float, default=1e-6,
+                        help="sys.setswitchinterval, small values force more thread interleaving")
+    parser.add_argument("--naive", action="store_true", help="separate check and record (shows the race)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    sys.setswitchinterval(args.switch_interval)
+    result = run_stress(args.threads, args.agents, args.rounds, args.shards, args.naive, args.seed,
+                        args.backend, args.processes, args.redis_url)
+
+    print(f"{args.processes} x {args.threads} threads, {args.agents} agents, {args.rounds} rounds, "
+          f"{args.backend} backend, {args.shards} shards{' (naive)' if args.naive else ''}")
+    print(f"  decisions       {result['decisions']:,} in {result['elapsed_s']:.2f} s "
+          f"({result['decisions_per_s']:,.0f}/s)")
+    print(f"  double ALLOW    {result['double_allows']}")
+    print(f"  missing ALLOW   {result['missing_allows']}")
+    ok = result["double_allows"] == 0 and result["missing_allows"] == 0
+    print("OK" if ok else "FAILED: HOLD window violated")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,40 +1,49 @@
 """
 Script de test automatique pour démontrer le système de sécurité
 Teste plusieurs scénarios : paiements normaux, rapides, avec faible cohérence
+
+Usage : python demo/test_scenarios.py [--virtual]
+    --virtual : temps simulé, les attentes de HOLD sont instantanées
 """
-import time
+import sys
 from demo.agent import agent_request
-from demo.guard_lite import evaluate
+from demo.clock import SystemClock, VirtualClock
+from demo.guard_lite import TemporalState, evaluate
 from demo.pay_usdc import pay_usdc
 
 def print_separator():
     print("\n" + "="*70 + "\n")
 
-def test_scenario(name, description, action, wait_time=0):
+def test_scenario(name, description, action, wait_time=0, clock=None, state=None):
     """Teste un scénario et affiche le résultat"""
+    clock = clock or SystemClock()
     print(f"📋 SCÉNARIO : {name}")
     print(f"   Description : {description}")
     print(f"   Action : {action}")
     
-    decision = evaluate(action)
+    decision = evaluate(action, state=state, clock=clock)
     
-    print(f"   🔒 Décision de sécurité : {decision}")
+    print(f"   🔒 Décision de sécurité : {decision} ({decision.reason})")
     
     if decision == "ALLOW":
         pay_usdc(action["amount_usdc"], action["recipient"])
         print(f"   ✅ Paiement exécuté : {action['amount_usdc']} USDC → {action['recipient']}")
     else:
-        print(f"   ❌ Paiement bloqué pour raisons de sécurité")
+        print(f"   ❌ Paiement bloqué : {decision.describe()}")
     
     if wait_time > 0:
         print(f"   ⏳ Attente de {wait_time} secondes...")
-        time.sleep(wait_time)
+        clock.sleep(wait_time)
     
     print_separator()
     return decision
 
-def run_all_tests():
-    """Exécute tous les scénarios de test"""
+def run_all_tests(virtual=False):
+    """Exécute tous les scénarios de test (en temps simulé si `virtual`)"""
+    if virtual:
+        clock, state = VirtualClock(), TemporalState()
+    else:
+        clock, state = SystemClock(), None
     print("\n" + "🚀 DÉMONSTRATION DU SYSTÈME DE SÉCURITÉ AGENTIC COMMERCE" + "\n")
     print("Ce système protège contre les paiements dangereux ou irrationnels")
     print_separator()
@@ -47,7 +56,9 @@ def run_all_tests():
         "1. Paiement Normal",
         "Un agent IA achète un accès API pour 3 USDC",
         action1,
-        wait_time=2
+        wait_time=2,
+        clock=clock,
+        state=state
     )
     results.append(("Paiement Normal (3 USDC)", result1))
     
@@ -57,7 +68,9 @@ def run_all_tests():
         "2. Paiement Rapide Successif",
         "L'agent essaie de payer à nouveau immédiatement (< 10 secondes)",
         action2,
-        wait_time=2
+        wait_time=2,
+        clock=clock,
+        state=state
     )
     results.append(("Paiement Rapide (< 10s)", result2))
     
@@ -72,20 +85,24 @@ def run_all_tests():
         "3. Paiement avec Faible Cohérence",
         "Action suspecte avec score de cohérence de 0.3 (seuil : 0.6)",
         action3,
-        wait_time=2
+        wait_time=2,
+        clock=clock,
+        state=state
     )
     results.append(("Faible Cohérence (0.3)", result3))
     
     # Scénario 4 : Paiement après attente (devrait être autorisé)
     print("⏳ Attente de 10 secondes pour réinitialiser la contrainte temporelle...")
-    time.sleep(10)
+    clock.sleep(10)
     print_separator()
     
     action4 = agent_request({"amount": 4, "recipient": "compute_provider"})
     result4 = test_scenario(
         "4. Paiement Après Délai de Sécurité",
         "Paiement après avoir attendu 10 secondes (contrainte temporelle respectée)",
-        action4
+        action4,
+        clock=clock,
+        state=state
     )
     results.append(("Paiement Après Délai", result4))
     
@@ -99,7 +116,9 @@ def run_all_tests():
     result5 = test_scenario(
         "5. Paiement avec Excellente Cohérence",
         "Action légitime avec score de cohérence de 0.95",
-        action5
+        action5,
+        clock=clock,
+        state=state
     )
     results.append(("Excellente Cohérence (0.95)", result5))
     
@@ -128,4 +147,4 @@ def run_all_tests():
     print_separator()
 
 if __name__ == "__main__":
-    run_all_tests()
+    run_all_tests(virtual="--virtual" in sys.argv[1:])
@@ -13,22 +13,48 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from demo.agent import agent_request
-from demo.guard_lite import evaluate
+from demo.clock import SystemClock, VirtualClock
+from demo.decision_log import DecisionLog
+from demo.guard_lite import TemporalState, evaluate
 from demo.pay_usdc import pay_usdc
 import time
-import pandas as pd
 
 # Web3 and Moltbook integration (optional layers)
 try:
     from web3_integration.x108_token_layer import create_token_layer
     from web3_integration.moltbook_integration import create_moltbook_integration
-    token_layer = create_token_layer()
-    moltbook = create_moltbook_integration()
     WEB3_ENABLED = True
 except ImportError:
     WEB3_ENABLED = False
     print("Warning: Web3 layers not available. Running in core mode only.")
 
+
+# Couches partagées par toutes les sessions : créées au premier usage, puis
+# réutilisées à chaque rerun tant que leur health check passe
+def _token_layer_is_healthy(layer) -> bool:
+    if layer.is_healthy():
+        return True
+    layer.close()
+    return False
+
+
+@st.cache_resource(validate=_token_layer_is_healthy)
+def get_token_layer():
+    return create_token_layer()
+
+
+def _moltbook_is_healthy(integration) -> bool:
+    if integration.is_healthy():
+        return True
+    integration.close(timeout=1)
+    return False
+
+
+@st.cache_resource(validate=_moltbook_is_healthy)
+def get_moltbook():
+    return create_moltbook_integration(background=True)
+
+
 # Page configuration
 st.set_page_config(
     page_title="X-108 Safety Gate Demo",
@@ -77,9 +103,14 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Journal des décisions partagé entre les sessions et persistant (SQLite)
+@st.cache_resource
+def get_decision_log():
+    return DecisionLog()
+
+decision_log = get_decision_log()
+
 # Initialize session state
-if 'transaction_history' not in st.session_state:
-    st.session_state.transaction_history = []
 if 'last_payment_time' not in st.session_state:
     st.session_state.last_payment_time = None
 
@@ -133,15 +164,12 @@ with st.sidebar:
     st.divider()
     
     st.header("📊 Statistics")
-    if st.session_state.transaction_history:
-        total = len(st.session_state.transaction_history)
-        allowed = sum(1 for t in st.session_state.transaction_history if t['decision'] == 'ALLOW')
-        blocked = total - allowed
-        st.metric("Total Transactions", total)
-        st.metric("✅ Allowed", allowed)
-        st.metric("❌ Blocked", blocked)
-        if total > 0:
-            st.metric("Block Rate", f"{(blocked/total)*100:.1f}%")
+    stats = decision_log.stats  # ligne d'agrégats du journal (tous processus)
+    if stats.total:
+        st.metric("Total Transactions", stats.total)
+        st.metric("✅ Allowed", stats.allowed)
+        st.metric("❌ Blocked", stats.blocked)
+        st.metric("Block Rate", f"{stats.block_rate:.1f}%")
     else:
         st.info("No transactions yet")
 
@@ -246,18 +274,18 @@ with tab2:
             else:
                 st.markdown('<div class="danger-box">', unsafe_allow_html=True)
                 st.error(f"❌ **PAYMENT BLOCKED**")
-                st.markdown(f"**Reason:** Safety gate blocked this payment")
+                st.markdown(f"**Reason:** {decision_result.describe('en')}")
                 st.markdown('</div>', unsafe_allow_html=True)
             
             # Add to history
-            st.session_state.transaction_history.append({
+            decision_log.append({
                 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
                 'amount': amount,
                 'recipient': recipient,
                 'coherence': coherence,
                 'intent': intent,
                 'decision': decision_result,
-                'reason': 'Passed safety checks' if decision_result == 'ALLOW' else 'Blocked by safety gate'
+                'reason': decision_result.describe("en")
             })
 
 # Tab 3: Automated Tests
@@ -301,10 +329,20 @@ with tab3:
     col1, col2 = st.columns([2, 1])
     
     with col1:
+        virtual_time = st.checkbox(
+            "⚡ Virtual time",
+            value=True,
+            help="Simulate the HOLD delays on a virtual clock (isolated gate state) instead of really waiting."
+        )
         if st.button("▶️ Run All Scenarios", type="primary", use_container_width=True):
             st.session_state.last_payment_time = None  # Reset
             results = []
             
+            if virtual_time:
+                clock, gate_state = VirtualClock(time.time()), TemporalState()
+            else:
+                clock, gate_state = SystemClock(), None
+            
             progress_bar = st.progress(0)
             status_text = st.empty()
             
@@ -313,11 +351,11 @@ with tab3:
                 
                 # Apply delay
                 if scenario['delay'] > 0 and st.session_state.last_payment_time:
-                    time.sleep(scenario['delay'])
+                    clock.sleep(scenario['delay'])
                 
                 # Evaluate
-                now = time.time()
-                decision_result = evaluate(scenario['action'])
+                now = clock.now()
+                decision_result = evaluate(scenario['action'], state=gate_state, clock=clock)
                 
                 # Update last payment time if allowed
                 if decision_result == 'ALLOW':
@@ -326,18 +364,18 @@ with tab3:
                 results.append({
                     'Scenario': scenario['name'],
                     'Result': '✅ ALLOW' if decision_result == 'ALLOW' else '❌ BLOCK',
-                    'Reason': 'Passed safety checks' if decision_result == 'ALLOW' else 'Blocked by safety gate'
+                    'Reason': decision_result.describe("en")
                 })
                 
                 # Add to history
-                st.session_state.transaction_history.append({
+                decision_log.append({
                     'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
                     'amount': scenario['action']['amount_usdc'],
                     'recipient': scenario['action']['recipient'],
                     'coherence': scenario['action']['coherence'],
                     'intent': scenario['action']['intent'],
                     'decision': decision_result,
-                    'reason': 'Passed safety checks' if decision_result == 'ALLOW' else 'Blocked by safety gate'
+                    'reason': decision_result.describe("en")
                 })
                 
                 progress_bar.progress((i + 1) / len(scenarios))
@@ -347,6 +385,7 @@ with tab3:
             # Display results
             st.divider()
             st.subheader("📊 Test Results")
+            import pandas as pd  # chargé seulement pour afficher des tableaux
             df = pd.DataFrame(results)
             st.dataframe(df, use_container_width=True)
             
@@ -362,7 +401,7 @@ with tab3:
     with col2:
         st.info("""
         **Test Duration:**
-        ~30 seconds
+        instant with virtual time, ~30 seconds otherwise
         
         **Expected Results:**
         - 2-3 allowed
@@ -396,50 +435,45 @@ with tab3:
                     st.success(f"✅ ALLOW: Passed safety checks")
                     st.session_state.last_payment_time = now
                 else:
-                    st.error(f"❌ BLOCK: Blocked by safety gate")
+                    st.error(f"❌ BLOCK: {decision_result.describe('en')}")
                 
                 # Add to history
-                st.session_state.transaction_history.append({
+                decision_log.append({
                     'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
                     'amount': scenario['action']['amount_usdc'],
                     'recipient': scenario['action']['recipient'],
                     'coherence': scenario['action']['coherence'],
                     'intent': scenario['action']['intent'],
                     'decision': decision_result,
-                    'reason': 'Passed safety checks' if decision_result == 'ALLOW' else 'Blocked by safety gate'
+                    'reason': decision_result.describe("en")
                 })
 
 # Tab 4: Transaction History
 with tab4:
     st.header("📊 Transaction History")
     
-    if st.session_state.transaction_history:
-        # Create DataFrame
-        df = pd.DataFrame(st.session_state.transaction_history)
-        
+    stats = decision_log.stats
+    if stats.total:
         # Display statistics
         col1, col2, col3, col4 = st.columns(4)
         
-        total = len(df)
-        allowed = len(df[df['decision'] == 'ALLOW'])
-        blocked = total - allowed
-        
+        total = stats.total
         col1.metric("Total Transactions", total)
-        col2.metric("✅ Allowed", allowed)
-        col3.metric("❌ Blocked", blocked)
-        col4.metric("Block Rate", f"{(blocked/total)*100:.1f}%")
+        col2.metric("✅ Allowed", stats.allowed)
+        col3.metric("❌ Blocked", stats.blocked)
+        col4.metric("Block Rate", f"{stats.block_rate:.1f}%")
         
         st.divider()
         
-        # Display table
+        # Display table (one page at a time, most recent first)
         st.subheader("Transaction Log")
-        st.dataframe(df, use_container_width=True)
-        
-        # Clear history button
-        if st.button("🗑️ Clear History", type="secondary"):
-            st.session_state.transaction_history = []
-            st.session_state.last_payment_time = None
-            st.rerun()
+        page_size = 100
+        page_count = (total + page_size - 1) // page_size
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1) - 1
+        st.caption(f"Page {page + 1} of {page_count}")
+        import pandas as pd
+        df = pd.DataFrame(decision_log.page(page, page_size))
+        st.dataframe(df, use_container_width=True, hide_index=True)
     else:
         st.info("No transactions yet. Try the Interactive Mode or run Automated Tests!")
 
@@ -462,34 +496,28 @@ with tab5:
     # Note for demo mode
     st.info("""
     💡 **Demo Mode**: This page shows two types of metrics:
-    - **Real-time demo metrics** (from your current session) ← Try the Interactive Mode or Automated Tests!
+    - **Real-time demo metrics** (from the shared decision log) ← Try the Interactive Mode or Automated Tests!
     - **Simulated production-scale data** (what the protocol would look like at scale)
     """)
     
-    # Real-time metrics from current session
-    if st.session_state.transaction_history:
-        st.subheader("📊 Real-Time Demo Metrics (Your Current Session)")
-        
-        # Calculate real metrics
-        total_txs = len(st.session_state.transaction_history)
-        allowed_txs = sum(1 for t in st.session_state.transaction_history if t['decision'] == 'ALLOW')
-        total_amount = sum(t['amount'] for t in st.session_state.transaction_history if t['decision'] == 'ALLOW')
-        total_fees = total_amount * 0.001  # 0.1% fee
+    # Real-time metrics from the decision log
+    stats = decision_log.stats
+    if stats.total:
+        st.subheader("📊 Real-Time Demo Metrics (Decision Log)")
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Total Transactions", total_txs)
-            st.metric("Total Fees Collected", f"{total_fees:.3f} USDC")
+            st.metric("Total Transactions", stats.total)
+            st.metric("Total Fees Collected", f"{stats.total_fees:.3f} USDC")  # 0.1% fee
         
         with col2:
-            st.metric("✅ Allowed", allowed_txs)
-            st.metric("❌ Blocked", total_txs - allowed_txs)
+            st.metric("✅ Allowed", stats.allowed)
+            st.metric("❌ Blocked", stats.blocked)
         
         with col3:
-            if total_txs > 0:
-                st.metric("Block Rate", f"{((total_txs - allowed_txs) / total_txs) * 100:.1f}%")
-            st.metric("Total Volume", f"{total_amount} USDC")
+            st.metric("Block Rate", f"{stats.block_rate:.1f}%")
+            st.metric("Total Volume", f"{stats.allowed_amount} USDC")
         
         st.divider()
     
@@ -633,14 +661,14 @@ with tab5:
     
     if WEB3_ENABLED:
         try:
-            stats = moltbook.get_stats()
+            moltbook_stats = get_moltbook().get_stats()
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Total Posts", stats.get('total_posts', 0))
+                st.metric("Total Posts", moltbook_stats.get('total_posts', 0))
             with col2:
-                st.metric("Allowed", stats.get('allowed_posts', 0))
+                st.metric("Allowed", moltbook_stats.get('allowed_posts', 0))
             with col3:
-                st.metric("Blocked", stats.get('blocked_posts', 0))
+                st.metric("Blocked", moltbook_stats.get('blocked_posts', 0))
         except:
             st.info("🚧 Moltbook stats will be available when connected to the live feed.")
     else:
@@ -651,8 +679,14 @@ with tab5:
     # Smart Contract Info
     st.subheader("🔗 Smart Contract")
     
-    st.markdown("""
-    **Contract Address:** `0x0000...0000` (Demo mode)
+    token_layer = get_token_layer() if WEB3_ENABLED else None
+    if token_layer is not None and token_layer.is_contract_deployed():
+        contract_address = f"`{token_layer.contract_address}`"
+    else:
+        contract_address = "`0x0000...0000` (Demo mode)"
+    
+    st.markdown(f"""
+    **Contract Address:** {contract_address}
     
     **Network:** Base (Ethereum L2)
     
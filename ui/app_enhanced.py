@@ -13,6 +13,7 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
 from demo.agent import agent_request
+from demo.decision_log import DecisionStats
 from demo.guard_lite import evaluate
 from demo.pay_usdc import pay_usdc
 
@@ -23,6 +24,12 @@ st.set_page_config(
     layout="wide"
 )
 
+# Historique et agrégats de la session (mis à jour ensemble, en O(1))
+if "history" not in st.session_state:
+    st.session_state.history = []
+if "stats" not in st.session_state:
+    st.session_state.stats = DecisionStats()
+
 # Titre principal
 st.title("🔒 Agentic Commerce — Safe USDC Payment")
 st.markdown("### Système de sécurité pour paiements autonomes par IA")
@@ -85,8 +92,6 @@ with tab1:
             st.markdown(f"**{amount} USDC** → **{recipient}**")
             
             # Stocker dans l'historique
-            if "history" not in st.session_state:
-                st.session_state.history = []
             st.session_state.history.append({
                 "time": time.strftime("%H:%M:%S"),
                 "amount": amount,
@@ -94,17 +99,12 @@ with tab1:
                 "coherence": coherence,
                 "decision": "ALLOW"
             })
+            st.session_state.stats.record("ALLOW", amount)
         else:
             st.error(f"❌ **PAIEMENT BLOQUÉ**")
-            st.markdown("""
-            **Raisons possibles :**
-            - Paiement trop rapide (< 10 secondes depuis le dernier)
-            - Score de cohérence trop faible (< 0.6)
-            """)
+            st.markdown(f"**Raison :** {decision.describe()}")
             
             # Stocker dans l'historique
-            if "history" not in st.session_state:
-                st.session_state.history = []
             st.session_state.history.append({
                 "time": time.strftime("%H:%M:%S"),
                 "amount": amount,
@@ -112,6 +112,7 @@ with tab1:
                 "coherence": coherence,
                 "decision": "BLOCK"
             })
+            st.session_state.stats.record("BLOCK", amount)
 
 # ===== TAB 2 : TESTS AUTOMATIQUES =====
 with tab2:
@@ -193,8 +194,9 @@ with tab2:
 with tab3:
     st.markdown("### Historique des transactions")
     
-    if "history" in st.session_state and len(st.session_state.history) > 0:
-        st.markdown(f"**Total : {len(st.session_state.history)} transactions**")
+    stats = st.session_state.stats
+    if stats.total > 0:
+        st.markdown(f"**Total : {stats.total} transactions**")
         
         # Afficher sous forme de tableau
         import pandas as pd
@@ -208,19 +210,16 @@ with tab3:
         # Statistiques
         col1, col2, col3 = st.columns(3)
         
-        allow_count = sum(1 for h in st.session_state.history if h['decision'] == "ALLOW")
-        block_count = len(st.session_state.history) - allow_count
-        
         with col1:
-            st.metric("✅ Autorisés", allow_count)
+            st.metric("✅ Autorisés", stats.allowed)
         with col2:
-            st.metric("❌ Bloqués", block_count)
+            st.metric("❌ Bloqués", stats.blocked)
         with col3:
-            success_rate = (allow_count / len(st.session_state.history) * 100) if len(st.session_state.history) > 0 else 0
-            st.metric("📊 Taux d'autorisation", f"{success_rate:.1f}%")
+            st.metric("📊 Taux d'autorisation", f"{stats.allow_rate:.1f}%")
         
         if st.button("🗑️ Effacer l'historique"):
             st.session_state.history = []
+            stats.reset()
             st.rerun()
     else:
         st.info("Aucune transaction pour le moment. Testez un paiement dans l'onglet 'Mode Interactif' !")
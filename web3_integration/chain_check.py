@@ -0,0 +1,349 @@
+"""
+Vérification sur chaîne locale de la couche Web3
+================================================
+
+Rejoue la couche token contre une EVM locale (eth-tester + py-evm), avec un
+provider qui peut ajouter de la latence aux appels RPC :
+
+- governance : le cache des paramètres sert une valeur périmée sans
+  attendre le rafraîchissement en cours (RPC lent), puis suit un
+  ProposalExecuted émis on-chain
+- fees : FeeRecorder face à des envois perdus, des timeouts après
+  réception, des rejets du nœud (gas price sous le base fee, gas
+  insuffisant), un nonce pris par une autre transaction et un échec avant
+  signature ; chaque lot doit être enregistré exactement une fois
+- indexer : les lectures de X108Indexer restent immédiates pendant une
+  synchronisation aux `eth_getLogs` lents, et les totaux de frais
+  correspondent aux FeeCollected émis
+
+Le contrat déployé est un stand-in minimal de X108Token (quelques octets
+d'EVM assemblés ici, sans solc) : `getSafetyParameters()` renvoie deux
+emplacements de stockage, `setSafetyParameters(uint256,uint256)` les écrit
+et émet `ProposalExecuted`, `collectFee(uint256)` émet `FeeCollected` avec
+le montant reçu (le vrai contrat émet le frais calculé).
+
+Usage :
+    pip install "eth-tester[py-evm]"
+    python web3_integration/chain_check.py
+    python web3_integration/chain_check.py fees
+    python web3_integration/chain_check.py governance --latency 2.0
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from eth_account import Account
+from web3 import Web3
+from web3.providers.eth_tester import EthereumTesterProvider
+
+from web3_integration.fee_recorder import FeeRecorder
+from web3_integration.x108_indexer import X108Indexer
+from web3_integration.x108_token_layer import GovernanceParamsCache, X108TokenEconomics
+
+STUB_ABI = [
+    {"inputs": [], "name": "getSafetyParameters", "outputs": [{"type": "uint256"}, {"type": "uint256"}],
+     "stateMutability": "view", "type": "function"},
+    {"inputs": [{"name": "temporalWindow", "type": "uint256"}, {"name": "coherenceThreshold", "type": "uint256"}],
+     "name": "setSafetyParameters", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
+    {"inputs": [{"name": "_transactionAmount", "type": "uint256"}], "name": "collectFee",
+     "outputs": [{"name": "fee", "type": "uint256"}], "stateMutability": "nonpayable", "type": "function"},
+    {"anonymous": False, "inputs": [{"indexed": False, "name": "amount", "type": "uint256"}],
+     "name": "FeeCollected", "type": "event"},
+]
+
+_OPCODES = {
+    "STOP": 0x00, "ADD": 0x01, "EQ": 0x14, "CALLDATALOAD": 0x35, "CALLDATASIZE": 0x36,
+    "CODECOPY": 0x39, "MSTORE": 0x52, "SLOAD": 0x54, "SSTORE": 0x55, "JUMPI": 0x57,
+    "JUMPDEST": 0x5b, "DUP1": 0x80, "LOG1": 0xa1, "LOG2": 0xa2, "RETURN": 0xf3,
+}
+
+
+def _assemble(program) -> bytes:
+    """
+    Assemble une liste d'opcodes : nom, entier (PUSH de la taille minimale),
+    ":label" (JUMPDEST) ou "@label" (PUSH1 de son adresse).
+    """
+    def size(item):
+        if isinstance(item, int):
+            return 1 + max(1, (item.bit_length() + 7) // 8)
+        return 2 if item.startswith("@") else 1
+
+    labels, offset = {}, 0
+    for item in program:
+        if isinstance(item, str) and item.startswith(":"):
+            labels[item[1:]] = offset
+        offset += size(item)
+    code = bytearray()
+    for item in program:
+        if isinstance(item, int):
+            width = size(item) - 1
+            code += bytes([0x5f + width]) + item.to_bytes(width, "big")
+        elif item.startswith("@"):
+            code += bytes([0x60, labels[item[1:]]])
+        elif item.startswith(":"):
+            code.append(_OPCODES["JUMPDEST"])
+        else:
+            code.append(_OPCODES[item])
+    return bytes(code)
+
+
+def stub_bytecode() -> bytes:
+    """Code de déploiement du stand-in X108Token (dispatch sur la taille des calldata)."""
+    proposal_executed = int.from_bytes(Web3.keccak(text="ProposalExecuted(uint256)"), "big")
+    fee_collected = int.from_bytes(Web3.keccak(text="FeeCollected(uint256)"), "big")
+    runtime = _assemble([
+        "CALLDATASIZE", 4, "EQ", "@get", "JUMPI",
+        "CALLDATASIZE", 36, "EQ", "@fee", "JUMPI",
+        # setSafetyParameters(window, threshold) : slots 0 et 1, proposalId = ++slot 2
+        4, "CALLDATALOAD", 0, "SSTORE",
+        36, "CALLDATALOAD", 1, "SSTORE",
+        2, "SLOAD", 1, "ADD", "DUP1", 2, "SSTORE",
+        proposal_executed, 0, 0, "LOG2", "STOP",
+        # getSafetyParameters() -> (slot 0, slot 1)
+        ":get", 0, "SLOAD", 0, "MSTORE", 1, "SLOAD", 32, "MSTORE", 64, 0, "RETURN",
+        # collectFee(amount) -> FeeCollected(amount)
+        ":fee", 4, "CALLDATALOAD", 0, "MSTORE", fee_collected, 32, 0, "LOG1", "STOP",
+    ])
+    constructor = _assemble([len(runtime), "DUP1", 11, 0, "CODECOPY", 0, "RETURN"])
+    return constructor + runtime
+
+
+class LocalProvider(EthereumTesterProvider):
+    """
+    Provider eth-tester avec pannes injectées :
+
+    - `latency[method]` : secondes ajoutées à chaque appel de `method`
+    - `faults[method]` : "lost" (la requête n'atteint pas le nœud) ou
+      "timeout" (le nœud la traite, la réponse est perdue), pour le
+      prochain appel de `method`
+    - `gas_price` : valeur renvoyée par `eth_gasPrice` (None : celle du nœud)
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.latency = {}
+        self.faults = {}
+        self.gas_price = None
+
+    def make_request(self, method, params):
+        if method in self.latency:
+            time.sleep(self.latency[method])
+        fault = self.faults.pop(method, None)
+        if fault == "lost":
+            raise ConnectionError(f"{method}: connection reset (injected)")
+        response = super().make_request(method, params)
+        if fault == "timeout":
+            raise TimeoutError(f"{method}: read timeout (injected)")
+        if method == "eth_gasPrice" and self.gas_price is not None:
+            response = {**response, "result": hex(self.gas_price)}
+        return response
+
+
+def deploy_stub(w3):
+    tx_hash = w3.eth.send_transaction({"from": w3.eth.accounts[0], "data": stub_bytecode()})
+    address = w3.eth.wait_for_transaction_receipt(tx_hash)["contractAddress"]
+    return w3.eth.contract(address=address, abi=STUB_ABI)
+
+
+def set_params(w3, stub, window, threshold):
+    tx_hash = stub.functions.setSafetyParameters(window, threshold).transact({"from": w3.eth.accounts[0]})
+    w3.eth.wait_for_transaction_receipt(tx_hash)
+
+
+def wait_for(predicate, timeout):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def check_governance(latency: float) -> list:
+    """
+    Returns:
+        Liste des échecs (vide si tout est conforme)
+    """
+    provider = LocalProvider()
+    w3 = Web3(provider)
+    stub = deploy_stub(w3)
+    set_params(w3, stub, 10, 60)
+
+    economics = X108TokenEconomics(contract_address=stub.address, w3=w3)
+    economics.governance_cache.close()
+    ttl = 0.2
+    cache = economics.governance_cache = GovernanceParamsCache(
+        economics._fetch_governance_params, ttl=ttl, stale_ttl=60,
+        poll_events=economics._poll_proposal_executed, poll_interval=0.05)
+    failures = []
+
+    params = economics.get_governance_params()
+    if (params['temporal_window'], params['coherence_threshold']) != (10, 0.6):
+        failures.append(f"first read returned {params}")
+
+    # Valeur périmée pendant un rafraîchissement lent : servie sans attendre
+    time.sleep(ttl * 1.5)
+    provider.latency["eth_call"] = latency
+    worst = 0.0
+    refreshed_at = cache._fetched_at
+    for _ in range(10):
+        started = time.perf_counter()
+        economics.get_governance_params()
+        worst = max(worst, time.perf_counter() - started)
+        time.sleep(latency / 10)
+    print(f"  stale get() during a {latency:.1f} s refresh: worst {worst * 1000:.1f} ms")
+    if worst > latency / 4:
+        failures.append(f"stale get() waited {worst:.2f} s for the background refresh")
+    if not wait_for(lambda: cache._fetched_at != refreshed_at, latency * 3):
+        failures.append("background refresh never completed")
+    provider.latency.clear()
+
+    # ProposalExecuted : pris en compte sans attendre le TTL
+    cache.ttl = 3600
+    set_params(w3, stub, 30, 75)
+    if not wait_for(lambda: economics.get_governance_params()['temporal_window'] == 30, 5):
+        failures.append("ProposalExecuted did not refresh the cached params")
+    else:
+        params = economics.get_governance_params()
+        print(f"  after ProposalExecuted: {params['temporal_window']} s, {params['coherence_threshold']}")
+        if params['coherence_threshold'] != 0.75:
+            failures.append(f"unexpected params after ProposalExecuted: {params}")
+    cache.close()
+    return failures
+
+
+def check_fees() -> list:
+    """
+    Returns:
+        Liste des échecs (vide si tout est conforme)
+    """
+    provider = LocalProvider()
+    w3 = Web3(provider)
+    stub = deploy_stub(w3)
+    signer = Account.create()
+    w3.eth.wait_for_transaction_receipt(w3.eth.send_transaction(
+        {"from": w3.eth.accounts[0], "to": signer.address, "value": 10 ** 19}))
+    recorder = FeeRecorder(w3, stub, signer.key.hex(), replace_after=3600)
+    batches = []
+
+    def submit(amount, label, flushes=2):
+        recorder.record(amount, 1)
+        batches.append(amount)
+        for _ in range(flushes):
+            recorder.flush()
+        print(f"  {label:<34} {len(recorder.pending()['unconfirmed_transactions'])} unconfirmed")
+
+    submit(1_000_000, "sent")
+    provider.faults["eth_sendRawTransaction"] = "timeout"
+    submit(2_000_000, "timeout after the node got it")
+    provider.faults["eth_sendRawTransaction"] = "lost"
+    submit(3_000_000, "lost before the node")
+    provider.gas_price = 1
+    recorder.record(4_000_000, 1)
+    batches.append(4_000_000)
+    recorder.flush()
+    provider.gas_price = None
+    recorder.flush()
+    print(f"  {'rejected: below the base fee':<34} {len(recorder.pending()['unconfirmed_transactions'])} unconfirmed")
+    recorder.gas = 21_000
+    submit(5_000_000, "rejected: gas too low")
+    recorder.gas = 100_000
+    provider.faults["eth_gasPrice"] = "lost"
+    submit(6_000_000, "failure before signing")
+
+    # Nonce pris par une autre transaction du compte : le lot est remis en attente
+    provider.faults["eth_sendRawTransaction"] = "lost"
+    recorder.record(7_000_000, 1)
+    batches.append(7_000_000)
+    recorder.flush()
+    nonce = w3.eth.get_transaction_count(signer.address, "latest")
+    other = signer.sign_transaction({"to": w3.eth.accounts[0], "value": 1, "gas": 21_000, "nonce": nonce,
+                                     "gasPrice": w3.eth.gas_price, "chainId": w3.eth.chain_id})
+    w3.eth.send_raw_transaction(getattr(other, "raw_transaction", None) or other.rawTransaction)
+    for _ in range(3):
+        recorder.flush()
+    print(f"  {'nonce taken by another transaction':<34} {len(recorder.pending()['unconfirmed_transactions'])} unconfirmed")
+
+    logged = sorted(log["args"]["amount"] for log in stub.events.FeeCollected.get_logs(from_block=0))
+    pending = recorder.pending()
+    print(f"  recorded on-chain {sum(logged) / 1e6:.2f} USDC in {len(logged)} collectFee, stats {recorder.stats}")
+    failures = []
+    if logged != sorted(batches):
+        failures.append(f"collectFee amounts on-chain {logged}, expected each of {sorted(batches)} once")
+    if pending['count'] or pending['unconfirmed_transactions']:
+        failures.append(f"batches left behind: {pending}")
+    if recorder.stats['amount_recorded_micro'] != sum(batches):
+        failures.append(f"stats count {recorder.stats['amount_recorded_micro']} micro-USDC, expected {sum(batches)}")
+    return failures
+
+
+def check_indexer(latency: float) -> list:
+    """
+    Returns:
+        Liste des échecs (vide si tout est conforme)
+    """
+    provider = LocalProvider()
+    w3 = Web3(provider)
+    stub = deploy_stub(w3)
+    amounts = [1_000 * (i + 1) for i in range(8)]
+    for amount in amounts:
+        w3.eth.wait_for_transaction_receipt(stub.functions.collectFee(amount).transact({"from": w3.eth.accounts[0]}))
+
+    indexer = X108Indexer(w3, stub.address, db_path=":memory:", batch_blocks=1)
+    provider.latency["eth_getLogs"] = latency / 10
+    sync = threading.Thread(target=indexer.sync)
+    sync.start()
+    worst, reads = 0.0, 0
+    while sync.is_alive():
+        started = time.perf_counter()
+        indexer.fee_totals()
+        indexer.indexed_block()
+        worst = max(worst, time.perf_counter() - started)
+        reads += 1
+        time.sleep(0.01)
+    sync.join()
+    totals = indexer.fee_totals()
+    print(f"  {reads} reads during a sync of {indexer.indexed_block() + 1} blocks "
+          f"({latency / 10 * 1000:.0f} ms per eth_getLogs): worst {worst * 1000:.1f} ms")
+    print(f"  fee totals {totals}")
+    indexer.close()
+
+    failures = []
+    if worst > latency / 20:
+        failures.append(f"a read waited {worst:.2f} s for the sync")
+    if totals != {'total': sum(amounts), 'count': len(amounts)}:
+        failures.append(f"fee totals {totals}, expected {sum(amounts)} over {len(amounts)} events")
+    return failures
+
+
+CHECKS = {
+    "governance": lambda args: check_governance(args.latency),
+    "fees": lambda args: check_fees(),
+    "indexer": lambda args: check_indexer(args.latency),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="X-108 Web3 layer checks against a local EVM (eth-tester)")
+    parser.add_argument("checks", nargs="*", help=f"checks to run (default: all of {', '.join(CHECKS)})")
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds added to slow RPC requests (eth_call, eth_getLogs / 10)")
+    args = parser.parse_args(argv)
+    unknown = set(args.checks) - set(CHECKS)
+    if unknown:
+        parser.error(f"unknown checks {sorted(unknown)}, expected some of {list(CHECKS)}")
+
+    failed = 0
+    for name in args.checks or CHECKS:
+        print(f"{name}")
+        failures = CHECKS[name](args)
+        for failure in failures:
+            print(f"  FAILED: {failure}")
+        failed += bool(failures)
+    print("OK" if not failed else f"FAILED: {failed} check(s)")
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
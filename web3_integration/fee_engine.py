@@ -0,0 +1,132 @@
+"""
+X-108 Fee Engine
+================
+
+Calcul des frais en entiers (micro-USDC, 6 décimales) avec exactement
+l'arithmétique du contrat : `fee = amount * TRANSACTION_FEE_BPS / 10000`
+(division entière), puis répartition 50 / 30 / 20. Le buyback reçoit le
+reste de la division, de sorte que stakers + treasury + buyback == fee :
+aucune dérive d'arrondi, quel que soit le nombre de paiements.
+
+`settle_bulk` applique le même calcul à des millions de paiements en un
+seul appel NumPy.
+"""
+
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Dict, Tuple
+
+USDC_DECIMALS = 6
+MICRO_USDC = 10 ** USDC_DECIMALS
+
+# Constantes de contracts/X108Token.sol
+TRANSACTION_FEE_BPS = 10  # 0.1%
+BPS_DENOMINATOR = 10000
+
+# Répartition des frais (points de base du montant des frais)
+STAKERS_BPS = 5000   # 50%
+TREASURY_BPS = 3000  # 30%
+# Buyback : le reste (20%)
+
+
+def to_micro(amount) -> int:
+    """
+    Convertit un montant USDC (int, float, str, Decimal) en micro-USDC.
+    """
+    if isinstance(amount, int):
+        return amount * MICRO_USDC
+    micro = (Decimal(str(amount)) * MICRO_USDC).quantize(Decimal(1), rounding=ROUND_HALF_EVEN)
+    return int(micro)
+
+
+def from_micro(micro: int) -> float:
+    """
+    Convertit des micro-USDC en USDC (pour l'affichage).
+    """
+    return micro / MICRO_USDC
+
+
+def compute_fee(amount_micro: int) -> int:
+    """
+    Frais en micro-USDC, identiques à `collectFee` du contrat.
+    """
+    return amount_micro * TRANSACTION_FEE_BPS // BPS_DENOMINATOR
+
+
+def split_fee(fee_micro: int) -> Tuple[int, int, int]:
+    """
+    Returns:
+        (stakers, treasury, buyback) en micro-USDC, de somme égale à `fee_micro`
+    """
+    stakers = fee_micro * STAKERS_BPS // BPS_DENOMINATOR
+    treasury = fee_micro * TREASURY_BPS // BPS_DENOMINATOR
+    return stakers, treasury, fee_micro - stakers - treasury
+
+
+def settle(amount_micro: int) -> Tuple[int, int, int, int, int]:
+    """
+    Returns:
+        (net, fee, stakers, treasury, buyback) en micro-USDC
+    """
+    fee = compute_fee(amount_micro)
+    return (amount_micro - fee, fee) + split_fee(fee)
+
+
+def settle_bulk(amounts_micro) -> Dict:
+    """
+    Règle les frais d'un lot de paiements en une passe vectorisée.
+
+    Args:
+        amounts_micro: Montants en micro-USDC (séquence ou tableau d'entiers)
+
+    Returns:
+        Dict de tableaux int64 (net, fee, stakers, treasury, buyback) et
+        'totals' : sommes exactes par poste (entiers Python)
+    """
+    import numpy as np
+
+    amounts = np.asarray(amounts_micro)
+    if amounts.dtype.kind not in 'iu':
+        raise TypeError('settle_bulk expects integer micro-USDC amounts, see to_micro_array()')
+    amounts = amounts.astype(np.int64, copy=False)
+    # amount * 10 doit tenir sur 63 bits
+    if amounts.size and (amounts.min() < 0 or amounts.max() > np.iinfo(np.int64).max // TRANSACTION_FEE_BPS):
+        raise ValueError('amounts out of range for int64 fee arithmetic')
+
+    fee = amounts * TRANSACTION_FEE_BPS // BPS_DENOMINATOR
+    stakers = fee * STAKERS_BPS // BPS_DENOMINATOR
+    treasury = fee * TREASURY_BPS // BPS_DENOMINATOR
+    result = {
+        'net': amounts - fee,
+        'fee': fee,
+        'stakers': stakers,
+        'treasury': treasury,
+        'buyback': fee - stakers - treasury
+    }
+    result['totals'] = {name: _exact_sum(values) for name, values in result.items()}
+    return result
+
+
+def _exact_sum(values) -> int:
+    """
+    Somme exacte d'un tableau int64 positif, par blocs qui ne peuvent pas déborder.
+    """
+    import numpy as np
+
+    if values.size == 0:
+        return 0
+    largest = int(values.max())
+    limit = np.iinfo(np.int64).max
+    if largest * values.size <= limit:
+        return int(values.sum())
+    chunk = max(1, limit // max(largest, 1))
+    return sum(int(values[i:i + chunk].sum()) for i in range(0, values.size, chunk))
+
+
+def to_micro_array(amounts):
+    """
+    Convertit un tableau de montants USDC (flottants) en micro-USDC int64,
+    arrondi au micro-USDC le plus proche.
+    """
+    import numpy as np
+
+    return np.rint(np.asarray(amounts, dtype=np.float64) * MICRO_USDC).astype(np.int64)
@@ -0,0 +1,352 @@
+"""
+X-108 On-Chain Fee Recorder
+===========================
+
+Enregistre les frais on-chain sans une transaction par paiement :
+
+- Les montants des paiements validés sont cumulés en mémoire (micro-USDC)
+- Un thread de fond soumet périodiquement un `collectFee(total)` agrégé
+- Les transactions sont signées localement (clé privée, eth_account)
+- Les nonces sont gérés en local : un seul `getTransactionCount` au
+  démarrage, puis incrément local
+- Chaque lot soumis garde son nonce jusqu'à ce que le nœud le voie miné
+  (un `getTransactionCount('latest')` par flush tant qu'un lot est en
+  cours). Un lot dont l'envoi a échoué est rediffusé tel quel ; rejeté
+  (gas price trop bas, gas insuffisant) ou bloqué trop longtemps, il est
+  re-signé au même nonce avec un gas price relevé. Une seule version par
+  nonce peut être minée : le frais ne peut pas être enregistré deux fois.
+- Si le nonce est consommé sans qu'une version du lot soit minée (autre
+  transaction du compte, ou collectFee annulé), le lot est remis en attente
+
+Le contrat applique `TRANSACTION_FEE_BPS` au montant agrégé : arrondi une
+fois par lot, le frais enregistré est supérieur ou égal à la somme des frais
+arrondis paiement par paiement.
+"""
+
+from typing import Optional
+import math
+import threading
+import time
+
+from eth_account import Account
+from web3.exceptions import TransactionNotFound
+
+# Relèvement minimal du gas price pour remplacer une transaction en attente (geth : +10 %)
+GAS_PRICE_BUMP = 1.125
+
+
+class NonceManager:
+    """
+    Distribue les nonces d'un compte sans aller-retour RPC par transaction.
+    """
+
+    def __init__(self, w3, address: str):
+        self.w3 = w3
+        self.address = address
+        self._next = None
+        self._minimum = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._next = max(self.w3.eth.get_transaction_count(self.address, 'pending'), self._minimum)
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def resync(self, minimum: int = 0):
+        """
+        Oublie le nonce local ; le prochain sera relu depuis le nœud, sans
+        redescendre sous `minimum` (nonces déjà attribués à des lots en cours,
+        que le nœud peut ne pas avoir vus).
+        """
+        with self._lock:
+            self._next = None
+            self._minimum = minimum
+
+
+class _Submission:
+    """Un lot soumis : son nonce, et chaque version signée envoyée à ce nonce."""
+
+    __slots__ = ('nonce', 'amount', 'count', 'hashes', 'raw', 'gas_price', 'gas', 'accepted', 'sent_at')
+
+    def __init__(self, nonce: int, amount: int, count: int):
+        self.nonce = nonce
+        self.amount = amount
+        self.count = count
+        self.hashes = []        # toutes les versions signées ; au plus une sera minée
+        self.raw = None         # dernière version signée
+        self.gas_price = 0
+        self.gas = 0
+        self.accepted = False   # le nœud a accepté (ou connaît) la dernière version
+        self.sent_at = 0.0
+
+
+class FeeRecorder:
+    """
+    Cumule les paiements validés et les enregistre par lots via `collectFee`.
+    """
+
+    def __init__(self, w3, contract, private_key: str, flush_interval: float = 60.0,
+                 max_pending_micro: Optional[int] = None, gas: int = 100_000,
+                 replace_after: Optional[float] = None):
+        """
+        Args:
+            w3: Instance Web3 connectée
+            contract: Contrat X108Token (ABI avec collectFee)
+            private_key: Clé privée du backend autorisé à appeler collectFee
+            flush_interval: Période de soumission des lots (secondes)
+            max_pending_micro: Soumission anticipée au-delà de ce montant cumulé
+            gas: Limite de gas d'une transaction collectFee
+            replace_after: Délai avant de re-signer plus cher un lot accepté mais
+                toujours pas miné (secondes, 3 × flush_interval par défaut)
+        """
+        self.w3 = w3
+        self.contract = contract
+        self.account = Account.from_key(private_key)
+        self.nonces = NonceManager(w3, self.account.address)
+        self.flush_interval = flush_interval
+        self.max_pending_micro = max_pending_micro
+        self.gas = gas
+        self.replace_after = 3 * flush_interval if replace_after is None else replace_after
+        self._chain_id = None
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending_micro = 0
+        self._pending_count = 0
+        self._outstanding = {}  # nonce -> _Submission, jusqu'à ce que le nonce soit miné
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._worker = None
+        self.stats = {
+            'transactions_sent': 0,
+            'replacements': 0,
+            'payments_recorded': 0,
+            'amount_recorded_micro': 0,
+            'requeued': 0,
+            'errors': 0
+        }
+
+    def record(self, amount_micro: int, count: int = 1):
+        """
+        Ajoute des paiements validés (montant cumulé) au lot courant, sans appel réseau.
+        """
+        with self._lock:
+            self._pending_micro += amount_micro
+            self._pending_count += count
+            over_threshold = self.max_pending_micro is not None and self._pending_micro >= self.max_pending_micro
+        if over_threshold:
+            self._wake.set()
+
+    def pending(self) -> dict:
+        """
+        Returns:
+            Dict avec le lot courant (amount_micro, count) et les hashes des
+            lots soumis dont le nonce n'est pas encore miné
+        """
+        with self._lock:
+            pending = {'amount_micro': self._pending_micro, 'count': self._pending_count}
+        pending['unconfirmed_transactions'] = [sub.hashes[-1] for sub in list(self._outstanding.values())
+                                               if sub.hashes]
+        return pending
+
+    def flush(self) -> Optional[str]:
+        """
+        Fait avancer les lots déjà soumis (minés, rediffusés ou re-signés),
+        puis soumet le lot courant en une transaction collectFee signée.
+
+        Returns:
+            Hash de la transaction (suivie jusqu'à ce que son nonce soit miné),
+            ou None si rien n'était en attente ou si aucun nonce n'a pu être pris
+        """
+        with self._flush_lock:
+            self._reconcile()
+            with self._lock:
+                amount, count = self._pending_micro, self._pending_count
+                self._pending_micro = self._pending_count = 0
+            if count == 0:
+                return None
+
+            try:
+                gas_price = self._gas_price()
+                nonce = self.nonces.next()
+            except Exception as e:
+                # Aucun nonce pris : le lot est remis en attente
+                self._requeue(amount, count)
+                self.stats['errors'] += 1
+                print(f"Warning: Could not record fee on-chain: {e}")
+                return None
+
+            submission = self._outstanding[nonce] = _Submission(nonce, amount, count)
+            return self._broadcast(submission, gas_price, self.gas)
+
+    def start(self):
+        """
+        Démarre la soumission périodique en arrière-plan.
+        """
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='x108-fee-recorder', daemon=True)
+            self._worker.start()
+
+    def close(self) -> Optional[str]:
+        """
+        Arrête le thread de fond et soumet le dernier lot (les transactions
+        pas encore minées restent listées par pending()).
+        """
+        self._closed.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join()
+        return self.flush()
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if not self._closed.is_set():
+                self.flush()
+
+    def _requeue(self, amount: int, count: int):
+        with self._lock:
+            self._pending_micro += amount
+            self._pending_count += count
+
+    def _reconcile(self):
+        """
+        Solde les lots dont le nonce est miné, rediffuse ou re-signe les autres.
+        """
+        if not self._outstanding:
+            return
+        try:
+            mined = self.w3.eth.get_transaction_count(self.account.address, 'latest')
+        except Exception as e:
+            print(f"Warning: Could not check collectFee transactions: {e}")
+            return
+
+        for nonce in sorted(self._outstanding):
+            submission = self._outstanding[nonce]
+            if nonce < mined:
+                landed = self._landed(submission)
+                if landed is None:
+                    continue  # reçu illisible : on réessaie au prochain flush
+                del self._outstanding[nonce]
+                if landed:
+                    self.stats['payments_recorded'] += submission.count
+                    self.stats['amount_recorded_micro'] += submission.amount
+                else:
+                    # Nonce pris par une autre transaction du compte, ou collectFee annulé
+                    self._requeue(submission.amount, submission.count)
+                    self.nonces.resync(max(self._outstanding, default=mined - 1) + 1)
+                    self.stats['requeued'] += submission.count
+                    print(f"Warning: collectFee at nonce {nonce} was not recorded, batch re-queued")
+                continue
+
+            if not submission.accepted and submission.raw is not None:
+                # Envoi incertain : même transaction, même hash
+                submission.accepted = self._send(submission.raw, submission.hashes[-1])
+                if submission.accepted:
+                    self.stats['transactions_sent'] += 1
+                    continue
+            elif submission.accepted and time.monotonic() - submission.sent_at < self.replace_after:
+                continue
+            self._replace(submission)
+
+    def _replace(self, submission: _Submission):
+        """Re-signe le lot au même nonce, gas price relevé (et gas ré-estimé)."""
+        try:
+            gas_price = max(self._gas_price(), math.ceil(submission.gas_price * GAS_PRICE_BUMP))
+        except Exception as e:
+            print(f"Warning: Could not re-sign collectFee at nonce {submission.nonce}: {e}")
+            return
+        gas = max(submission.gas, self.gas)
+        try:
+            estimate = self.w3.eth.estimate_gas({'from': self.account.address, 'to': self.contract.address,
+                                                 'data': self._collect_fee_data(submission.amount)})
+            gas = max(gas, math.ceil(estimate * 1.2))
+        except Exception:
+            pass
+        if submission.hashes:
+            self.stats['replacements'] += 1
+        self._broadcast(submission, gas_price, gas)
+
+    def _broadcast(self, submission: _Submission, gas_price: int, gas: int) -> Optional[str]:
+        try:
+            tx_hash, raw = self._sign_collect_fee(submission.amount, submission.nonce, gas_price, gas)
+        except Exception as e:
+            # Le nonce reste réservé au lot : nouvelle signature au prochain flush
+            self.stats['errors'] += 1
+            print(f"Warning: Could not sign collectFee at nonce {submission.nonce}: {e}")
+            return None
+        submission.hashes.append(tx_hash)
+        submission.raw, submission.gas_price, submission.gas = raw, gas_price, gas
+        submission.sent_at = time.monotonic()
+        submission.accepted = self._send(raw, tx_hash)
+        if submission.accepted:
+            self.stats['transactions_sent'] += 1
+        return tx_hash
+
+    def _send(self, raw, tx_hash: str) -> bool:
+        """True si le nœud a accepté la transaction ou la connaît déjà."""
+        try:
+            self.w3.eth.send_raw_transaction(raw)
+            return True
+        except Exception as e:
+            if self._known(tx_hash):  # "already known", ou timeout après réception
+                return True
+            self.stats['errors'] += 1
+            print(f"Warning: collectFee {tx_hash} not accepted by the node, will retry: {e}")
+            return False
+
+    def _known(self, tx_hash: str) -> bool:
+        try:
+            self.w3.eth.get_transaction(tx_hash)
+            return True
+        except Exception:
+            return False
+
+    def _landed(self, submission: _Submission) -> Optional[bool]:
+        """
+        Returns:
+            True si une version du lot est minée avec succès, False si aucune
+            ne l'est (ou si collectFee a échoué), None si un reçu n'a pas pu être lu
+        """
+        for tx_hash in submission.hashes:
+            try:
+                receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+            except Exception:
+                return None
+            if receipt is not None:
+                return receipt['status'] == 1  # une seule version par nonce peut être minée
+        return False
+
+    def _gas_price(self) -> int:
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        return self.w3.eth.gas_price
+
+    def _collect_fee_data(self, amount_micro: int) -> str:
+        if hasattr(self.contract, 'encode_abi'):  # web3 >= 7
+            return self.contract.encode_abi('collectFee', args=[amount_micro])
+        return self.contract.encodeABI(fn_name='collectFee', args=[amount_micro])
+
+    def _sign_collect_fee(self, amount_micro: int, nonce: int, gas_price: int, gas: int):
+        """
+        Returns:
+            (hash, transaction brute signée) d'un collectFee(amount_micro)
+        """
+        transaction = {
+            'to': self.contract.address,
+            'data': self._collect_fee_data(amount_micro),
+            'value': 0,
+            'gas': gas,
+            'gasPrice': gas_price,
+            'nonce': nonce,
+            'chainId': self._chain_id
+        }
+        signed = self.account.sign_transaction(transaction)
+        raw = getattr(signed, 'raw_transaction', None) or signed.rawTransaction
+        return self.w3.to_hex(signed.hash), raw
@@ -11,6 +11,7 @@ Fonctionnalités :
 - Publication des résultats de transactions sur Moltbook
 - Création d'un feed public transparent
 - Statistiques d'utilisation du Safety Gate
+- Publication en arrière-plan, par lots (MoltbookOutbox), hors du chemin critique
 """
 
 import requests
@@ -18,19 +19,73 @@ from typing import Dict, Optional
 from datetime import datetime
 import os
 import json
+import time
+
+from demo import metrics
+from web3_integration.moltbook_outbox import MoltbookOutbox
+
+# Métriques de publication (enregistrées seulement si metrics.enabled)
+_POSTS = metrics.counter('x108_moltbook_posts_total', 'Moltbook posts by mode and result', ('mode', 'result'))
+_PUBLISH_SECONDS = metrics.histogram('x108_moltbook_publish_seconds', 'post_transaction_result latency')
+
+class PostRingBuffer:
+    """
+    Buffer circulaire de capacité fixe pour les posts du mode démo.
+    
+    Les posts les plus anciens sont écrasés (ajout en O(1)) ; les totaux
+    cumulés restent dans `MoltbookIntegration.demo_stats`.
+    """
+    
+    __slots__ = ('_items', '_capacity', '_head', '_size', 'total_appended')
+    
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError('capacity must be >= 1')
+        self._items = [None] * capacity
+        self._capacity = capacity
+        self._head = 0  # prochain emplacement écrit
+        self._size = 0
+        self.total_appended = 0
+    
+    def append(self, post: Dict):
+        if self._size < self._capacity:
+            self._size += 1
+        self._items[self._head] = post
+        self._head = (self._head + 1) % self._capacity
+        self.total_appended += 1
+    
+    def recent(self, limit: int) -> list:
+        """
+        Les `limit` posts les plus récents, du plus ancien au plus récent (O(limit)).
+        """
+        n = min(max(limit, 0), self._size)
+        start = self._head - n
+        return [self._items[(start + i) % self._capacity] for i in range(n)]
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __iter__(self):
+        return iter(self.recent(self._size))
+
 
 class MoltbookIntegration:
     """
     Gère l'intégration avec Moltbook pour la publication de transactions.
     """
     
-    def __init__(self, api_key: Optional[str] = None, api_url: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, api_url: Optional[str] = None,
+                 background: bool = False, spill_path: Optional[str] = None,
+                 max_demo_posts: int = 1000):
         """
         Initialize the Moltbook integration.
         
         Args:
             api_key: Moltbook API key
             api_url: Moltbook API endpoint
+            background: Publier via une outbox en arrière-plan (mode production)
+            spill_path: Fichier de débordement de l'outbox (JSONL)
+            max_demo_posts: Nombre de posts conservés en mémoire en mode démo
         """
         self.api_key = api_key or os.getenv('MOLTBOOK_API_KEY', '')
         self.api_url = api_url or os.getenv('MOLTBOOK_API_URL', 'https://api.moltbook.com')
@@ -38,8 +93,17 @@ class MoltbookIntegration:
         # Mode démo si pas de clé API
         self.demo_mode = not self.api_key
         
-        # Stats en mémoire pour le mode démo
-        self.demo_posts = []
+        # Outbox asynchrone : la publication n'ajoute plus de latence réseau au paiement
+        self.outbox = None
+        if background and not self.demo_mode:
+            self.outbox = MoltbookOutbox(
+                self.api_url,
+                self.api_key,
+                spill_path=spill_path or os.getenv('MOLTBOOK_SPILL_PATH')
+            )
+        
+        # Stats en mémoire pour le mode démo (mémoire bornée)
+        self.demo_posts = PostRingBuffer(max_demo_posts)
         self.demo_stats = {
             'total_posts': 0,
             'allowed_posts': 0,
@@ -58,10 +122,30 @@ class MoltbookIntegration:
                 - coherence: Score de cohérence (0.0 à 1.0)
                 - temporal_passed: Bool, si la contrainte temporelle est passée
                 - timestamp: Timestamp de la transaction
+                - decision: Decision renvoyée par guard_lite.evaluate (optionnel) ;
+                  fournit status, temporal_passed et reason
                 
         Returns:
             Dict avec url du post et status
         """
+        if not metrics.enabled:
+            return self._post_transaction_result(transaction)
+        started = time.perf_counter_ns()
+        result = self._post_transaction_result(transaction)
+        _PUBLISH_SECONDS.observe_ns(time.perf_counter_ns() - started)
+        _POSTS.inc(result.get('mode', 'unknown'), 'ok' if result.get('success') else 'error')
+        return result
+
+    def _post_transaction_result(self, transaction: Dict) -> Dict:
+        decision = transaction.get('decision')
+        if decision is not None:
+            transaction = {
+                **transaction,
+                'status': str(decision),
+                'temporal_passed': decision.temporal_passed,
+                'reason': decision.reason
+            }
+        
         # Préparer le payload
         payload = {
             'type': 'agent_payment_validation',
@@ -70,6 +154,7 @@ class MoltbookIntegration:
             'recipient': transaction.get('recipient', 'unknown'),
             'coherence_score': transaction.get('coherence', 0.0),
             'temporal_check': transaction.get('temporal_passed', False),
+            'reason': transaction.get('reason'),
             'timestamp': transaction.get('timestamp', datetime.now().isoformat()),
             'safety_gate': 'X-108',
             'tags': ['#AgenticCommerce', '#X108Safety', '#SafetyGate'],
@@ -78,7 +163,7 @@ class MoltbookIntegration:
         
         if self.demo_mode:
             # Mode démo : simuler la publication
-            post_id = len(self.demo_posts) + 1
+            post_id = self.demo_posts.total_appended + 1
             demo_url = f"https://moltbook.com/posts/{post_id}"
             
             self.demo_posts.append({
@@ -102,6 +187,18 @@ class MoltbookIntegration:
                 'message': 'Transaction posted to Moltbook (demo mode)'
             }
         
+        # Mode production, en arrière-plan : mise en file sans attendre le réseau
+        if self.outbox is not None:
+            queued = self.outbox.publish(payload)
+            return {
+                'success': queued,
+                'url': '',
+                'post_id': '',
+                'mode': 'production',
+                'queued': queued,
+                'message': 'Transaction queued for Moltbook' if queued else 'Moltbook outbox full, post dropped'
+            }
+        
         # Mode production : appeler l'API Moltbook
         try:
             response = requests.post(
@@ -172,6 +269,34 @@ class MoltbookIntegration:
         
         return message
     
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attend la publication des posts en file (mode arrière-plan).
+        
+        Returns:
+            True si tout est publié (ou s'il n'y a pas d'outbox)
+        """
+        return self.outbox.flush(timeout) if self.outbox is not None else True
+    
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Vide l'outbox et arrête sa publication en arrière-plan.
+        """
+        return self.outbox.close(timeout) if self.outbox is not None else True
+    
+    def is_healthy(self) -> bool:
+        """
+        Vérifie que l'outbox (si présente) publie toujours en arrière-plan.
+        """
+        return self.outbox is None or self.outbox.is_running()
+    
+    def get_outbox_metrics(self) -> Dict:
+        """
+        Returns:
+            Métriques de l'outbox (queue_depth, published, failed...), vide sans outbox
+        """
+        return self.outbox.metrics() if self.outbox is not None else {}
+    
     def get_feed_url(self) -> str:
         """
         Retourne l'URL du feed public X-108 sur Moltbook.
@@ -220,7 +345,7 @@ class MoltbookIntegration:
             Liste de posts
         """
         if self.demo_mode:
-            return self.demo_posts[-limit:]
+            return self.demo_posts.recent(limit)
         
         try:
             response = requests.get(
@@ -249,7 +374,17 @@ class MoltbookIntegration:
         Returns:
             String formaté pour affichage
         """
-        if post_result.get('success'):
+        if post_result.get('queued'):
+            return f"""
+📡 **Queued for Moltbook**
+
+**Mode:** {post_result['mode']}
+
+This transaction will be published to the agent internet in the background.
+
+View the public feed: {self.get_feed_url()}
+            """
+        elif post_result.get('success'):
             return f"""
 📡 **Posted to Moltbook**
 
@@ -282,11 +417,11 @@ The transaction was processed but not published to Moltbook.
 
 
 # Fonction utilitaire pour créer une instance
-def create_moltbook_integration() -> MoltbookIntegration:
+def create_moltbook_integration(background: bool = False) -> MoltbookIntegration:
     """
     Factory function pour créer une instance de MoltbookIntegration.
     """
-    return MoltbookIntegration()
+    return MoltbookIntegration(background=background)
 
 
 # Exemple d'utilisation
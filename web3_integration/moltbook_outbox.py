@@ -0,0 +1,303 @@
+"""
+Moltbook Outbox
+===============
+
+File de publication asynchrone pour Moltbook : les posts sont mis en file
+sans attendre le réseau et un thread de fond les publie par lots
+(`POST {api_url}/posts/batch`), avec retries et backoff exponentiel.
+
+- File bornée en mémoire ; au-delà, ou quand un lot épuise ses retries,
+  les posts débordent sur disque (JSONL). Ils sont republiés quand la file
+  est vide et ne quittent le fichier qu'une fois acceptés ; si l'endpoint
+  reste indisponible, la reprise attend un backoff croissant entre deux
+  tentatives
+- flush() / close() pour vider la file mémoire avant l'arrêt (les posts sur
+  disque sont persistés : ils seront republiés au prochain démarrage)
+- metrics() : profondeur de file, posts publiés / en échec / perdus
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+from demo import metrics
+from demo.arc_client import RETRY_STATUSES, backoff_delay
+
+_BATCH_SECONDS = metrics.histogram('x108_moltbook_batch_send_seconds',
+                                   'Outbox batch publication latency, retries included')
+
+
+class MoltbookOutbox:
+    """
+    Publie les posts Moltbook hors du chemin critique du Safety Gate.
+    """
+
+    def __init__(self, api_url: str, api_key: str, max_queue: int = 1000,
+                 batch_size: int = 50, linger: float = 0.2, timeout: float = 10,
+                 max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 spill_path: Optional[str] = None):
+        """
+        Initialize the outbox.
+
+        Args:
+            api_url: Moltbook API endpoint
+            api_key: Moltbook API key
+            max_queue: Nombre maximal de posts en mémoire
+            batch_size: Nombre maximal de posts par requête
+            linger: Attente maximale pour compléter un lot (secondes)
+            timeout: Timeout HTTP (secondes)
+            max_retries: Nouvelles tentatives par lot avant abandon (ou débordement disque)
+            backoff_base: Délai de base du backoff exponentiel (secondes)
+            backoff_max: Plafond du backoff (secondes)
+            spill_path: Fichier JSONL de débordement (None = posts perdus si la file est pleine)
+        """
+        self.batch_url = f"{api_url}/posts/batch"
+        self.batch_size = batch_size
+        self.linger = linger
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.spill_path = spill_path
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json'
+        })
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        self._spilled = self._count_spilled()
+        self._spill_failures = 0        # reprises du débordement échouées d'affilée
+        self._unspill_at = 0.0          # pas de reprise avant cet instant (monotonic)
+        self._idle = threading.Condition()
+        self._in_flight = 0
+        self._closed = threading.Event()
+        self._stats = {
+            'published': 0,
+            'failed': 0,
+            'dropped': 0,
+            'spilled': 0,
+            'batches': 0,
+            'retries': 0
+        }
+        self._worker = threading.Thread(target=self._run, name='moltbook-outbox', daemon=True)
+        self._worker.start()
+
+    def publish(self, payload: Dict) -> bool:
+        """
+        Met un post en file sans bloquer.
+
+        Returns:
+            True si le post est en file (mémoire ou disque), False s'il est perdu
+        """
+        if self._closed.is_set():
+            raise RuntimeError('MoltbookOutbox is closed')
+        try:
+            self._queue.put_nowait(payload)
+            return True
+        except queue.Full:
+            if self.spill_path:
+                self._spill([payload])
+                return True
+            self._stats['dropped'] += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attend que tous les posts de la file mémoire soient traités : publiés,
+        rejetés ou débordés sur disque (persistés, republiés plus tard).
+
+        Returns:
+            True si la file mémoire est vide, False si le timeout a expiré
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._queue.unfinished_tasks or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining if remaining is not None else 0.5)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Vide l'outbox puis arrête le thread de fond. Les posts encore en
+        mémoire après le timeout débordent sur disque (perdus sans spill_path).
+        """
+        flushed = self.flush(timeout)
+        self._closed.set()
+        self._worker.join(timeout)
+        remaining = []
+        while True:
+            try:
+                remaining.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        if remaining:
+            if self.spill_path:
+                self._spill(remaining)
+            else:
+                self._stats['dropped'] += len(remaining)
+        self.session.close()
+        return flushed
+
+    def is_running(self) -> bool:
+        """True tant que le thread de publication tourne."""
+        return self._worker.is_alive() and not self._closed.is_set()
+
+    def metrics(self) -> Dict:
+        """
+        Returns:
+            Dict avec queue_depth, spilled_pending, in_flight et les compteurs cumulés
+        """
+        return {
+            'queue_depth': self._queue.qsize(),
+            'spilled_pending': self._spilled,
+            'in_flight': self._in_flight,
+            **self._stats
+        }
+
+    # --- Thread de fond ---
+
+    def _run(self):
+        while not self._closed.is_set():
+            batch = self._next_batch()
+            if not batch:
+                self._notify_idle()
+                self._republish_spilled()
+                continue
+            try:
+                if not self._send(batch):
+                    if self.spill_path:
+                        self._spill(batch)
+                    else:
+                        self._stats['failed'] += len(batch)
+            finally:
+                with self._idle:
+                    self._in_flight -= len(batch)
+                    self._idle.notify_all()
+
+    def _republish_spilled(self):
+        """Republie le début du fichier de débordement, au plus un lot par appel."""
+        if not self._spilled or time.monotonic() < self._unspill_at:
+            return
+        batch = self._peek_spilled()
+        if not batch:
+            return
+        if self._send(batch):
+            self._drop_spilled(len(batch))
+            self._spill_failures = 0
+        else:
+            # Les posts restent sur disque ; prochaine reprise après un backoff croissant
+            self._unspill_at = time.monotonic() + min(self.backoff_max,
+                                                      self.backoff_base * 2 ** self._spill_failures)
+            self._spill_failures += 1
+
+    def _next_batch(self) -> List[Dict]:
+        try:
+            first = self._queue.get(timeout=self.linger)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        with self._idle:
+            self._in_flight += len(batch)
+            for _ in batch:
+                self._queue.task_done()
+        return batch
+
+    def _send(self, batch: List[Dict]) -> bool:
+        if not metrics.enabled:
+            return self._send_batch(batch)
+        started = time.perf_counter_ns()
+        done = self._send_batch(batch)
+        _BATCH_SECONDS.observe_ns(time.perf_counter_ns() - started)
+        return done
+
+    def _send_batch(self, batch: List[Dict]) -> bool:
+        """
+        Returns:
+            True si le lot est traité (publié ou rejeté définitivement),
+            False si les retries sont épuisés (à déborder ou compter en échec)
+        """
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = self.session.post(self.batch_url, json={'posts': batch}, timeout=self.timeout)
+                if response.status_code < 300:
+                    self._stats['published'] += len(batch)
+                    self._stats['batches'] += 1
+                    return True
+                if response.status_code not in RETRY_STATUSES:
+                    print(f"Warning: Moltbook rejected {len(batch)} posts: HTTP {response.status_code}")
+                    self._stats['failed'] += len(batch)
+                    return True
+                retry_after = response.headers.get('Retry-After')
+            except requests.RequestException:
+                pass
+
+            if attempt >= self.max_retries or self._closed.is_set():
+                return False
+            self._stats['retries'] += 1
+            self._closed.wait(backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after))
+            attempt += 1
+
+    def _notify_idle(self):
+        with self._idle:
+            self._idle.notify_all()
+
+    # --- Débordement disque ---
+
+    def _spill(self, posts: List[Dict]):
+        with self._spill_lock:
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                for post in posts:
+                    f.write(json.dumps(post) + '\n')
+            self._spilled += len(posts)
+            self._stats['spilled'] += len(posts)
+
+    def _peek_spilled(self) -> List[Dict]:
+        """Jusqu'à `batch_size` posts en tête du fichier de débordement (laissés en place)."""
+        with self._spill_lock:
+            try:
+                with open(self.spill_path, 'r', encoding='utf-8') as f:
+                    lines = [line for _, line in zip(range(self.batch_size), f)]
+            except FileNotFoundError:
+                self._spilled = 0
+                return []
+        return [json.loads(line) for line in lines]
+
+    def _drop_spilled(self, count: int):
+        """Retire du fichier les `count` premiers posts, une fois publiés."""
+        with self._spill_lock:
+            with open(self.spill_path, 'r', encoding='utf-8') as f:
+                rest = f.readlines()[count:]
+            tmp_path = f"{self.spill_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(rest)
+            os.replace(tmp_path, self.spill_path)
+            self._spilled = len(rest)
+
+    def _count_spilled(self) -> int:
+        if not self.spill_path:
+            return 0
+        try:
+            with open(self.spill_path, 'r', encoding='utf-8') as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
@@ -0,0 +1,113 @@
+"""
+Serveur Moltbook local (stub)
+==============================
+
+Remplaçant HTTP minimal de l'API Moltbook pour tester la publication :
+`POST /posts`, `POST /posts/batch` et `GET /stats/x108-safety-gate`.
+Une latence et des erreurs 503 peuvent être injectées.
+
+Usage :
+    python web3_integration/moltbook_stub_server.py --port 8788 --latency 2
+    MOLTBOOK_API_URL=http://127.0.0.1:8788 MOLTBOOK_API_KEY=test streamlit run streamlit_app.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MoltbookStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if server.latency:
+            time.sleep(server.latency)
+
+        with server.lock:
+            server.requests += 1
+            if server.fail_rate and server.rng.random() < server.fail_rate:
+                self._reply(503, {'error': 'injected failure'})
+                return
+            if self.path == '/posts/batch':
+                created = [server.create(post) for post in body.get('posts', [])]
+                self._reply(201, {'posts': created})
+            elif self.path == '/posts':
+                self._reply(201, server.create(body))
+            else:
+                self._reply(404, {'error': 'not found'})
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            if self.path.startswith('/stats/'):
+                allowed = sum(1 for p in server.posts if p.get('status') == 'ALLOW')
+                self._reply(200, {
+                    'total_posts': len(server.posts),
+                    'allowed_posts': allowed,
+                    'blocked_posts': len(server.posts) - allowed
+                })
+            else:
+                self._reply(404, {'error': 'not found'})
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MoltbookStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, fail_rate=0.0, seed=0):
+        super().__init__(address, MoltbookStubHandler)
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.posts = []
+        self.requests = 0
+
+    def create(self, post):
+        self.posts.append(post)
+        post_id = len(self.posts)
+        return {'id': post_id, 'url': f'{self.url}/posts/{post_id}'}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def start_stub_server(port=0, latency=0.0, fail_rate=0.0):
+    """Démarre le stub dans un thread démon et renvoie le serveur (voir `.url`)."""
+    server = MoltbookStubServer(('127.0.0.1', port), latency=latency, fail_rate=fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub local de l'API Moltbook")
+    parser.add_argument('--port', type=int, default=8788)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MoltbookStubServer(('127.0.0.1', args.port), latency=args.latency, fail_rate=args.fail_rate)
+    print(f"[Moltbook stub] listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
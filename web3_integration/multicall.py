@@ -0,0 +1,116 @@
+"""
+Multicall Read Aggregator
+=========================
+
+Regroupe plusieurs appels `view` en un seul `eth_call` via le contrat
+Multicall3 (déployé à la même adresse sur Base, Ethereum et la plupart des
+chaînes EVM). Un rafraîchissement du dashboard coûte ainsi un aller-retour
+RPC au lieu d'un par fonction.
+
+Si Multicall3 n'est pas déployé (ex. chaîne de dev locale), les appels
+sont faits un par un, avec le même résultat. Un échec passager (erreur RPC,
+sous-appel en échec) ne concerne que le lot en cours : Multicall3 n'est
+écarté que si aucun code n'est déployé à son adresse.
+"""
+
+from typing import List, Optional
+import os
+
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [{
+            "components": [
+                {"name": "target", "type": "address"},
+                {"name": "allowFailure", "type": "bool"},
+                {"name": "callData", "type": "bytes"}
+            ],
+            "name": "calls",
+            "type": "tuple[]"
+        }],
+        "name": "aggregate3",
+        "outputs": [{
+            "components": [
+                {"name": "success", "type": "bool"},
+                {"name": "returnData", "type": "bytes"}
+            ],
+            "name": "returnData",
+            "type": "tuple[]"
+        }],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+
+class MulticallReader:
+    """
+    Exécute un lot d'appels de contrat `view` en un seul aller-retour.
+    """
+
+    def __init__(self, w3, multicall_address: Optional[str] = None):
+        """
+        Args:
+            w3: Instance Web3 connectée
+            multicall_address: Adresse Multicall3 (défaut : adresse canonique ou X108_MULTICALL_ADDRESS)
+        """
+        self.w3 = w3
+        address = multicall_address or os.getenv('X108_MULTICALL_ADDRESS', MULTICALL3_ADDRESS)
+        self.multicall = w3.eth.contract(address=w3.to_checksum_address(address), abi=MULTICALL3_ABI)
+        self.available = True  # passe à False si Multicall3 n'est pas déployé
+        self._contracts = {}   # adresse -> contrat, pour encoder les sous-appels
+
+    def read(self, calls: List) -> List[tuple]:
+        """
+        Args:
+            calls: Appels préparés, ex. [contract.functions.totalStaked(), ...]
+
+        Returns:
+            Liste des sorties décodées (tuples), dans l'ordre de `calls`
+        """
+        if self.available and len(calls) > 1:
+            try:
+                return self._read_aggregated(calls)
+            except Exception as e:
+                if self._is_missing():
+                    print(f"Warning: no Multicall3 contract at {self.multicall.address}, using sequential calls")
+                    self.available = False
+                else:
+                    print(f"Warning: Multicall3 read failed, falling back to sequential calls: {e}")
+        return [self._as_tuple(call.call()) for call in calls]
+
+    def _is_missing(self) -> bool:
+        """True si aucun code n'est déployé à l'adresse Multicall3 (False si la vérification échoue)."""
+        try:
+            return len(self.w3.eth.get_code(self.multicall.address)) == 0
+        except Exception:
+            return False
+
+    def _encode(self, call) -> str:
+        """Données d'appel (sélecteur + arguments) d'un appel préparé."""
+        contract = self._contracts.get(call.address)
+        if contract is None:
+            contract = self._contracts[call.address] = self.w3.eth.contract(address=call.address,
+                                                                           abi=call.contract_abi)
+        if hasattr(contract, 'encode_abi'):  # web3 >= 7
+            return contract.encode_abi(call.fn_name, args=call.args, kwargs=call.kwargs)
+        return contract.encodeABI(fn_name=call.fn_name, args=call.args, kwargs=call.kwargs)
+
+    def _read_aggregated(self, calls: List) -> List[tuple]:
+        requests = [(call.address, False, self._encode(call)) for call in calls]
+        responses = self.multicall.functions.aggregate3(requests).call()
+        if len(responses) != len(calls):
+            raise ValueError(f"Multicall3 returned {len(responses)} results for {len(calls)} calls")
+
+        results = []
+        for call, (success, data) in zip(calls, responses):
+            if not success or not data:
+                raise ValueError(f"Multicall3 sub-call {call.fn_name} failed")
+            output_types = [output['type'] for output in call.abi['outputs']]
+            results.append(tuple(self.w3.codec.decode(output_types, data)))
+        return results
+
+    @staticmethod
+    def _as_tuple(value) -> tuple:
+        return tuple(value) if isinstance(value, (list, tuple)) else (value,)
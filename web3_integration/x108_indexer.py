@@ -0,0 +1,394 @@
+"""
+X-108 Event Indexer
+===================
+
+Miroir local et incrémental de l'état du contrat X108Token, alimenté par ses
+événements (`Transfer`, `Staked`, `Unstaked`, `FeeCollected`, `Voted`,
+`ProposalExecuted`) et stocké dans SQLite.
+
+- Checkpoint (bloc + hash) persistant : reprise là où l'indexation s'est arrêtée
+- Reorg-safe : le hash des blocs indexés est vérifié à chaque synchronisation ;
+  en cas de divergence, les événements orphelins sont annulés puis rejoués
+- Nombre de stakers, balances, stakes et frais servis depuis les index locaux
+- Les appels RPC d'une synchronisation se font hors verrou : les lectures
+  n'attendent que la transaction SQLite d'un lot, pas tout le rattrapage
+
+Usage :
+    indexer = X108Indexer(w3, contract_address, db_path='x108_index.db')
+    indexer.sync()                 # ou indexer.start() en arrière-plan
+    indexer.staker_count()
+"""
+
+from typing import Dict, List, Optional
+import json
+import sqlite3
+import threading
+
+from web3 import Web3
+
+EVENTS_ABI = [
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "name": "from", "type": "address"},
+            {"indexed": True, "name": "to", "type": "address"},
+            {"indexed": False, "name": "value", "type": "uint256"}
+        ],
+        "name": "Transfer",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "name": "user", "type": "address"},
+            {"indexed": False, "name": "amount", "type": "uint256"}
+        ],
+        "name": "Staked",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "name": "user", "type": "address"},
+            {"indexed": False, "name": "amount", "type": "uint256"}
+        ],
+        "name": "Unstaked",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [{"indexed": False, "name": "amount", "type": "uint256"}],
+        "name": "FeeCollected",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "name": "proposalId", "type": "uint256"},
+            {"indexed": True, "name": "voter", "type": "address"},
+            {"indexed": False, "name": "support", "type": "bool"},
+            {"indexed": False, "name": "weight", "type": "uint256"}
+        ],
+        "name": "Voted",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [{"indexed": True, "name": "proposalId", "type": "uint256"}],
+        "name": "ProposalExecuted",
+        "type": "event"
+    }
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    name TEXT NOT NULL,
+    args TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS balances (address TEXT PRIMARY KEY, amount TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS stakes (address TEXT PRIMARY KEY, amount TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, amount TEXT NOT NULL, count INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS votes (
+    proposal_id INTEGER NOT NULL,
+    voter TEXT NOT NULL,
+    support INTEGER NOT NULL,
+    weight TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    PRIMARY KEY (proposal_id, voter)
+);
+CREATE TABLE IF NOT EXISTS executed_proposals (
+    proposal_id INTEGER PRIMARY KEY,
+    block_number INTEGER NOT NULL
+);
+"""
+
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+
+class X108Indexer:
+    """
+    Indexe les événements X108Token dans une base SQLite locale.
+    """
+
+    def __init__(self, w3, contract_address: str, db_path: str = 'x108_index.db',
+                 start_block: int = 0, confirmations: int = 0, batch_blocks: int = 2000,
+                 reorg_depth: int = 128):
+        """
+        Args:
+            w3: Instance Web3 connectée
+            contract_address: Adresse du contrat X108Token
+            db_path: Fichier SQLite (":memory:" pour un index éphémère)
+            start_block: Premier bloc à indexer (bloc de déploiement)
+            confirmations: Blocs de profondeur ignorés en tête de chaîne
+            batch_blocks: Taille maximale d'une plage eth_getLogs
+            reorg_depth: Nombre de hashes de blocs conservés pour détecter un reorg
+        """
+        self.w3 = w3
+        self.address = Web3.to_checksum_address(contract_address)
+        self.contract = w3.eth.contract(address=self.address, abi=EVENTS_ABI)
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.batch_blocks = batch_blocks
+        self.reorg_depth = reorg_depth
+
+        self._events = {}
+        for abi in EVENTS_ABI:
+            signature = f"{abi['name']}({','.join(i['type'] for i in abi['inputs'])})"
+            self._events[Web3.to_hex(Web3.keccak(text=signature))] = abi['name']
+
+        # _lock protège la connexion SQLite (lectures et transactions courtes),
+        # _sync_lock sérialise les synchronisations : les appels RPC d'une
+        # synchronisation se font sans bloquer les lecteurs.
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._stop = threading.Event()
+        self._worker = None
+
+    # --- Synchronisation ---
+
+    def sync(self) -> int:
+        """
+        Indexe les nouveaux blocs jusqu'à la tête de chaîne (moins `confirmations`).
+
+        Returns:
+            Nombre d'événements indexés
+        """
+        with self._sync_lock:
+            self._handle_reorg()
+            head = self.w3.eth.block_number - self.confirmations
+            indexed = 0
+            with self._lock:
+                next_block = self._next_block()
+            while next_block <= head:
+                to_block = min(next_block + self.batch_blocks - 1, head)
+                indexed += self._index_range(next_block, to_block, head)
+                next_block = to_block + 1
+            return indexed
+
+    def start(self, poll_interval: float = 5.0):
+        """
+        Lance la synchronisation périodique dans un thread de fond.
+        """
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, args=(poll_interval,),
+                                            name='x108-indexer', daemon=True)
+            self._worker.start()
+
+    def close(self):
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+        with self._sync_lock, self._lock:
+            self._db.close()
+
+    def _run(self, poll_interval: float):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Warning: X108 indexer sync failed: {e}")
+            self._stop.wait(poll_interval)
+
+    def _next_block(self) -> int:
+        row = self._db.execute('SELECT block_number FROM checkpoint WHERE id = 1').fetchone()
+        return self.start_block if row is None else row[0] + 1
+
+    def _index_range(self, from_block: int, to_block: int, head: int) -> int:
+        logs = self.w3.eth.get_logs({
+            'address': self.address,
+            'topics': [list(self._events)],
+            'fromBlock': from_block,
+            'toBlock': to_block
+        })
+        logs = sorted(logs, key=lambda log: (log['blockNumber'], log['logIndex']))
+
+        # Hashes des blocs proches de la tête, pour la détection de reorg
+        hashes = {}
+        for log in logs:
+            hashes[log['blockNumber']] = Web3.to_hex(log['blockHash'])
+        recent = max(from_block, head - self.reorg_depth + 1)
+        for number in list(range(recent, to_block + 1)) + [to_block]:
+            if number not in hashes:
+                hashes[number] = Web3.to_hex(self.w3.eth.get_block(number)['hash'])
+
+        events = []
+        for log in logs:
+            name = self._events.get(Web3.to_hex(log['topics'][0]))
+            if name is not None:
+                events.append((name, self._decode(name, log), log))
+
+        # Verrou de la base pour la seule transaction du lot
+        with self._lock, self._db:
+            for name, args, log in events:
+                self._db.execute(
+                    'INSERT OR IGNORE INTO events (block_number, log_index, tx_hash, name, args) VALUES (?, ?, ?, ?, ?)',
+                    (log['blockNumber'], log['logIndex'], Web3.to_hex(log['transactionHash']), name, json.dumps(args))
+                )
+                self._apply(name, args, log['blockNumber'], 1)
+            self._db.executemany('INSERT OR REPLACE INTO blocks (number, hash) VALUES (?, ?)', hashes.items())
+            self._db.execute('DELETE FROM blocks WHERE number <= ?', (to_block - self.reorg_depth,))
+            self._db.execute(
+                'INSERT OR REPLACE INTO checkpoint (id, block_number, block_hash) VALUES (1, ?, ?)',
+                (to_block, hashes[to_block])
+            )
+        return len(logs)
+
+    def _decode(self, name: str, log) -> Dict:
+        event = self.contract.events[name]().process_log(log)
+        return {key: str(value) if isinstance(value, int) and not isinstance(value, bool) else value
+                for key, value in event['args'].items()}
+
+    # --- Reorgs ---
+
+    def _handle_reorg(self):
+        """
+        Compare les hashes indexés à la chaîne et annule les blocs orphelins.
+        """
+        with self._lock:
+            rows = self._db.execute('SELECT number, hash FROM blocks ORDER BY number DESC').fetchall()
+        if not rows:
+            return
+        fork_point = None
+        for number, block_hash in rows:
+            block = self.w3.eth.get_block(number)
+            if block is not None and Web3.to_hex(block['hash']) == block_hash:
+                fork_point = number
+                break
+        if fork_point == rows[0][0]:
+            return
+        if fork_point is None:
+            raise RuntimeError(f"Reorg deeper than {self.reorg_depth} blocks, rebuild the index")
+        self._rollback(fork_point)
+
+    def _rollback(self, fork_point: int):
+        with self._lock, self._db:
+            orphaned = self._db.execute(
+                'SELECT name, args, block_number FROM events WHERE block_number > ? '
+                'ORDER BY block_number DESC, log_index DESC',
+                (fork_point,)
+            ).fetchall()
+            for name, args, block_number in orphaned:
+                self._apply(name, json.loads(args), block_number, -1)
+            self._db.execute('DELETE FROM events WHERE block_number > ?', (fork_point,))
+            self._db.execute('DELETE FROM blocks WHERE number > ?', (fork_point,))
+            block_hash = self._db.execute('SELECT hash FROM blocks WHERE number = ?', (fork_point,)).fetchone()[0]
+            self._db.execute(
+                'INSERT OR REPLACE INTO checkpoint (id, block_number, block_hash) VALUES (1, ?, ?)',
+                (fork_point, block_hash)
+            )
+
+    # --- Application des événements (sign = 1 pour indexer, -1 pour annuler) ---
+
+    def _apply(self, name: str, args: Dict, block_number: int, sign: int):
+        if name == 'Transfer':
+            value = int(args['value'])
+            if args['from'] != ZERO_ADDRESS:
+                self._add('balances', args['from'], -sign * value)
+            if args['to'] != ZERO_ADDRESS:
+                self._add('balances', args['to'], sign * value)
+        elif name == 'Staked':
+            self._add('stakes', args['user'], sign * int(args['amount']))
+            self._add_total('staked', sign * int(args['amount']), 0)
+        elif name == 'Unstaked':
+            self._add('stakes', args['user'], -sign * int(args['amount']))
+            self._add_total('staked', -sign * int(args['amount']), 0)
+        elif name == 'FeeCollected':
+            self._add_total('fees', sign * int(args['amount']), sign)
+        elif name == 'Voted':
+            if sign > 0:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO votes (proposal_id, voter, support, weight, block_number) VALUES (?, ?, ?, ?, ?)',
+                    (int(args['proposalId']), args['voter'], int(args['support']), args['weight'], block_number)
+                )
+            else:
+                self._db.execute('DELETE FROM votes WHERE proposal_id = ? AND voter = ?',
+                                 (int(args['proposalId']), args['voter']))
+        elif name == 'ProposalExecuted':
+            if sign > 0:
+                self._db.execute('INSERT OR REPLACE INTO executed_proposals (proposal_id, block_number) VALUES (?, ?)',
+                                 (int(args['proposalId']), block_number))
+            else:
+                self._db.execute('DELETE FROM executed_proposals WHERE proposal_id = ?', (int(args['proposalId']),))
+
+    def _add(self, table: str, address: str, delta: int):
+        """
+        Montants en TEXT (uint256 dépasse les entiers SQLite) ; les lignes à zéro
+        sont supprimées pour que COUNT(*) donne directement le nombre de détenteurs.
+        """
+        row = self._db.execute(f'SELECT amount FROM {table} WHERE address = ?', (address,)).fetchone()
+        amount = (int(row[0]) if row else 0) + delta
+        if amount:
+            self._db.execute(f'INSERT OR REPLACE INTO {table} (address, amount) VALUES (?, ?)', (address, str(amount)))
+        else:
+            self._db.execute(f'DELETE FROM {table} WHERE address = ?', (address,))
+
+    def _add_total(self, name: str, delta: int, count_delta: int):
+        row = self._db.execute('SELECT amount, count FROM totals WHERE name = ?', (name,)).fetchone()
+        amount, count = (int(row[0]), row[1]) if row else (0, 0)
+        self._db.execute('INSERT OR REPLACE INTO totals (name, amount, count) VALUES (?, ?, ?)',
+                         (name, str(amount + delta), count + count_delta))
+
+    # --- Requêtes ---
+
+    def indexed_block(self) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute('SELECT block_number FROM checkpoint WHERE id = 1').fetchone()
+        return None if row is None else row[0]
+
+    def staker_count(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM stakes').fetchone()[0]
+
+    def holder_count(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM balances').fetchone()[0]
+
+    def staked_balance(self, address: str) -> int:
+        return self._amount('stakes', Web3.to_checksum_address(address))
+
+    def balance_of(self, address: str) -> int:
+        return self._amount('balances', Web3.to_checksum_address(address))
+
+    def total_staked(self) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT amount FROM totals WHERE name = 'staked'").fetchone()
+        return int(row[0]) if row else 0
+
+    def fee_totals(self) -> Dict:
+        """
+        Returns:
+            Dict avec total (micro-USDC) et count (nombre d'événements FeeCollected)
+        """
+        with self._lock:
+            row = self._db.execute("SELECT amount, count FROM totals WHERE name = 'fees'").fetchone()
+        return {'total': int(row[0]) if row else 0, 'count': row[1] if row else 0}
+
+    def top_stakers(self, limit: int = 10) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute('SELECT address, amount FROM stakes').fetchall()
+        rows.sort(key=lambda row: int(row[1]), reverse=True)
+        return [{'address': address, 'staked': int(amount)} for address, amount in rows[:limit]]
+
+    def executed_proposals(self) -> List[int]:
+        with self._lock:
+            return [row[0] for row in self._db.execute('SELECT proposal_id FROM executed_proposals ORDER BY proposal_id')]
+
+    def _amount(self, table: str, address: str) -> int:
+        with self._lock:
+            row = self._db.execute(f'SELECT amount FROM {table} WHERE address = ?', (address,)).fetchone()
+        return int(row[0]) if row else 0
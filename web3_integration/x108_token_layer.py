@@ -12,25 +12,154 @@ Fonctionnalités :
 - Distribution aux stakers $X108
 - Récupération des paramètres de gouvernance depuis le smart contract
 - Statistiques token economics
+- Cache TTL des paramètres de gouvernance (rafraîchi en arrière-plan)
+
+web3 (et eth_account) ne sont importés qu'au premier usage on-chain : en mode
+démo, importer ce module ne charge aucune dépendance lourde.
 """
 
-from web3 import Web3
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 import os
 import json
+import threading
+import time
+
+from web3_integration import fee_engine
+from web3_integration.multicall import MulticallReader
+
+DEFAULT_GOVERNANCE_PARAMS = {
+    'temporal_window': 10,  # secondes
+    'coherence_threshold': 0.6  # 0.0 à 1.0
+}
+
+
+class GovernanceParamsCache:
+    """
+    Cache TTL « stale-while-revalidate » des paramètres de gouvernance.
+    
+    - Valeur fraîche (âge < ttl) : servie depuis la mémoire
+    - Valeur périmée (âge < ttl + stale_ttl) : servie immédiatement, un
+      thread de fond la rafraîchit
+    - Au-delà (ou au premier appel) : lecture synchrone
+    
+    Si `poll_events` est fourni, le thread de fond l'appelle toutes les
+    `poll_interval` secondes ; un résultat vrai (ex. ProposalExecuted
+    observé) déclenche un rafraîchissement immédiat.
+    """
+    
+    def __init__(self, fetch: Callable[[], Dict], ttl: float = 30.0, stale_ttl: float = 300.0,
+                 poll_events: Optional[Callable[[], bool]] = None, poll_interval: float = 5.0):
+        """
+        Args:
+            fetch: Lecture des paramètres (appels RPC) ; peut lever une exception
+            ttl: Durée de fraîcheur (secondes)
+            stale_ttl: Durée supplémentaire pendant laquelle la valeur périmée est servie
+            poll_events: Fonction renvoyant True si les paramètres ont changé on-chain
+            poll_interval: Période de polling des événements (secondes)
+        """
+        self._fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._poll_events = poll_events
+        self._poll_interval = poll_interval
+        self._value = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_requested = threading.Event()
+        self._closed = threading.Event()
+        self._worker = None
+    
+    def get(self) -> Dict:
+        """
+        Renvoie les paramètres en mémoire, en déclenchant si besoin un rafraîchissement.
+        """
+        if self._worker is None:
+            self.start()
+        value = self._value
+        age = time.monotonic() - self._fetched_at
+        if value is not None and age < self.ttl:
+            return value
+        if value is not None and age < self.ttl + self.stale_ttl:
+            self._request_refresh()
+            return value
+        return self.refresh()
+    
+    def prime(self, value: Dict):
+        """
+        Enregistre une valeur lue par ailleurs (ex. dans un multicall) comme fraîche.
+        """
+        with self._lock:
+            self._value = dict(value)
+            self._fetched_at = time.monotonic()
+    
+    def refresh(self) -> Dict:
+        """
+        Relit les paramètres de façon synchrone (valeur en cache conservée en cas d'échec).
+        """
+        # Appels RPC hors verrou : un get() concurrent sert la valeur en cache sans attendre
+        try:
+            value = dict(self._fetch())
+        except Exception as e:
+            print(f"Warning: Could not refresh governance params: {e}")
+            return self._value
+        with self._lock:
+            self._value = value
+            self._fetched_at = time.monotonic()
+        return value
+    
+    def invalidate(self):
+        """
+        Marque la valeur comme périmée et lance un rafraîchissement en arrière-plan.
+        """
+        self._fetched_at = 0.0 if self._value is None else time.monotonic() - self.ttl
+        self._request_refresh()
+    
+    def start(self):
+        """
+        Démarre le thread de fond (rafraîchissements + polling des événements).
+        """
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='governance-params', daemon=True)
+                self._worker.start()
+    
+    def close(self):
+        self._closed.set()
+        self._refresh_requested.set()
+    
+    def _request_refresh(self):
+        if self._worker is None:
+            self.start()
+        self._refresh_requested.set()
+    
+    def _run(self):
+        while not self._closed.is_set():
+            timeout = self._poll_interval if self._poll_events is not None else None
+            requested = self._refresh_requested.wait(timeout)
+            if self._closed.is_set():
+                return
+            self._refresh_requested.clear()
+            if not requested:
+                try:
+                    requested = self._poll_events()
+                except Exception as e:
+                    print(f"Warning: Could not poll governance events: {e}")
+            if requested:
+                self.refresh()
 
 class X108TokenEconomics:
     """
     Gère l'économie du token $X108 et l'intégration avec le smart contract.
     """
     
-    def __init__(self, contract_address: Optional[str] = None, provider_url: Optional[str] = None):
+    def __init__(self, contract_address: Optional[str] = None, provider_url: Optional[str] = None, w3=None):
         """
         Initialize the token economics layer.
         
         Args:
             contract_address: Address of the deployed X108Token contract
             provider_url: RPC endpoint (Base, Ethereum, etc.)
+            w3: Instance Web3 déjà connectée (ex. chaîne locale), à la place de provider_url
         """
         # Configuration (peut être overridé par variables d'environnement)
         self.contract_address = contract_address or os.getenv('X108_CONTRACT_ADDRESS', '0x0000000000000000000000000000000000000000')
@@ -41,13 +170,59 @@ class X108TokenEconomics:
         
         if not self.demo_mode:
             try:
-                self.w3 = Web3(Web3.HTTPProvider(self.provider_url))
+                if w3 is None:
+                    from web3 import Web3
+                    w3 = Web3(Web3.HTTPProvider(self.provider_url))
+                self.w3 = w3
                 self.contract = self._load_contract()
+                self.reader = MulticallReader(self.w3)
             except Exception as e:
                 print(f"Warning: Could not connect to Web3 provider. Running in demo mode. Error: {e}")
                 self.demo_mode = True
         
+        # Paramètres de gouvernance servis depuis la mémoire, rafraîchis sur TTL
+        # ou dès qu'une proposition est exécutée on-chain
+        self.governance_cache = None
+        if not self.demo_mode:
+            self._last_event_block = None
+            self.governance_cache = GovernanceParamsCache(
+                self._fetch_governance_params,
+                ttl=float(os.getenv('X108_PARAMS_TTL', '30')),
+                poll_events=self._poll_proposal_executed
+            )
+        
+        # Index local des événements (stakers, frais) si X108_INDEX_DB est défini
+        self.indexer = None
+        index_db = os.getenv('X108_INDEX_DB')
+        if not self.demo_mode and index_db:
+            from web3_integration.x108_indexer import X108Indexer
+            self.indexer = X108Indexer(
+                self.w3,
+                self.contract_address,
+                db_path=index_db,
+                start_block=int(os.getenv('X108_INDEX_START_BLOCK', '0'))
+            )
+            self.indexer.start()
+        
+        # Enregistrement on-chain des frais, par lots signés, si X108_SIGNER_KEY est défini
+        self.fee_recorder = None
+        signer_key = os.getenv('X108_SIGNER_KEY')
+        if not self.demo_mode and signer_key:
+            from web3_integration.fee_recorder import FeeRecorder
+            self.fee_recorder = FeeRecorder(
+                self.w3,
+                self.contract,
+                signer_key,
+                flush_interval=float(os.getenv('X108_FEE_FLUSH_INTERVAL', '60'))
+            )
+            self.fee_recorder.start()
+        
+        # Résultat du dernier health check (voir is_healthy)
+        self._healthy = True
+        self._health_checked_at = None
+        
         # Stats en mémoire pour le mode démo
+        self._fees_collected_micro = 0
         self.demo_stats = {
             'total_transactions': 0,
             'total_fees_collected': 0.0,
@@ -97,11 +272,24 @@ class X108TokenEconomics:
                 "outputs": [{"type": "uint256"}],
                 "stateMutability": "view",
                 "type": "function"
+            },
+            {
+                "inputs": [],
+                "name": "getSafetyParameters",
+                "outputs": [{"type": "uint256"}, {"type": "uint256"}],
+                "stateMutability": "view",
+                "type": "function"
+            },
+            {
+                "anonymous": False,
+                "inputs": [{"indexed": True, "name": "proposalId", "type": "uint256"}],
+                "name": "ProposalExecuted",
+                "type": "event"
             }
         ]
         
         return self.w3.eth.contract(
-            address=Web3.to_checksum_address(self.contract_address),
+            address=self.w3.to_checksum_address(self.contract_address),
             abi=contract_abi
         )
     
@@ -115,33 +303,50 @@ class X108TokenEconomics:
         Returns:
             Dict avec net_amount, fee, et distribution info
         """
-        # Frais de 0.1% (10 basis points)
-        fee = payment_amount * 0.001
-        net_amount = payment_amount - fee
+        # Frais de 0.1% (10 basis points), en micro-USDC entiers comme le contrat
+        net, fee, stakers, treasury, buyback = fee_engine.settle(fee_engine.to_micro(payment_amount))
         
         # Mise à jour des stats (mode démo ou on-chain)
         if self.demo_mode:
-            self.demo_stats['total_transactions'] += 1
-            self.demo_stats['total_fees_collected'] += fee
-        else:
-            try:
-                # Appeler le smart contract pour collecter les frais
-                # (nécessite une transaction signée en production)
-                pass
-            except Exception as e:
-                print(f"Warning: Could not record fee on-chain: {e}")
+            self._record_fees(1, fee)
+        elif self.fee_recorder is not None:
+            # Cumulé puis soumis en un collectFee agrégé par le thread du recorder
+            self.fee_recorder.record(net + fee)
         
         return {
-            'net_amount': round(net_amount, 6),
-            'fee': round(fee, 6),
+            'net_amount': fee_engine.from_micro(net),
+            'fee': fee_engine.from_micro(fee),
             'fee_distribution': {
-                'stakers': round(fee * 0.5, 6),  # 50% aux stakers
-                'treasury': round(fee * 0.3, 6),  # 30% au treasury
-                'buyback': round(fee * 0.2, 6)   # 20% buyback
+                'stakers': fee_engine.from_micro(stakers),  # 50% aux stakers
+                'treasury': fee_engine.from_micro(treasury),  # 30% au treasury
+                'buyback': fee_engine.from_micro(buyback)   # 20% buyback (reste)
             },
             'mode': 'demo' if self.demo_mode else 'on-chain'
         }
     
+    def charge_transaction_fees_bulk(self, payment_amounts) -> Dict:
+        """
+        Applique les frais à un lot de paiements en un seul appel vectorisé.
+        
+        Args:
+            payment_amounts: Montants en USDC (tableau ou séquence)
+            
+        Returns:
+            Dict de tableaux micro-USDC (net, fee, stakers, treasury, buyback) et totaux exacts
+        """
+        settlement = fee_engine.settle_bulk(fee_engine.to_micro_array(payment_amounts))
+        if self.demo_mode:
+            self._record_fees(len(settlement['fee']), settlement['totals']['fee'])
+        elif self.fee_recorder is not None:
+            self.fee_recorder.record(settlement['totals']['net'] + settlement['totals']['fee'], len(settlement['fee']))
+        settlement['mode'] = 'demo' if self.demo_mode else 'on-chain'
+        return settlement
+    
+    def _record_fees(self, count: int, fee_micro: int):
+        self.demo_stats['total_transactions'] += count
+        self._fees_collected_micro += fee_micro
+        self.demo_stats['total_fees_collected'] = fee_engine.from_micro(self._fees_collected_micro)
+    
     def get_governance_params(self) -> Dict:
         """
         Récupère les paramètres de sécurité depuis le smart contract.
@@ -150,28 +355,46 @@ class X108TokenEconomics:
             Dict avec temporal_window et coherence_threshold
         """
         if self.demo_mode:
-            return {
-                'temporal_window': 10,  # secondes
-                'coherence_threshold': 0.6,  # 0.0 à 1.0
-                'source': 'demo'
-            }
+            return {**DEFAULT_GOVERNANCE_PARAMS, 'source': 'demo'}
         
-        try:
-            temporal_window = self.contract.functions.temporalWindow().call()
-            coherence_threshold = self.contract.functions.coherenceThreshold().call() / 100.0  # Convertir de 60 à 0.6
-            
-            return {
-                'temporal_window': temporal_window,
-                'coherence_threshold': coherence_threshold,
-                'source': 'on-chain'
-            }
-        except Exception as e:
-            print(f"Warning: Could not fetch governance params: {e}")
-            return {
-                'temporal_window': 10,
-                'coherence_threshold': 0.6,
-                'source': 'fallback'
-            }
+        params = self.governance_cache.get()
+        if params is None:
+            return {**DEFAULT_GOVERNANCE_PARAMS, 'source': 'fallback'}
+        return params
+    
+    def _fetch_governance_params(self) -> Dict:
+        """
+        Lit les paramètres de sécurité on-chain (un seul appel RPC, sans cache).
+        """
+        return self._governance_from_chain(self.contract.functions.getSafetyParameters().call())
+    
+    @staticmethod
+    def _governance_from_chain(safety_parameters) -> Dict:
+        temporal_window, coherence_threshold = safety_parameters
+        return {
+            'temporal_window': temporal_window,
+            'coherence_threshold': coherence_threshold / 100.0,  # Convertir de 60 à 0.6
+            'source': 'on-chain'
+        }
+    
+    def _poll_proposal_executed(self) -> bool:
+        """
+        Renvoie True si un événement ProposalExecuted a été émis depuis le dernier appel.
+        """
+        latest = self.w3.eth.block_number
+        if self._last_event_block is None:
+            self._last_event_block = latest
+            return False
+        if latest <= self._last_event_block:
+            return False
+        logs = self.w3.eth.get_logs({
+            'address': self.contract.address,
+            'topics': [self.w3.to_hex(self.w3.keccak(text='ProposalExecuted(uint256)'))],
+            'fromBlock': self._last_event_block + 1,
+            'toBlock': latest
+        })
+        self._last_event_block = latest
+        return len(logs) > 0
     
     def get_token_stats(self) -> Dict:
         """
@@ -184,18 +407,32 @@ class X108TokenEconomics:
             return self.demo_stats
         
         try:
-            total_staked = self.contract.functions.totalStaked().call()
-            apy = self.contract.functions.estimateAPY().call()
+            # Un seul aller-retour (Multicall3) ; les paramètres de gouvernance
+            # lus au passage rafraîchissent aussi leur cache
+            functions = self.contract.functions
+            (total_staked,), (apy,), safety_parameters = self.reader.read([
+                functions.totalStaked(),
+                functions.estimateAPY(),
+                functions.getSafetyParameters()
+            ])
+            self.governance_cache.prime(self._governance_from_chain(safety_parameters))
             
-            return {
+            stats = {
                 'total_transactions': self.demo_stats['total_transactions'],
                 'total_fees_collected': self.demo_stats['total_fees_collected'],
-                'total_stakers': 89,  # À récupérer depuis un indexer en production
+                'total_stakers': 89,  # Valeur fictive sans indexer (X108_INDEX_DB)
                 'apy': apy / 100.0,  # Convertir de 1430 à 14.3%
                 'token_price': 0.23,  # À récupérer depuis un oracle de prix
                 'market_cap': 2300000.0,  # Calculé depuis supply * price
                 'total_staked': total_staked / 10**18  # Convertir de wei
             }
+            if self.indexer is not None and self.indexer.indexed_block() is not None:
+                fees = self.indexer.fee_totals()
+                stats['total_stakers'] = self.indexer.staker_count()
+                stats['onchain_fees_collected'] = fees['total'] / 10**6  # collectFee reçoit des micro-USDC
+                stats['onchain_fee_events'] = fees['count']
+                stats['indexed_block'] = self.indexer.indexed_block()
+            return stats
         except Exception as e:
             print(f"Warning: Could not fetch token stats: {e}")
             return self.demo_stats
@@ -227,6 +464,36 @@ class X108TokenEconomics:
 **Mode:** {fee_info['mode']}
         """
     
+    def is_healthy(self, max_age: float = 30.0) -> bool:
+        """
+        Vérifie que le provider Web3 répond, au plus une fois par `max_age` secondes.
+        
+        Returns:
+            True en mode démo ou si le dernier appel au provider a réussi
+        """
+        if self.demo_mode:
+            return True
+        now = time.monotonic()
+        if self._health_checked_at is None or now - self._health_checked_at >= max_age:
+            try:
+                self._healthy = self.w3.is_connected()
+            except Exception:
+                self._healthy = False
+            self._health_checked_at = now
+        return self._healthy
+    
+    def close(self):
+        """
+        Arrête les threads de fond (cache de gouvernance, indexer) et soumet
+        les frais encore en attente.
+        """
+        if self.fee_recorder is not None:
+            self.fee_recorder.close()
+        if self.governance_cache is not None:
+            self.governance_cache.close()
+        if self.indexer is not None:
+            self.indexer.close()
+    
     def is_contract_deployed(self) -> bool:
         """
         Vérifie si le contrat est déployé et accessible.